@@ -2,7 +2,9 @@ import re
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from pathlib import Path
+
+import dashboard_kpi
+import period_store
 
 st.set_page_config(page_title="S&OP Dashboard", layout="wide", initial_sidebar_state="expanded")
 
@@ -273,8 +275,6 @@ st.markdown(f"""
 """, unsafe_allow_html=True)
 
 # ── 기간 선택 ──────────────────────────────────────────────────────────
-DATA_ROOT = Path("data")
-
 def _month_num(s: str) -> int:
     m = re.search(r'\d+', s)
     return int(m.group()) if m else 0
@@ -283,17 +283,7 @@ def _year_num(s: str) -> int:
     m = re.search(r'\d{4}', s)
     return int(m.group()) if m else 0
 
-def get_available_periods():
-    periods = []
-    if DATA_ROOT.exists():
-        for year_dir in DATA_ROOT.iterdir():
-            if year_dir.is_dir() and re.search(r'\d{4}', year_dir.name):
-                for month_dir in year_dir.iterdir():
-                    if month_dir.is_dir() and re.search(r'\d+', month_dir.name):
-                        periods.append((year_dir.name, month_dir.name))
-    return periods
-
-avail_periods = get_available_periods()
+avail_periods = dashboard_kpi.list_periods()
 avail_years   = sorted({y for y, _ in avail_periods}, key=_year_num, reverse=True)
 
 c_filter1, c_filter2, c_spacer = st.columns([0.9, 0.9, 5])
@@ -326,73 +316,31 @@ with c_spacer:
     </div>
     """, unsafe_allow_html=True)
 
-# ── 데이터 로드 ────────────────────────────────────────────────────────
-inv_path = DATA_ROOT / selected_year / selected_month / "inventory.csv"
-inv_df = None
+# ── KPI 스냅샷 로드 (inventory 저장 시 계산된 kpi_snapshot.json) ────────
+snapshot = None
 try:
-    if inv_path.exists():
-        inv_df = pd.read_csv(inv_path, encoding="utf-8-sig")
+    snapshot = dashboard_kpi.load_snapshot((selected_year, selected_month))
 except Exception:
     pass
 
-# ── Stockout 계산 (inventory.csv → 재고일수) ──────────────────────────
+# ── Stockout 지표 (자재코드별 재고일수) ───────────────────────────────
 n_danger = n_warning = total_mat = "-"
-if inv_df is not None:
-    try:
-        from inventory_utils2 import stock_out
-        so_df = stock_out(inv_df)
-        so_df["기말수량"] = pd.to_numeric(so_df["기말수량"], errors="coerce").fillna(0)
-        so_df["3평판"]   = pd.to_numeric(so_df["3평판"],   errors="coerce").fillna(0)
-
-        agg = (
-            so_df.groupby("자재코드", as_index=False)
-            .agg(기말수량=("기말수량", "sum"), 판매평균=("3평판", "first"))
-        )
-        agg["재고일수"] = agg.apply(
-            lambda r: r["기말수량"] / (r["판매평균"] / 30.0) if r["판매평균"] > 0 else 999.0,
-            axis=1
-        )
-        total_mat = len(agg)
-        n_danger  = int((agg["재고일수"] < 30).sum())
-        n_warning = int(((agg["재고일수"] >= 30) & (agg["재고일수"] < 60)).sum())
-    except Exception:
-        pass
-
-# ── Aging Stock 계산 (inventory.csv → 유효기한구간) ───────────────────
+if snapshot is not None:
+    total_mat = snapshot["stockout"]["total"]
+    n_danger  = snapshot["stockout"]["danger"]
+    n_warning = snapshot["stockout"]["warning"]
+
+# ── Aging Stock 지표 (유효기한구간별 배치 수/금액) ─────────────────────
 m6_c = m7_c = m9_c = m12_c = "-"
 aging_v6_fmt = aging_v7_fmt = aging_v9_fmt = aging_v12_fmt = "-"
+aging_kpi = snapshot["aging"] if snapshot is not None else None
 
-if inv_df is not None and "유효기한구간" in inv_df.columns:
-    try:
-        BUCKET_COL = "유효기한구간"
-        VALUE_COL  = "기말금액"
-
-        inv_df[VALUE_COL] = pd.to_numeric(inv_df[VALUE_COL], errors="coerce").fillna(0)
-
-        def _aging_metrics(buckets):
-            sub = inv_df[inv_df[BUCKET_COL].isin(buckets)]
-            return (
-                sub["배치"].nunique() if "배치" in sub.columns else len(sub),
-                sub[VALUE_COL].sum()
-            )
-
-        risk_6  = ["폐기확정(유효기한 지남)", "1개월 미만", "2개월 미만",
-                   "3개월 미만", "4개월 미만", "5개월 미만", "6개월 미만"]
-        risk_7  = ["7개월 미만"]
-        risk_9  = ["8개월 미만", "9개월 미만"]
-        risk_12 = ["10개월 미만", "11개월 미만", "12개월 미만"]
-
-        m6_c,  m6_v  = _aging_metrics(risk_6)
-        m7_c,  m7_v  = _aging_metrics(risk_7)
-        m9_c,  m9_v  = _aging_metrics(risk_9)
-        m12_c, m12_v = _aging_metrics(risk_12)
-
-        aging_v6_fmt  = f"₩{m6_v/1e8:,.1f}억"
-        aging_v7_fmt  = f"₩{m7_v/1e8:,.1f}억"
-        aging_v9_fmt  = f"₩{m9_v/1e8:,.1f}억"
-        aging_v12_fmt = f"₩{m12_v/1e8:,.1f}억"
-    except Exception:
-        pass
+if aging_kpi is not None:
+    g = aging_kpi["groups"]
+    m6_c,  aging_v6_fmt  = g["6개월"]["batches"],  f"₩{g['6개월']['value']/1e8:,.1f}억"
+    m7_c,  aging_v7_fmt  = g["7개월"]["batches"],  f"₩{g['7개월']['value']/1e8:,.1f}억"
+    m9_c,  aging_v9_fmt  = g["9개월"]["batches"],  f"₩{g['9개월']['value']/1e8:,.1f}억"
+    m12_c, aging_v12_fmt = g["12개월"]["batches"], f"₩{g['12개월']['value']/1e8:,.1f}억"
 
 # ── KPI 상단 4개 ───────────────────────────────────────────────────────
 st.markdown('<div class="section-label">핵심 리스크 현황</div>', unsafe_allow_html=True)
@@ -441,7 +389,7 @@ with left_col:
         </div>
     </div>""", unsafe_allow_html=True)
 
-    if inv_df is not None:
+    if snapshot is not None:
         s1, s2, s3 = st.columns(3)
         with s1:
             st.markdown(f"""
@@ -476,7 +424,7 @@ with right_col:
         </div>
     </div>""", unsafe_allow_html=True)
 
-    if inv_df is not None and "유효기한구간" in inv_df.columns:
+    if aging_kpi is not None:
         a1, a2 = st.columns(2)
         a3, a4 = st.columns(2)
         aging_rows = [
@@ -502,26 +450,28 @@ st.markdown("<div style='height:0.8rem'></div>", unsafe_allow_html=True)
 st.markdown("<hr>", unsafe_allow_html=True)
 st.markdown('<div class="section-label">데이터 현황</div>', unsafe_allow_html=True)
 
-base_dir = DATA_ROOT / selected_year / selected_month
 file_checks = [
-    ("inventory.csv",              "재고 현황",      "📋"),
-    ("forecasted_inventory.csv",   "예측 부진재고",  "🔮"),
-    ("simulation.csv",             "FEFO 시뮬레이션","⚙️"),
-    ("major_management_inventory.csv", "중점관리 품목","⭐"),
-    ("소진계획.csv",                "소진계획",       "📝"),
+    ("inventory",                  "재고 현황",      "📋"),
+    ("forecasted_inventory",       "예측 부진재고",  "🔮"),
+    ("simulation",                 "FEFO 시뮬레이션","⚙️"),
+    ("major_management_inventory", "중점관리 품목",  "⭐"),
+    ("depletion_plan",             "소진계획",       "📝"),
 ]
 
+# 행 수/크기는 저장 시 기록된 manifest.json 에서 읽음 (파일 내용은 열지 않음)
+try:
+    period_manifest = period_store.period_manifest((selected_year, selected_month))
+except Exception:
+    period_manifest = {}
+
 fc_cols = st.columns(len(file_checks))
-for i, (fname, label, icon) in enumerate(file_checks):
-    fpath = base_dir / fname
+for i, (artifact, label, icon) in enumerate(file_checks):
+    fname = period_store.artifact_path((selected_year, selected_month), artifact, "csv").name
+    entry = period_manifest.get(artifact)
     with fc_cols[i]:
-        if fpath.exists():
-            try:
-                size_kb = fpath.stat().st_size / 1024
-                row_count = sum(1 for _ in open(fpath, encoding="utf-8-sig")) - 1
-            except Exception:
-                size_kb = 0
-                row_count = 0
+        if entry is not None:
+            size_kb = entry.get("size", 0) / 1024
+            row_count = entry.get("rows", 0)
             st.markdown(f"""
             <div style="background:#FFFFFF; border:1px solid #D1FAE5; border-top:3px solid #10B981;
                         border-radius:10px; padding:0.85rem 1rem; text-align:center;">
@@ -3,6 +3,8 @@ import pandas as pd
 import io
 import numpy as np
 
+from utils import shared_code_keys
+
 st.set_page_config(page_title="S&OP System - 재고 시뮬레이션", layout="wide")
 st.title("🧪 재고 시뮬레이션 - 분류/원가율/평판 매핑(자재코드 기준)")
 
@@ -51,23 +53,6 @@ def pick_df(obj):
         return obj[list(obj.keys())[0]]
     return obj
 
-def normalize_code_to_int_string(s: pd.Series) -> pd.Series:
-    """
-    숫자/문자/9310288.0/공백/쉼표 섞여 있어도
-    '정수 문자열'로 통일하여 매핑 안정화
-    """
-    x = s.astype(str).str.strip()
-    x = x.str.replace(",", "", regex=False)
-
-    num = pd.to_numeric(x, errors="coerce")
-
-    out = x.copy()
-    mask = num.notna()
-    out.loc[mask] = num.loc[mask].round(0).astype("Int64").astype(str)
-
-    out = out.replace({"nan": "", "<NA>": ""})
-    return out
-
 # ======================================================
 # ✅ 파일에서 필요한 컬럼 다 합치기 (매핑)
 # ======================================================
@@ -111,10 +96,9 @@ def build_mapped_inventory_df(
            or (df_name == "평판기준" and need_col not in rating.columns):
             raise ValueError(f"필수 컬럼 누락: [{df_name}]에 '{need_col}' 컬럼이 없습니다.")
 
-    # 4) 키 정규화
-    inv["_mat_key"] = normalize_code_to_int_string(inv[inv_code_col])
-    cls["_mat_key"] = normalize_code_to_int_string(cls[cls_code_col])
-    rating["_mat_key"] = normalize_code_to_int_string(rating[rating_code_col])
+    # 4) 키 정규화 (세 표가 categories 공유 → merge는 정수 코드 join)
+    inv["_mat_key"], cls["_mat_key"], rating["_mat_key"] = shared_code_keys(
+        inv[inv_code_col], cls[cls_code_col], rating[rating_code_col], to_int=True)
 
     # 5) 기준정보: 가져올 컬럼 존재 체크 + 매핑 테이블 생성
     for col in cls_take_cols:
@@ -253,10 +237,9 @@ def build_mapped_inventory_df2(
            or (df_name == "평판기준" and need_col not in rating.columns):
             raise ValueError(f"필수 컬럼 누락: [{df_name}]에 '{need_col}' 컬럼이 없습니다.")
 
-    # 4) 키 정규화
-    inv["_mat_key"] = normalize_code_to_int_string(inv[inv_code_col])
-    cls["_mat_key"] = normalize_code_to_int_string(cls[cls_code_col])
-    rating["_mat_key"] = normalize_code_to_int_string(rating[rating_code_col])
+    # 4) 키 정규화 (세 표가 categories 공유 → merge는 정수 코드 join)
+    inv["_mat_key"], cls["_mat_key"], rating["_mat_key"] = shared_code_keys(
+        inv[inv_code_col], cls[cls_code_col], rating[rating_code_col], to_int=True)
 
     # 5) 기준정보: 가져올 컬럼 존재 체크 + 매핑 테이블 생성
     for col in cls_take_cols:
@@ -392,10 +375,9 @@ def build_mapped_inventory_df3(
            or (df_name == "평판기준" and need_col not in rating.columns):
             raise ValueError(f"필수 컬럼 누락: [{df_name}]에 '{need_col}' 컬럼이 없습니다.")
 
-    # 4) 키 정규화
-    inv["_mat_key"] = normalize_code_to_int_string(inv[inv_code_col])
-    cls["_mat_key"] = normalize_code_to_int_string(cls[cls_code_col])
-    rating["_mat_key"] = normalize_code_to_int_string(rating[rating_code_col])
+    # 4) 키 정규화 (세 표가 categories 공유 → merge는 정수 코드 join)
+    inv["_mat_key"], cls["_mat_key"], rating["_mat_key"] = shared_code_keys(
+        inv[inv_code_col], cls[cls_code_col], rating[rating_code_col], to_int=True)
 
     # 5) 기준정보: 가져올 컬럼 존재 체크 + 매핑 테이블 생성
     for col in cls_take_cols:
@@ -444,6 +426,7 @@ def build_mapped_inventory_df3(
     out[amt_col] = pd.to_numeric(out[amt_col], errors="coerce").fillna(0.0)
 
     # 그룹키: 자재(원본) 기준으로 묶기
+    # (_mat_key는 inv/cls/rating 공용 categories의 categorical → observed=True로 inv에 있는 자재만)
     group_key = inv_code_col if inv_code_col in out.columns else "_mat_key"
 
     # 집계 규칙 만들기
@@ -454,7 +437,7 @@ def build_mapped_inventory_df3(
         if c not in agg_map and c != group_key:
             agg_map[c] = "first"
 
-    out = out.groupby(group_key, as_index=False).agg(agg_map)
+    out = out.groupby(group_key, as_index=False, observed=True).agg(agg_map)
 
 
     # 8) 결측 처리
@@ -638,9 +621,9 @@ def build_mapped_cancel_po_df(
     # --------------------------------------------------
     # 3) 키 정규화 (제품코드 기준)
     # --------------------------------------------------
-    out["_mat_key"] = normalize_code_to_int_string(out["자재"])
-    cls["_mat_key"] = normalize_code_to_int_string(cls[cls_code_col])
-    rating["_mat_key"] = normalize_code_to_int_string(rating[rating_code_col])
+    # 세 표가 categories 공유 → merge는 정수 코드 join
+    out["_mat_key"], cls["_mat_key"], rating["_mat_key"] = shared_code_keys(
+        out["자재"], cls[cls_code_col], rating[rating_code_col], to_int=True)
 
     # --------------------------------------------------
     # 4) 기준정보 매핑 (대분류/소분류/원가율)
@@ -782,9 +765,9 @@ def build_mapped_cancel_po_df2(
     # --------------------------------------------------
     # 3) 키 정규화
     # --------------------------------------------------
-    out["_mat_key"] = normalize_code_to_int_string(out["자재"])
-    cls["_mat_key"] = normalize_code_to_int_string(cls[cls_code_col])
-    rating["_mat_key"] = normalize_code_to_int_string(rating[rating_code_col])
+    # 세 표가 categories 공유 → merge는 정수 코드 join
+    out["_mat_key"], cls["_mat_key"], rating["_mat_key"] = shared_code_keys(
+        out["자재"], cls[cls_code_col], rating[rating_code_col], to_int=True)
 
     # --------------------------------------------------
     # 4) 기준정보 매핑
@@ -918,9 +901,9 @@ def build_mapped_cancel_po_df3(
     # --------------------------------------------------
     # 3) 키 정규화 (제품코드 기준)
     # --------------------------------------------------
-    out["_mat_key"] = normalize_code_to_int_string(out["자재"])
-    cls["_mat_key"] = normalize_code_to_int_string(cls[cls_code_col])
-    rating["_mat_key"] = normalize_code_to_int_string(rating[rating_code_col])
+    # 세 표가 categories 공유 → merge는 정수 코드 join
+    out["_mat_key"], cls["_mat_key"], rating["_mat_key"] = shared_code_keys(
+        out["자재"], cls[cls_code_col], rating[rating_code_col], to_int=True)
 
     # --------------------------------------------------
     # 4) 기준정보 매핑 (대분류/소분류/원가율)
@@ -1332,7 +1315,7 @@ def build_major_only_report_table(
         }])
         rows.append(total)
 
-    for maj, maj_df in piv.groupby(major_col, sort=False):
+    for maj, maj_df in piv.groupby(major_col, sort=False, observed=True):
         if include_major_subtotal:
             maj_total = pd.DataFrame([{
                 major_col: maj,
@@ -1803,8 +1786,9 @@ def build_category_quarter_table_column_style(
     # --------------------------------
     # 4) 카테고리(대/소분류) KPI 집계
     # --------------------------------
+    # 대분류/소분류는 preprocess_df에서 category로 올 수 있음 → observed=True (있는 조합만)
     kpi = (
-        mat_agg.groupby(list(cat_cols), dropna=False)
+        mat_agg.groupby(list(cat_cols), dropna=False, observed=True)
         .agg(
             원가=(cost_col, "sum"),
             출하원가=(ship_cost_col, "sum"),
@@ -1829,7 +1813,7 @@ def build_category_quarter_table_column_style(
     # 5) 대분류 소계
     # --------------------------------
     major_kpi = (
-        mat_agg.groupby(cat_cols[0], dropna=False)
+        mat_agg.groupby(cat_cols[0], dropna=False, observed=True)
         .agg(
             원가=(cost_col, "sum"),
             출하원가=(ship_cost_col, "sum"),
@@ -1845,7 +1829,7 @@ def build_category_quarter_table_column_style(
 
     major_q = (
         base.dropna(subset=["_분기"])
-        .groupby([cat_cols[0], "_분기"])[value_col]
+        .groupby([cat_cols[0], "_분기"], observed=True)[value_col]
         .sum()
         .unstack("_분기")
         .reindex(columns=quarter_cols, fill_value=0.0)
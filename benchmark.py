@@ -0,0 +1,309 @@
+"""
+부진재고 시뮬레이션 성능 측정 스크립트
+
+    python benchmark.py                       # 2.5k ~ 500k행, numpy/python 엔진
+    python benchmark.py --sizes 2500 50000 --engines numpy
+
+    python benchmark.py --pipeline            # 10k / 100k / 1M 배치행, Aging 파이프라인 단계별 측정
+    python benchmark.py --pipeline --sizes 10000 --threshold 0.3 --fail-on-regression
+"""
+import argparse
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from inventory_utils2 import (
+    aging_inventory_preprocess,
+    binary_search,
+    picking_major_management_inventory,
+    simulate_batches_by_product,
+)
+
+DEFAULT_SIZES = [2_500, 10_000, 50_000, 100_000, 500_000]
+PIPELINE_SIZES = [10_000, 100_000, 1_000_000]
+HISTORY_FILE = Path(__file__).resolve().parent / "bench_history.json"
+
+
+def make_synthetic_inventory(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    inventory.csv(aging_inventory_preprocess 결과)와 같은 모양의 가상 배치 데이터
+    - 자재당 평균 4배치, 약 15% 자재는 판매 없음(3평판 0), 약 8% 배치는 유효기한 없음
+    """
+    rng = np.random.default_rng(seed)
+    n_mats = max(1, n_rows // 4)
+    mat_of_row = np.sort(rng.integers(0, n_mats, n_rows))
+    mat_codes = np.arange(2_000_000, 2_000_000 + n_mats)
+
+    monthly = np.round(rng.gamma(0.8, 400.0, n_mats)) * (rng.random(n_mats) > 0.15)
+    unit_cost = np.round(rng.gamma(1.5, 2_000.0, n_mats), 2)
+    days = rng.integers(-60, 1_100, n_rows).astype(float)
+    days[rng.random(n_rows) < 0.08] = np.nan
+    qty = np.round(rng.gamma(0.9, 1_500.0, n_rows))
+
+    df = pd.DataFrame({
+        "인덱스":   np.arange(1, n_rows + 1),
+        "자재코드": mat_codes[mat_of_row],
+        "자재내역": np.char.add("가상자재_", mat_codes[mat_of_row].astype(str)),
+        "플랜트":   1510,
+        "특별재고": None,
+        "저장위치": 1000,
+        "배치":     np.char.add("B", np.arange(n_rows).astype(str)),
+        "기말수량": qty,
+        "기말금액": qty * unit_cost[mat_of_row],
+        "단가":     unit_cost[mat_of_row],
+        "대분류":   "상품",
+        "소분류":   "가상",
+        "남은일":   days,
+        "3평판":    monthly[mat_of_row],
+    })
+    return df
+
+
+def bench_simulation_scaling(sizes=DEFAULT_SIZES, engines=("numpy", "python"), repeat: int = 1) -> pd.DataFrame:
+    """행 수별 simulate_batches_by_product 실행 시간 (µs/행이 일정하면 선형)"""
+    rows = []
+    for n in sizes:
+        df = make_synthetic_inventory(n)
+        for engine in engines:
+            best = float("inf")
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                simulate_batches_by_product(df, engine=engine)
+                best = min(best, time.perf_counter() - t0)
+            rows.append({"engine": engine, "rows": n, "seconds": best, "us_per_row": best / n * 1e6})
+            print(f"[{engine:>6}] {n:>9,}행  {best:8.3f}s  ({best / n * 1e6:6.2f} µs/행)")
+    return pd.DataFrame(rows)
+
+
+# -----------------------------
+# SAP 원천 파일 모양의 가상 데이터
+# -----------------------------
+def make_synthetic_raw_frames(n_rows: int, seed: int = 0, year_month: str = None) -> dict:
+    """
+    input_data 엑셀(preprocess_df 이후)과 같은 컬럼의 가상 원천 데이터 5종
+    - 재고개요: 배치 n_rows행 (자재당 평균 4배치, 약 3%는 원료 외 특별재고 → filter_special_stock 제외)
+    - 자재수불부: 자재당 1행 / 배치별유효기한: 약 8% 배치 누락 / 3개월매출: 약 85% 자재 × 3개월 / 대분류_소분류: 자재당 1행
+    """
+    rng = np.random.default_rng(seed)
+    n_mats = max(1, n_rows // 4)
+    mat_of_row = np.sort(rng.integers(0, n_mats, n_rows))
+
+    # 원료(1로 시작) 약 10%, 나머지는 제품/상품 코드
+    mat_codes = np.where(rng.random(n_mats) < 0.1, 1_000_000, 2_000_000) + np.arange(n_mats)
+    mat_names = np.char.add("가상자재_", mat_codes.astype(str))
+    unit_cost = np.round(rng.gamma(1.5, 2_000.0, n_mats), 2)
+    qty = np.round(rng.gamma(0.9, 1_500.0, n_rows))
+    batches = np.char.add("B", np.arange(n_rows).astype(str))
+
+    standard_df = pd.DataFrame({
+        "자재":           mat_codes[mat_of_row],
+        "자재 내역":      mat_names[mat_of_row],
+        "플랜트":         1510,
+        "특별 재고":      np.where(rng.random(n_rows) < 0.03, "O", None),
+        "저장 위치":      np.where(rng.random(n_rows) < 0.1, np.nan, 5000.0),
+        "배치":           batches,
+        "기말 재고 수량": qty,
+    })
+
+    mat_qty = np.bincount(mat_of_row, weights=qty, minlength=n_mats)
+    cost_df = pd.DataFrame({
+        "자재":           mat_codes.astype(float),
+        "자재 내역":      mat_names,
+        "기말(수량)":     mat_qty,
+        "기말(금액)합계": mat_qty * unit_cost,
+    })
+
+    today = pd.Timestamp.today().normalize()
+    keep = rng.random(n_rows) >= 0.08
+    expiry = today + pd.to_timedelta(rng.integers(-60, 1_100, n_rows), unit="D")
+    expiration_df = pd.DataFrame({
+        "자재":       mat_codes[mat_of_row].astype(float)[keep],
+        "배치":       batches[keep],
+        "배치만료일": expiry[keep].strftime("%Y-%m-%d %H:%M:%S"),
+    })
+
+    end = pd.Period(year_month or today.strftime("%Y-%m"), freq="M")
+    months = [int((end - k).strftime("%Y%m")) for k in (2, 1, 0)]
+    selling = np.flatnonzero(rng.random(n_mats) > 0.15)
+    monthly = np.round(rng.gamma(0.8, 400.0, (len(months), len(selling))))
+    sales_df = pd.DataFrame({
+        "년월":       np.repeat(months, len(selling)),
+        "자재코드":   np.tile(mat_codes[selling], len(months)),
+        "순매출":     (monthly * unit_cost[selling] * 1.5).round().astype(np.int64).ravel(),
+        "순매출수량": monthly.astype(np.int64).ravel(),
+    })
+
+    cls_df = pd.DataFrame({
+        "자재":     mat_codes.astype(float),
+        "자재내역": mat_names,
+        "대분류":   np.where(mat_codes < 2_000_000, "원료", "상품"),
+        "소분류":   np.where(mat_codes < 2_000_000, "원료", "가상"),
+    })
+
+    return {
+        "재고개요": standard_df,
+        "자재수불부": cost_df,
+        "배치별유효기한": expiration_df,
+        "3개월매출": sales_df,
+        "대분류_소분류": cls_df,
+    }
+
+
+# -----------------------------
+# Aging 파이프라인 단계별 측정
+# -----------------------------
+def _measure(fn, *args, memory: bool = True):
+    """fn 실행 시간(추적 없이)과 tracemalloc 최대 할당량(별도 실행)을 함께 측정"""
+    t0 = time.perf_counter()
+    out = fn(*args)
+    seconds = time.perf_counter() - t0
+
+    peak_mb = None
+    if memory:
+        del out
+        tracemalloc.start()
+        try:
+            out = fn(*args)
+            peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+    return out, seconds, peak_mb
+
+
+def bench_pipeline(sizes=PIPELINE_SIZES, seed: int = 0, memory: bool = True) -> pd.DataFrame:
+    """
+    원천 5종 → aging_inventory_preprocess → simulate_batches_by_product → binary_search
+    → picking_major_management_inventory 순서로 단계별 실행 시간, 최대 메모리, 처리량(행/s) 측정
+    - 한 단계가 실패하면(MemoryError 등) 오류를 기록하고 해당 크기의 나머지 단계는 건너뜀
+    """
+    today = pd.Timestamp.today()
+    rows = []
+    for n in sizes:
+        raw = make_synthetic_raw_frames(n, seed)
+        stages = [
+            ("preprocess", lambda: aging_inventory_preprocess(
+                raw["자재수불부"], raw["재고개요"], raw["배치별유효기한"], raw["3개월매출"], raw["대분류_소분류"],
+                str(today.year), f"{today.month:02d}")),
+            ("simulate", lambda: simulate_batches_by_product(state["inventory"])),
+            ("binary_search", lambda: binary_search(state["inventory"], state["simulation"][1])),
+            ("picking", lambda: picking_major_management_inventory(state["inventory"])),
+        ]
+        state = {}
+        for stage, fn in stages:
+            rec = {"stage": stage, "rows": n, "seconds": None, "rows_per_sec": None, "peak_mb": None, "error": None}
+            try:
+                out, seconds, peak_mb = _measure(fn, memory=memory)
+            except Exception as e:
+                rec["error"] = f"{type(e).__name__}: {e}"
+                rows.append(rec)
+                print(f"[{stage:>13}] {n:>9,}행  실패 - {rec['error']}")
+                break
+            rec.update(seconds=seconds, rows_per_sec=n / seconds if seconds > 0 else None, peak_mb=peak_mb)
+            rows.append(rec)
+            if stage == "preprocess":
+                state["inventory"] = out
+            elif stage == "simulate":
+                state["simulation"] = out
+            mem = f"{peak_mb:8.1f}MB" if peak_mb is not None else "       -"
+            print(f"[{stage:>13}] {n:>9,}행  {seconds:8.3f}s  {n / seconds:12,.0f} 행/s  peak {mem}")
+    return pd.DataFrame(rows)
+
+
+# -----------------------------
+# JSON 이력 + 회귀 감지
+# -----------------------------
+def _git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def load_history(path=HISTORY_FILE) -> list:
+    path = Path(path)
+    if not path.exists():
+        return []
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def find_regressions(result: pd.DataFrame, history: list, threshold: float = 0.2) -> list:
+    """
+    이력에서 같은 (단계, 행 수)의 최고 기록 대비 threshold 이상 느려지거나 메모리가 늘어난 항목
+    - seconds / peak_mb 각각 비교, 이력이 없으면 빈 리스트
+    """
+    best = {}
+    for run in history:
+        for r in run.get("results", []):
+            if r.get("error"):
+                continue
+            key = (r["stage"], r["rows"])
+            for metric in ("seconds", "peak_mb"):
+                if r.get(metric) is not None:
+                    best[key + (metric,)] = min(best.get(key + (metric,), float("inf")), r[metric])
+
+    flagged = []
+    for r in result.to_dict("records"):
+        for metric in ("seconds", "peak_mb"):
+            base = best.get((r["stage"], r["rows"], metric))
+            cur = r.get(metric)
+            if base is None or cur is None or pd.isna(cur) or base <= 0:
+                continue
+            if cur > base * (1 + threshold):
+                flagged.append({"stage": r["stage"], "rows": r["rows"], "metric": metric,
+                                "best": base, "current": cur, "ratio": cur / base})
+    return flagged
+
+
+def append_history(result: pd.DataFrame, path=HISTORY_FILE, regressions: list = None) -> dict:
+    """측정 결과 1회분을 JSON 이력 파일 끝에 추가"""
+    history = load_history(path)
+    run = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_rev": _git_rev(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "results": [{k: (None if pd.isna(v) else v) for k, v in r.items()} for r in result.to_dict("records")],
+        "regressions": regressions or [],
+    }
+    history.append(run)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(history, f, ensure_ascii=False, indent=2)
+    return run
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FEFO 시뮬레이션 / Aging 파이프라인 벤치마크")
+    parser.add_argument("--sizes", type=int, nargs="+", default=None)
+    parser.add_argument("--engines", nargs="+", default=["numpy", "python"])
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--pipeline", action="store_true", help="원천 5종부터 단계별 측정 후 JSON 이력에 기록")
+    parser.add_argument("--history", default=str(HISTORY_FILE))
+    parser.add_argument("--threshold", type=float, default=0.2, help="최고 기록 대비 허용 비율 (0.2 = 20%%)")
+    parser.add_argument("--no-memory", action="store_true", help="tracemalloc 측정(단계별 2회 실행) 생략")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    if args.pipeline:
+        result = bench_pipeline(args.sizes or PIPELINE_SIZES, memory=not args.no_memory)
+        regressions = find_regressions(result, load_history(args.history), args.threshold)
+        append_history(result, args.history, regressions)
+        for r in regressions:
+            print(f"⚠️ 회귀: {r['stage']} {r['rows']:,}행 {r['metric']} {r['best']:.3f} → {r['current']:.3f} ({r['ratio']:.2f}x)")
+        if not regressions:
+            print(f"회귀 없음 (기준 {args.threshold:.0%}), 이력: {args.history}")
+        raise SystemExit(1 if regressions and args.fail_on_regression else 0)
+
+    result = bench_simulation_scaling(args.sizes or DEFAULT_SIZES, args.engines, args.repeat)
+    for engine, g in result.groupby("engine"):
+        ratio = g["us_per_row"].iloc[-1] / g["us_per_row"].iloc[0]
+        print(f"{engine}: {g['rows'].iloc[0]:,} → {g['rows'].iloc[-1]:,}행, 행당 시간 비율 {ratio:.2f}x (1에 가까울수록 선형)")
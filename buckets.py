@@ -0,0 +1,64 @@
+"""
+유효기한/재고일수 구간 분류 — 구간 경계는 이 파일 한 곳에서 관리
+
+    from buckets import AGING_BUCKETS, bucketize_series
+    df["유효기한구간"] = bucketize_series(df["남은일"], AGING_BUCKETS)
+
+- 행 단위 apply 대신 np.searchsorted 한 번으로 구간 번호 계산
+- 결과는 예전 apply와 같은 object 문자열 라벨 (라벨 순서로 정렬하려면 bucket_dtype으로 astype)
+"""
+import numpy as np
+import pandas as pd
+
+# closed="right": edge 이하까지 해당 구간 (days <= 90 → "3개월 미만")
+# closed="left" : edge 미만까지 해당 구간 (days < 30 → "1개월 미만")
+# na_label=None 이면 결측은 마지막 구간 (비교식이 모두 False인 것과 같음)
+
+# 부진재고 유효기한구간 (aging_inventory_preprocess)
+AGING_BUCKETS = {
+    "edges": [0, 90, 180, 210, 270, 365, 548, 730],
+    "labels": ["폐기확정", "3개월 미만", "6개월 미만", "7개월 미만", "9개월 미만",
+               "12개월 미만", "18개월 미만", "24개월 미만", "24개월 이상"],
+    "closed": "right",
+    "na_label": "유효기한 없음",
+}
+
+# 월 단위 리스크 구간 (Aging Stock 페이지 리스크 탭, 부진재고 메일)
+MONTH_BUCKETS = {
+    "edges": [0, 30, 60, 90, 120, 150, 180, 210, 240, 270, 300, 330, 365],
+    "labels": ["폐기확정(유효기한 지남)", "1개월 미만", "2개월 미만", "3개월 미만", "4개월 미만", "5개월 미만",
+               "6개월 미만", "7개월 미만", "8개월 미만", "9개월 미만", "10개월 미만", "11개월 미만",
+               "12개월 미만", "12개월 이상"],
+    "closed": "left",
+    "na_label": "유효기한 없음",
+}
+
+# 품절 등급 (재고일수 30일 미만 위험, 60일 미만 주의)
+STOCKOUT_GRADES = {
+    "edges": [30, 60],
+    "labels": ["위험", "주의", "정상"],
+    "closed": "left",
+    "na_label": None,
+}
+
+
+def bucket_dtype(table: dict) -> pd.CategoricalDtype:
+    """구간표의 라벨 순서 그대로의 ordered categorical dtype"""
+    labels = list(table["labels"]) + ([table["na_label"]] if table.get("na_label") is not None else [])
+    return pd.CategoricalDtype(labels, ordered=True)
+
+
+def bucketize_series(values, table: dict) -> pd.Series:
+    """숫자 컬럼 → 구간 라벨 문자열 (object, index 유지)"""
+    s = values if isinstance(values, pd.Series) else pd.Series(values)
+    x = pd.to_numeric(s, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    edges = np.asarray(table["edges"], dtype=np.float64)
+    if len(table["labels"]) != len(edges) + 1:
+        raise ValueError(f"labels는 edges보다 1개 많아야 합니다: {len(table['labels'])} vs {len(edges)}")
+
+    # NaN은 searchsorted에서 맨 뒤(len(edges))로 감 → na_label이 있을 때만 따로 표시
+    codes = np.searchsorted(edges, x, side="left" if table["closed"] == "right" else "right")
+    if table.get("na_label") is not None:
+        codes[np.isnan(x)] = len(edges) + 1
+    labels = np.asarray(bucket_dtype(table).categories, dtype=object)
+    return pd.Series(labels[codes], index=s.index, dtype=object)
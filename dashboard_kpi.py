@@ -0,0 +1,143 @@
+"""
+메인 대시보드(app.py) KPI 스냅샷 — 기간별 품절/Aging 지표를 한 번만 계산해서 저장
+
+    from dashboard_kpi import list_periods, load_snapshot
+    periods = list_periods()                       # [("2026년", "1월"), ...]
+    snap = load_snapshot(("2026년", "1월"))        # {"stockout": {...}, "aging": {...}} 또는 None
+
+- data/<연도>/<월>/kpi_snapshot.json 에 저장, 계산에 쓴 inventory 파일의 크기/mtime을 같이 기록
+- inventory가 다시 저장되거나 CSV를 직접 고치면 stat이 달라져서 다음 조회 때 한 번 다시 계산
+- 기간 목록은 data/ 와 연도 폴더 mtime이 그대로면 이전 결과 재사용
+"""
+import json
+import os
+import re
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq_
+
+import period_store
+from stockout import stockout_table
+
+# 지표 계산 규칙이 바뀌면 올려서 기존 스냅샷 재계산
+KPI_VERSION = 1
+SNAPSHOT_NAME = "kpi_snapshot.json"
+
+# 스냅샷 계산에 필요한 inventory 컬럼
+KPI_COLUMNS = ["자재코드", "3평판", "기말수량", "배치", "기말금액", "유효기한구간"]
+
+# 메인 화면 Aging 카드 → 유효기한구간 라벨
+AGING_KPI_GROUPS = {
+    "6개월": ["폐기확정(유효기한 지남)", "1개월 미만", "2개월 미만", "3개월 미만", "4개월 미만", "5개월 미만", "6개월 미만"],
+    "7개월": ["7개월 미만"],
+    "9개월": ["8개월 미만", "9개월 미만"],
+    "12개월": ["10개월 미만", "11개월 미만", "12개월 미만"],
+}
+
+_periods_cache = {"key": None, "periods": []}
+
+
+# -----------------------------
+# 기간 목록
+# -----------------------------
+def list_periods() -> list:
+    """data/<연도>/<월> 폴더 목록 (data/ 와 연도 폴더 mtime이 바뀌었을 때만 다시 탐색)"""
+    root = period_store.DATA_ROOT
+    if not root.exists():
+        return []
+    year_dirs = [d for d in root.iterdir() if d.is_dir() and re.search(r"\d{4}", d.name)]
+    key = (root.stat().st_mtime_ns,) + tuple(sorted((d.name, d.stat().st_mtime_ns) for d in year_dirs))
+    if _periods_cache["key"] != key:
+        periods = []
+        for year_dir in year_dirs:
+            for month_dir in year_dir.iterdir():
+                if month_dir.is_dir() and re.search(r"\d+", month_dir.name):
+                    periods.append((year_dir.name, month_dir.name))
+        _periods_cache.update(key=key, periods=periods)
+    return list(_periods_cache["periods"])
+
+
+# -----------------------------
+# 지표 계산
+# -----------------------------
+def compute_kpis(inv_df: pd.DataFrame) -> dict:
+    """
+    inventory → 대시보드 지표
+    - stockout: stockout.stockout_table 의 현황별 자재 수 (위험 30일 미만 / 주의 30~60일)
+    - aging: 유효기한구간별, AGING_KPI_GROUPS별 배치 수(nunique)와 기말금액 합
+    """
+    grade = stockout_table(inv_df)["현황"]
+    stockout = {"total": int(len(grade)), "danger": int((grade == "위험").sum()),
+                "warning": int((grade == "주의").sum())}
+
+    aging = None
+    if "유효기한구간" in inv_df.columns:
+        value = pd.to_numeric(inv_df["기말금액"], errors="coerce").fillna(0)
+        batch = inv_df["배치"] if "배치" in inv_df.columns else pd.Series(np.arange(len(inv_df)), index=inv_df.index)
+        # 구간 라벨을 한 번만 정수 코드로 바꾸고, 구간/그룹별로 코드 비교 마스크 사용 (isin 문자열 비교 반복 없음)
+        codes, labels = pd.factorize(inv_df["유효기한구간"].astype(str).where(inv_df["유효기한구간"].notna()))
+        pos = {lb: i for i, lb in enumerate(labels)}
+
+        def _metrics(label_list):
+            m = np.isin(codes, [pos[lb] for lb in label_list if lb in pos])
+            return {"batches": int(batch[m].nunique()), "value": float(value[m].sum())}
+
+        aging = {"groups": {g: _metrics(lbs) for g, lbs in AGING_KPI_GROUPS.items()},
+                 "buckets": {str(lb): _metrics([lb]) for lb in labels}}
+    return {"stockout": stockout, "aging": aging}
+
+
+# -----------------------------
+# 스냅샷 저장/조회
+# -----------------------------
+def _snapshot_path(period):
+    return period_store.period_dir(period) / SNAPSHOT_NAME
+
+
+def _available_columns(period) -> list:
+    """KPI_COLUMNS 중 inventory에 있는 컬럼 (예전 결과는 배치/유효기한구간이 없을 수 있음)"""
+    src = period_store.source_file(period, "inventory")
+    if src.suffix == ".parquet":
+        cols = pq_.read_schema(src).names
+    else:
+        cols = pd.read_csv(src, encoding="utf-8-sig", nrows=0).columns
+    return [c for c in KPI_COLUMNS if c in cols]
+
+
+def write_snapshot(period, inv_df: pd.DataFrame = None) -> dict:
+    """
+    기간의 KPI 스냅샷 계산 후 저장 (inventory 저장 직후 호출)
+    - inv_df: 방금 저장한 inventory (없으면 저장소에서 필요한 컬럼만 읽음)
+    """
+    stamp = period_store.source_stamp(period, "inventory")
+    if stamp is None:
+        return None
+    if inv_df is None:
+        inv_df = period_store.load(period, "inventory", columns=_available_columns(period))
+    snap = {"version": KPI_VERSION, "source": stamp,
+            "computed_at": datetime.now().isoformat(timespec="seconds"), **compute_kpis(inv_df)}
+    path = _snapshot_path(period)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(snap, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+    return snap
+
+
+def load_snapshot(period) -> dict:
+    """저장된 스냅샷 반환, 없거나 inventory가 바뀌었으면 다시 계산, inventory가 없으면 None"""
+    stamp = period_store.source_stamp(period, "inventory")
+    if stamp is None:
+        return None
+    path = _snapshot_path(period)
+    if path.exists():
+        try:
+            with open(path, encoding="utf-8") as f:
+                snap = json.load(f)
+            if snap.get("version") == KPI_VERSION and snap.get("source") == stamp:
+                return snap
+        except (OSError, ValueError):
+            pass
+    return write_snapshot(period)
@@ -0,0 +1,216 @@
+"""
+월별 부진재고 이력 저장소 — 기간을 넘나드는 추이 조회용 (history/기간=YYYY-MM/part-0.parquet)
+
+    python history_store.py --backfill                 # data/<연도>/<월>/ 의 예전 결과로 이력 채우기
+    python history_store.py --materials 9308335 --start 2025-07 --end 2026-06
+
+    from history_store import append_period, query
+    append_period(("2026년", "1월"), updated_df)      # forecasted_inventory 저장 직후
+    trend = query(materials=["9308335"], start=("2025년", "7월"), columns=["기간", "자재코드", "예측부진재고금액"])
+
+- 기간별 파티션 1개(Hive 방식), 파티션 안은 자재코드 순 정렬 → 자재코드 조건은 row group 통계로 건너뜀
+- 행 = 기간 × 자재코드 (배치 합계): 기말수량/기말금액/예측부진재고/예측부진재고금액, 배치수, 대분류/소분류
+- 매월 실행 시 해당 기간 파티션만 새로 씀 (다른 기간은 건드리지 않음, 같은 달을 다시 돌리면 그 달만 교체)
+- query는 기간/자재코드/대분류/소분류 조건을 pyarrow.dataset 필터로 넘겨서 필요한 파티션/컬럼만 읽음
+"""
+import argparse
+import os
+import re
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq_
+
+import period_store
+from utils import normalize_code_series
+
+BASE_DIR = Path(__file__).resolve().parent
+HISTORY_DIR = BASE_DIR / "history"
+PART_FILE = "part-0.parquet"
+
+# 자재코드 조건 pushdown이 잘 되도록 row group을 작게 (자재코드 순 정렬과 함께 사용)
+ROW_GROUP_SIZE = 16_384
+
+HISTORY_SCHEMA = pa.schema([
+    ("자재코드", pa.string()),
+    ("자재내역", pa.string()),
+    ("대분류", pa.string()),
+    ("소분류", pa.string()),
+    ("배치수", pa.int64()),
+    ("기말수량", pa.float64()),
+    ("기말금액", pa.float64()),
+    ("3평판", pa.float64()),
+    ("예측부진재고", pa.float64()),
+    ("예측부진재고금액", pa.float64()),
+])
+PARTITIONING = ds.partitioning(pa.schema([("기간", pa.string())]), flavor="hive")
+HISTORY_COLUMNS = ["기간"] + HISTORY_SCHEMA.names
+# forecasted_inventory 에서 읽는 컬럼
+SOURCE_COLUMNS = ["자재코드", "자재내역", "대분류", "소분류", "기말수량", "기말금액", "3평판", "예측부진재고", "예측부진재고금액"]
+
+
+# -----------------------------
+# 기간 키
+# -----------------------------
+def period_key(period) -> str:
+    """
+    ("2026년", "1월") / "2026-01" → "2026-01" (문자열 비교 = 시간 순서)
+    - 연/월 숫자를 못 찾거나 월이 1~12가 아니면 ValueError
+    """
+    if isinstance(period, str):
+        nums = re.findall(r"\d+", period)[:2]
+    elif isinstance(period, (tuple, list)) and len(period) == 2:
+        found = [re.search(r"\d+", str(p)) for p in period]
+        nums = [m.group() for m in found if m is not None]
+    else:
+        nums = []
+    if len(nums) != 2 or not 1 <= int(nums[1]) <= 12:
+        raise ValueError(f"기간 형식이 아닙니다 (예: ('2026년', '1월') 또는 '2026-01'): {period!r}")
+    year, month = nums
+    return f"{int(year):04d}-{int(month):02d}"
+
+
+def _partition_dir(key: str) -> Path:
+    return HISTORY_DIR / f"기간={key}"
+
+
+# -----------------------------
+# 적재
+# -----------------------------
+def history_frame(forecast_df: pd.DataFrame) -> pd.DataFrame:
+    """forecasted_inventory(배치 단위) → 자재코드별 이력 행 (자재코드 순)"""
+    df = pd.DataFrame({"자재코드": normalize_code_series(forecast_df["자재코드"])})
+    for c in ("자재내역", "대분류", "소분류"):
+        df[c] = forecast_df[c].astype("string").to_numpy() if c in forecast_df.columns else pd.NA
+    for c in ("기말수량", "기말금액", "3평판", "예측부진재고", "예측부진재고금액"):
+        df[c] = pd.to_numeric(forecast_df[c], errors="coerce").to_numpy() if c in forecast_df.columns else float("nan")
+
+    out = df.groupby("자재코드", sort=True, as_index=False).agg(
+        자재내역=("자재내역", "first"), 대분류=("대분류", "first"), 소분류=("소분류", "first"),
+        배치수=("자재코드", "size"),
+        기말수량=("기말수량", "sum"), 기말금액=("기말금액", "sum"), **{"3평판": ("3평판", "first")},
+        예측부진재고=("예측부진재고", "sum"), 예측부진재고금액=("예측부진재고금액", "sum"),
+    )
+    return out[HISTORY_SCHEMA.names]
+
+
+def append_period(period, forecast_df: pd.DataFrame) -> Path:
+    """기간 1개의 이력 파티션 쓰기 (같은 기간이 있으면 교체)"""
+    key = period_key(period)
+    table = pa.Table.from_pandas(history_frame(forecast_df), schema=HISTORY_SCHEMA, preserve_index=False)
+    out_dir = _partition_dir(key)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / PART_FILE
+    tmp = out_dir / f".{PART_FILE}.{os.getpid()}.tmp"   # "." 접두어: 쓰는 중에 dataset 탐색에서 제외
+    pq_.write_table(table, tmp, row_group_size=ROW_GROUP_SIZE)
+    os.replace(tmp, path)
+    return path
+
+
+def backfill(periods=None, overwrite: bool = False) -> list:
+    """
+    data/<연도>/<월>/ 에 저장된 forecasted_inventory로 이력 채우기
+    - 기본은 아직 파티션이 없는 기간만, 반환: 새로 쓴 기간 키 목록
+    """
+    from dashboard_kpi import list_periods
+
+    done = set(stored_periods())
+    written = []
+    for period in periods or list_periods():
+        try:
+            key = period_key(period)
+        except ValueError:   # data/ 아래 기간 형식이 아닌 폴더는 건너뜀
+            continue
+        if (key in done and not overwrite) or not period_store.exists(period, "forecasted_inventory"):
+            continue
+        try:
+            df = period_store.load(period, "forecasted_inventory", columns=SOURCE_COLUMNS)
+        except ValueError:   # 예전 결과에 없는 컬럼이 있으면 전체를 읽고 history_frame에서 빈 값 처리
+            df = period_store.load(period, "forecasted_inventory")
+        append_period(period, df)
+        written.append(key)
+    return written
+
+
+# -----------------------------
+# 조회
+# -----------------------------
+def stored_periods() -> list:
+    """이력에 있는 기간 키 (오름차순)"""
+    if not HISTORY_DIR.exists():
+        return []
+    keys = [p.name.split("=", 1)[1] for p in HISTORY_DIR.glob("기간=*") if (p / PART_FILE).exists()]
+    return sorted(keys)
+
+
+def _dataset():
+    if not stored_periods():
+        return None
+    return ds.dataset(HISTORY_DIR, format="parquet", schema=HISTORY_SCHEMA.append(pa.field("기간", pa.string())),
+                      partitioning=PARTITIONING)
+
+
+def _isin(field: str, values):
+    return pc.field(field).isin(pa.array([str(v) for v in values], type=pa.string()))
+
+
+def query(materials=None, major=None, minor=None, start=None, end=None, columns=None) -> pd.DataFrame:
+    """
+    이력 조회 (조건은 모두 pushdown 필터)
+    - materials: 자재코드 목록, major/minor: 대분류/소분류 목록
+    - start/end: 기간 (("2026년", "1월") 또는 "2026-01"), 양 끝 포함
+    - columns: 읽을 컬럼 (기본: 전체), 결과는 기간, 자재코드 순
+    """
+    columns = list(columns or HISTORY_COLUMNS)
+    dataset = _dataset()
+    if dataset is None:
+        return pd.DataFrame(columns=columns)
+
+    conds = []
+    if start is not None:
+        conds.append(pc.field("기간") >= period_key(start))
+    if end is not None:
+        conds.append(pc.field("기간") <= period_key(end))
+    if materials:
+        conds.append(_isin("자재코드", normalize_code_series(pd.Series(list(materials), dtype=object))))
+    if major:
+        conds.append(_isin("대분류", major))
+    if minor:
+        conds.append(_isin("소분류", minor))
+    expr = None
+    for c in conds:
+        expr = c if expr is None else expr & c
+
+    df = dataset.to_table(columns=columns, filter=expr).to_pandas()
+    order = [c for c in ("기간", "자재코드") if c in df.columns]
+    return df.sort_values(order, kind="stable").reset_index(drop=True) if order else df
+
+
+def categories() -> dict:
+    """{대분류: [소분류, ...]} (추이 화면 필터용, 두 컬럼만 읽음)"""
+    dataset = _dataset()
+    if dataset is None:
+        return {}
+    df = dataset.to_table(columns=["대분류", "소분류"]).to_pandas().dropna(subset=["대분류"]).drop_duplicates()
+    return {k: sorted(g["소분류"].dropna().unique()) for k, g in df.groupby("대분류", sort=True)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="월별 부진재고 이력 (history/)")
+    parser.add_argument("--backfill", action="store_true", help="data/ 의 예전 결과로 빈 기간 채우기")
+    parser.add_argument("--overwrite", action="store_true", help="--backfill 시 이미 있는 기간도 다시 씀")
+    parser.add_argument("--materials", nargs="+", default=None)
+    parser.add_argument("--major", nargs="+", default=None, help="대분류")
+    parser.add_argument("--start", default=None, help="YYYY-MM")
+    parser.add_argument("--end", default=None, help="YYYY-MM")
+    args = parser.parse_args()
+
+    if args.backfill:
+        print("적재:", ", ".join(backfill(overwrite=args.overwrite)) or "없음")
+    print("이력 기간:", ", ".join(stored_periods()) or "없음")
+    if args.materials or args.major or args.start or args.end:
+        with pd.option_context("display.max_rows", 200, "display.width", 200):
+            print(query(args.materials, args.major, None, args.start, args.end).to_string(index=False))
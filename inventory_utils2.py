@@ -1,16 +1,16 @@
 import pandas as pd
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 import streamlit as st
 import re
+from utils import normalize_code_series, shared_code_keys, take_by_key, take_positions
+from buckets import AGING_BUCKETS, STOCKOUT_GRADES, bucketize_series
+from sim_schema import DETAIL_COLUMNS, DETAIL_CSV_DTYPES, DETAIL_DAY_COLUMNS, STOP_REASON_DTYPE, STOP_REASONS
 
 def normalize_mat_code(x):
-    """자재코드 정규화: 123.0 -> '123'"""
-    s = str(x).strip()
-    try:
-        return str(int(float(s)))
-    except:
-        return s
+    """자재코드 정규화 (값 1개): 123.0 -> '123'"""
+    return normalize_code_series(pd.Series([x], dtype=object)).iloc[0]
 
 def to_numeric_safe(s):
     """안전한 숫자 변환"""
@@ -25,85 +25,104 @@ def find_col(df, target, candidates):
             return c
     return target # 오류 발생하도록 원본 반환
 
-def bucketize(days):
-    if pd.isna(days): 
-        return "유효기한 없음"
-    if days <= 0: 
-        return "폐기확정"
-    if days <= 90: 
-        return "3개월 미만"
-    if days <= 180: 
-        return "6개월 미만"
-    if days <= 210: 
-        return "7개월 미만"
-    if days <= 270: 
-        return "9개월 미만"
-    if days <= 365: 
-        return "12개월 미만"
-    if days <= 548: 
-        return "18개월 미만"
-    if days <= 730: 
-        return "24개월 미만"
-    return "24개월 이상"
-
-def aging_inventory_preprocess(cost_df, standard_df, expiration_df, sales_df, cls_df, year_str, month_str):
+# -----------------------------
+# 기준정보 마스터 (자재: 단가/대분류/소분류, 배치: 유효기한)
+# -----------------------------
+def build_material_master(cost_df, cls_df) -> pd.DataFrame:
+    """
+    자재 마스터: index 자재코드(정규화 문자열), [단가, 대분류, 소분류]
+    - 자재수불부/대분류_소분류에서 자재코드별 첫 행 기준 (drop_duplicates → map 과 같음)
+    """
+    cost_mat, cls_mat = shared_code_keys(cost_df["자재"], cls_df["자재"])
+    qty = pd.to_numeric(cost_df["기말(수량)"], errors="coerce")
+    amount = pd.to_numeric(cost_df["기말(금액)합계"], errors="coerce")
+    unit_cost = amount / qty.replace(0, pd.NA)
+
+    keys = np.arange(len(cost_mat.cat.categories))
+    cost_key, cls_key = cost_mat.cat.codes.to_numpy(np.int64), cls_mat.cat.codes.to_numpy(np.int64)
+    return pd.DataFrame({
+        "단가": take_by_key(keys, cost_key, unit_cost),
+        "대분류": take_by_key(keys, cls_key, cls_df["대분류"].astype(object)),
+        "소분류": take_by_key(keys, cls_key, cls_df["소분류"].astype(object)),
+    }, index=pd.Index(cost_mat.cat.categories.astype(object), name="자재코드"))
+
+
+def build_batch_master(expiration_df) -> pd.DataFrame:
+    """배치 마스터: index (자재코드, 배치), [유효기한] — (자재코드, 배치)별 첫 행 기준"""
+    mat, = shared_code_keys(expiration_df["자재"])
+    batch, = shared_code_keys(expiration_df["배치"])
+    mat_code, batch_code = mat.cat.codes.to_numpy(np.int64), batch.cat.codes.to_numpy(np.int64)
+    first = np.flatnonzero(~pd.Index(mat_code * len(batch.cat.categories) + batch_code).duplicated())
+    index = pd.MultiIndex(levels=[mat.cat.categories, batch.cat.categories], codes=[mat_code[first], batch_code[first]],
+                          names=["자재코드", "배치"], verify_integrity=False)
+    return pd.DataFrame({"유효기한": expiration_df["배치만료일"].array.take(first)}, index=index)
+
+
+def _master_positions(index: pd.Index, *keys: pd.Series) -> np.ndarray:
+    """categorical 키(자재코드 / 자재코드+배치)의 고유값·고유 조합만 마스터 index에서 찾고 행 위치로 펼침 (-1 = 없음)"""
+    if len(keys) == 1:
+        return index.get_indexer(keys[0].cat.categories)[keys[0].cat.codes.to_numpy()]
+    mat, batch = keys
+    n_batch = len(batch.cat.categories)
+    row_pair, pairs = pd.factorize(mat.cat.codes.to_numpy(np.int64) * n_batch + batch.cat.codes.to_numpy(np.int64))
+    lookup = pd.MultiIndex(levels=[mat.cat.categories, batch.cat.categories],
+                           codes=[pairs // max(n_batch, 1), pairs % max(n_batch, 1)], verify_integrity=False)
+    return index.get_indexer(lookup)[row_pair]
+
+
+def _gather(values: pd.Series, pos: np.ndarray, index: pd.Index) -> pd.Series:
+    """마스터 컬럼을 행 위치(pos, -1 = 결측)로 가져오기"""
+    return pd.Series(take_positions(values, pos), index=index)
+
+
+def aging_inventory_preprocess(cost_df, standard_df, expiration_df, sales_df, cls_df, year_str, month_str,
+                               material_master=None, batch_master=None):
+    """
+    재고개요 + 기준정보 → 부진재고 기준표
+    - material_master/batch_master: build_material_master/build_batch_master 결과 (staging.load_masters 캐시)
+      없으면 cost_df/cls_df/expiration_df에서 바로 만듦
+    """
+    if material_master is None:
+        material_master = build_material_master(cost_df, cls_df)
+    if batch_master is None:
+        batch_master = build_batch_master(expiration_df)
 
     # 1. 데이터 불러오기 + 컬럼명 변경
-    # 자재수불부 (cost_df) [자재코드, 기말수량_cosst, 기말금액]
-    cost_df = cost_df[["자재","기말(수량)", "기말(금액)합계"]].copy()
-    cost_df.rename(columns = {"자재" : "자재코드", "기말(수량)" : "기말수량_cost", "기말(금액)합계" : "기말금액"}, inplace = True)
-    cost_df["자재코드"] = (cost_df["자재코드"].astype(str).str.strip().str.replace(r"\.0$", "", regex=True))
-
     # 재고개요 (standard_df) [자재코드, 플랜트, 특별재고, 저장위치, 배치, 기말수량]
     standard_df = standard_df[["자재", "자재 내역", "플랜트", "특별 재고", "저장 위치", "배치", "기말 재고 수량"]].copy()
     standard_df.rename(columns = {"자재" : "자재코드", "자재 내역" : "자재내역", "특별 재고" : "특별재고", "저장 위치" : "저장위치", "기말 재고 수량" : "기말수량"}, inplace = True)
-    standard_df["자재코드"] = (standard_df["자재코드"].astype(str).str.strip().str.replace(r"\.0$", "", regex=True))
-    standard_df["배치"] = (standard_df["배치"].astype(str).str.strip().str.replace(r"\.0$", "", regex=True))
-
-    # 배치별유효기한 (expiration_df) [자재코드, 배치, 유효기한]
-    expiration_df = expiration_df[["자재", "배치", "배치만료일"]].copy()
-    expiration_df.rename(columns = {"자재" : "자재코드", "배치만료일" : "유효기한"}, inplace = True)
-    expiration_df["자재코드"] = (expiration_df["자재코드"].astype(str).str.strip().str.replace(r"\.0$", "", regex=True))
-    expiration_df["배치"] = (expiration_df["배치"].astype(str).str.strip().str.replace(r"\.0$", "", regex=True))
-    
+    standard_df["특별재고"] = standard_df["특별재고"].astype(object)  # preprocess_df의 category → 일반 값
 
     # 3개월매출 (sales_df) [년월, 자재코드, 순매출금액, 순매출수량]
     sales_df = sales_df[["년월", "자재코드", "순매출", "순매출수량"]].copy()
     sales_df.rename(columns = {"순매출" : "순매출금액"}, inplace = True)
-    sales_df["자재코드"] = (sales_df["자재코드"].astype(str).str.strip().str.replace(r"\.0$", "", regex=True))
-    
-
-    # 대분류_소분류 (cls_df) [자재코드, 대분류, 소분류]
-    cls_df = cls_df[["자재", "대분류", "소분류"]].copy()
-    cls_df.rename(columns= {"자재" : "자재코드"}, inplace = True)
-    cls_df["자재코드"] = (cls_df["자재코드"].astype(str).str.strip().str.replace(r"\.0$", "", regex=True))
-    
 
-    #2. 단가 계산 후 standard에 mapping
-    cost_df["기말수량_cost"] = pd.to_numeric(cost_df["기말수량_cost"], errors="coerce")
-    cost_df["기말금액"] = pd.to_numeric(cost_df["기말금액"], errors="coerce")
-    cost_df["단가"] = cost_df["기말금액"] / cost_df["기말수량_cost"].replace(0, pd.NA)
-    
-    cost_map = cost_df.drop_duplicates(subset=["자재코드"]).set_index("자재코드")["단가"]
-    standard_df["단가"] = standard_df["자재코드"].map(cost_map).fillna(0)
+    # 자재코드/배치 정규화는 여기서 한 번만 → 마스터 조회는 고유값만, 행 단위는 정수 위치 gather
+    std_mat, sales_mat = shared_code_keys(standard_df["자재코드"], sales_df["자재코드"])
+    std_batch, = shared_code_keys(standard_df["배치"])
+    standard_df["자재코드"] = std_mat.astype(object)
+    standard_df["배치"] = std_batch.astype(object)
+    mat_pos = _master_positions(material_master.index, std_mat)
+    batch_pos = _master_positions(batch_master.index, std_mat, std_batch)
+    std_mat, sales_mat = std_mat.cat.codes.to_numpy(np.int64), sales_mat.cat.codes.to_numpy(np.int64)
+
+    #2. 단가 standard에 mapping (자재수불부 기말금액 / 기말수량)
+    standard_df["단가"] = _gather(material_master["단가"], mat_pos, standard_df.index).fillna(0)
     standard_df = standard_df[["자재코드", "자재내역", "플랜트", "특별재고", "저장위치", "배치", "기말수량", "단가"]]
 
     #3. 소분류, 대분류 standard에 mapping
-    big_map = cls_df.drop_duplicates(subset=["자재코드"]).set_index("자재코드")["대분류"]
-    small_map = cls_df.drop_duplicates(subset=["자재코드"]).set_index("자재코드")["소분류"]
-    standard_df["대분류"] = standard_df["자재코드"].map(big_map).fillna("미분류")
-    standard_df["소분류"] = standard_df["자재코드"].map(small_map).fillna("미분류")
+    standard_df["대분류"] = _gather(material_master["대분류"], mat_pos, standard_df.index).fillna("미분류")
+    standard_df["소분류"] = _gather(material_master["소분류"], mat_pos, standard_df.index).fillna("미분류")
 
     # 4. 유효기한 standard에 mapping
-    exp_map = (expiration_df.drop_duplicates(subset=["자재코드", "배치"]).set_index(["자재코드", "배치"])["유효기한"])
-    standard_df = standard_df.join(exp_map, on=["자재코드", "배치"])
+    standard_df["유효기한"] = _gather(batch_master["유효기한"], batch_pos, standard_df.index)
     standard_df["유효기한"] = standard_df["유효기한"].fillna("nan")
     
     # 5. 남은일 & 유효기한구간 계산
     standard_df["유효기한"] = pd.to_datetime(standard_df["유효기한"], errors="coerce").dt.normalize()
     today_ts = pd.Timestamp.today().normalize()
     standard_df["남은일"] = (standard_df["유효기한"] - today_ts).dt.days
-    standard_df["유효기한구간"] = standard_df["남은일"].apply(bucketize)
+    standard_df["유효기한구간"] = bucketize_series(standard_df["남은일"], AGING_BUCKETS)
 
     # 6.재고금액계산
     standard_df["기말금액"] = standard_df["기말수량"] * standard_df["단가"]
@@ -112,12 +131,11 @@ def aging_inventory_preprocess(cost_df, standard_df, expiration_df, sales_df, cl
     tmp = sales_df.copy()
     tmp["순매출수량"] = pd.to_numeric(tmp["순매출수량"], errors="coerce").fillna(0)
     tmp["년월"] = tmp["년월"].astype(str).str.strip()
-    tmp["자재코드"] = tmp["자재코드"].astype(str).str.strip().str.replace(r"\.0$", "", regex=True)
-    month_count = tmp.groupby("자재코드")["년월"].nunique()
-    month_qty = tmp.groupby("자재코드")["순매출수량"].sum()
+    month_count = tmp.groupby(sales_mat)["년월"].nunique()
+    month_qty = tmp.groupby(sales_mat)["순매출수량"].sum()
     sales_avg = (month_qty / month_count.replace(0, pd.NA)).fillna(0)
 
-    standard_df["3평판"] = standard_df["자재코드"].map(sales_avg).fillna(0)
+    standard_df["3평판"] = sales_avg.reindex(std_mat).fillna(0).to_numpy()
     
     standard_df = standard_df[["자재코드", "자재내역", "플랜트", "특별재고", "저장위치", "배치", "기말수량", "기말금액", "단가", "대분류", "소분류", "유효기한", "남은일", "유효기한구간", "3평판"]]
     standard_df = standard_df.reset_index(drop=True) 
@@ -128,21 +146,335 @@ def aging_inventory_preprocess(cost_df, standard_df, expiration_df, sales_df, cl
 
     return standard_df
 
-def simulate_batches_by_product(df: pd.DataFrame, risk_days: int = 180, step_days: int = 30, today=None):
+_NO_SALES, _RISK_BEFORE_START, _RISK_REACHED, _SOLD_OUT, _STOPPED_WITH_SALES, _STOPPED = range(len(STOP_REASONS))
+
+_US_PER_DAY = 86400000000.0
 
-    if today is None:
-        today = datetime.now().date()
-    elif isinstance(today, datetime):
-        today = today.date()
 
+def _timedelta_days(x):
+    """timedelta(days=x).days 와 동일한 정수 일수 (µs 반올림 포함, x >= 0)"""
+    whole = np.floor(x)
+    return (whole + (np.round((x - whole) * _US_PER_DAY) >= _US_PER_DAY)).astype(np.int64)
+
+
+def _fefo_kernel(days, qty, starts, ends, monthly, risk_days, step_days, detail: bool = True):
+    """
+    평탄화된 배치 배열 위에서 모든 자재(세그먼트)의 FEFO carry-over를 동시에 진행하는 커널.
+    - days/qty: 세그먼트 순서 + 남은일 오름차순으로 정렬된 배치별 남은일/수량
+    - starts/ends: 세그먼트별 [start, end) 위치, monthly/risk_days/step_days: 세그먼트별 값
+    - detail=False: 판매량/날짜/중단사유 기록 없이 배치별 잔량 배열만 반환
+    날짜는 today 기준 정수 일수 오프셋으로만 다룬다 (-1 = 없음).
+    """
+    n, n_seg = len(days), len(starts)
+    days = np.asarray(days, dtype=np.int64)
+    qty = np.asarray(qty, dtype=np.float64).copy()
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    monthly = np.broadcast_to(np.asarray(monthly, dtype=np.float64), (n_seg,))
+    risk = np.broadcast_to(np.asarray(risk_days, dtype=np.int64), (n_seg,))
+    step = np.broadcast_to(np.asarray(step_days, dtype=np.int64), (n_seg,))
+    if (step <= 0).any():
+        raise ValueError("step_days는 1 이상이어야 합니다.")
+
+    seg_of_row = np.repeat(np.arange(n_seg), ends - starts)
+    if detail:
+        qty_sold = np.zeros(n)
+        sell_start = np.full(n, -1, dtype=np.int64)
+        sell_end = np.full(n, -1, dtype=np.int64)
+        reason = np.full(n, -1, dtype=np.int8)
+
+    # no_sales: 월평판 = 0
+    no_sales = monthly <= 0
+    ns_row = no_sales[seg_of_row]
+
+    # 시작 시점에 이미 risk인 배치 (정렬돼 있으므로 세그먼트 앞부분)
+    pre_row = ~ns_row & (days <= risk[seg_of_row])
+    if detail:
+        reason[ns_row] = _NO_SALES
+        sell_end[ns_row] = 0
+        reason[pre_row] = _RISK_BEFORE_START
+        sell_end[pre_row] = 0
+    ptr = starts + np.bincount(seg_of_row[pre_row], minlength=n_seg)
+
+    # 무한루프 방지 상한 (세그먼트 마지막 배치가 최대 남은일)
+    last_days = np.where(ends > starts, days[np.maximum(ends - 1, 0)], 0)
+    max_elapsed = np.where(last_days > risk, last_days - risk, 0)
+    max_months = np.minimum((max_elapsed / step).astype(np.int64) + 2, 120)
+
+    daily = monthly / step
+    t = np.zeros(n_seg, dtype=np.int64)
+    month = np.zeros(n_seg, dtype=np.int64)
+    demand = np.zeros(n_seg)
+    left = np.zeros(n_seg)
+    in_month = np.zeros(n_seg, dtype=bool)
+    act = np.flatnonzero(~no_sales)
+
+    while act.size:
+        # 1) 진행 중인 월: 수요/일수 소진 또는 배치 소진 → 월 마감
+        cond = (demand[act] > 1e-9) & (left[act] > 1e-9) & (ptr[act] < ends[act])
+        close = act[in_month[act] & ~cond]
+        if close.size:
+            rest = left[close]
+            t[close] += np.where(rest > 1e-9, _timedelta_days(np.maximum(rest, 0.0)), 0)
+            month[close] += 1
+            in_month[close] = False
+
+        # 2) 새 월 시작 (배치 소진 또는 상한 도달 시 종료)
+        idle = act[~in_month[act]]
+        done = (ptr[idle] >= ends[idle]) | (month[idle] >= max_months[idle])
+        act = np.setdiff1d(act, idle[done], assume_unique=True)
+        opened = idle[~done]
+        demand[opened] = monthly[opened]
+        left[opened] = step[opened].astype(np.float64)
+        in_month[opened] = True
+
+        # 3) 세그먼트마다 한 번씩 carry-over 스텝 진행
+        s = act[(demand[act] > 1e-9) & (left[act] > 1e-9) & (ptr[act] < ends[act])]
+        if not s.size:
+            continue
+        p = ptr[s]
+        d, r, ts = days[p], risk[s], t[s]
+
+        # risk 구간 → 다음 배치
+        at_risk = (d - ts) <= r
+        ar_s, ar_p = s[at_risk], p[at_risk]
+        if detail:
+            reason[ar_p] = np.where(qty_sold[ar_p] <= 0, _RISK_BEFORE_START, _RISK_REACHED)
+            sell_end[ar_p] = t[ar_s]
+        ptr[ar_s] += 1
+
+        s, p, d, r = s[~at_risk], p[~at_risk], d[~at_risk], r[~at_risk]
+        sellable_days = np.minimum(left[s], (d - r - t[s]).astype(np.float64))
+        sell = np.minimum(np.minimum(qty[p], demand[s]), daily[s] * sellable_days)
+
+        none = sell <= 1e-12
+        if detail:
+            reason[p[none]] = _RISK_REACHED
+            sell_end[p[none]] = t[s[none]]
+        ptr[s[none]] += 1
+
+        s, p, d, r, sell = s[~none], p[~none], d[~none], r[~none], sell[~none]
+        used = sell / daily[s]
+        if detail:
+            sell_start[p] = np.where(sell_start[p] < 0, t[s], sell_start[p])
+            qty_sold[p] += sell
+        qty[p] -= sell
+        demand[s] -= sell
+        left[s] -= used
+        t[s] += _timedelta_days(used)
+
+        # 완판 → 다음 배치 / risk 진입 → 다음 배치
+        sold_out = qty[p] <= 1e-9
+        qty[p[sold_out]] = 0.0
+        reached = ~sold_out & (t[s] >= d - r)
+        ptr[s[sold_out | reached]] += 1
+        if detail:
+            sell_end[p] = t[s]
+            reason[p[sold_out]] = _SOLD_OUT
+            reason[p[reached]] = _RISK_REACHED
+
+    if not detail:
+        return qty
+
+    # 보정: 루프 종료 후 처리 안 된 배치
+    unset = reason < 0
+    reason[unset] = np.where(qty_sold[unset] > 0, _STOPPED_WITH_SALES, _STOPPED)
+    no_end = unset & (sell_end < 0)
+    sell_end[no_end] = t[seg_of_row[no_end]]
+
+    risk_row = risk[seg_of_row]
+    return {
+        "remaining_qty": qty,
+        "qty_sold": qty_sold,
+        "risk_entry": np.where(days <= risk_row, 0, days - risk_row),
+        "sell_start": sell_start,
+        "sell_end": sell_end,
+        "stop_reason": reason,
+    }
+
+
+def _prepare_sim_input(df: pd.DataFrame) -> pd.DataFrame:
+    """시뮬레이션 입력 컬럼(남은일/기말수량/3평판) 숫자화"""
     df0 = df.copy()
     df0["남은일"]  = pd.to_numeric(df0["남은일"],  errors="coerce").fillna(0).astype(int)
     df0["기말수량"] = pd.to_numeric(df0["기말수량"], errors="coerce").fillna(0.0)
     df0["3평판"]   = pd.to_numeric(df0["3평판"],   errors="coerce").fillna(0.0)
+    return df0
+
+
+def _fefo_order(gid: np.ndarray, days: np.ndarray) -> np.ndarray:
+    """
+    그룹 순 → 남은일 오름차순 정렬 위치
+    - 남은일 동률이 있는 그룹만 python 엔진처럼 그룹 행(원래 순서)에 argsort(quicksort)를 다시 적용
+      → 동률 배치의 소진 순서가 기존 루프(sort_values 기본 정렬)와 같음
+    """
+    order = np.lexsort((days, gid))
+    g_sorted, d_sorted = gid[order], days[order]
+    tied = np.unique(g_sorted[1:][(g_sorted[1:] == g_sorted[:-1]) & (d_sorted[1:] == d_sorted[:-1])])
+    if len(tied):
+        by_group = np.argsort(gid, kind="stable")
+        ends = np.cumsum(np.bincount(gid, minlength=int(gid.max()) + 1))
+        for g in tied:
+            lo, hi = ends[g - 1] if g else 0, ends[g]
+            rows = by_group[lo:hi]
+            order[lo:hi] = rows[days[rows].argsort(kind="quicksort")]
+    return order
+
+
+def _fefo_segments(df0: pd.DataFrame) -> dict:
+    """(자재코드, 자재내역) 그룹 순 → 남은일 오름차순(FEFO)으로 정렬한 평탄 배열과 그룹 구간"""
+    gid = df0.groupby(["자재코드", "자재내역"], dropna=False, sort=True).ngroup().to_numpy()
+    days_all = df0["남은일"].to_numpy(dtype=np.int64)
+    order = _fefo_order(gid, days_all)
+
+    bounds = np.flatnonzero(np.diff(gid[order])) + 1
+    starts = np.r_[0, bounds].astype(np.int64) if len(order) else np.array([], dtype=np.int64)
+    ends = np.r_[bounds, len(order)].astype(np.int64) if len(order) else np.array([], dtype=np.int64)
+    return {
+        "order":   order,
+        "days":    days_all[order],
+        "qty":     df0["기말수량"].to_numpy(dtype=np.float64)[order],
+        "starts":  starts,
+        "ends":    ends,
+        "monthly": df0["3평판"].to_numpy(dtype=np.float64)[order][starts],
+    }
+
+
+def _concat_ranges(lo, hi):
+    """[lo[i], hi[i]) 구간들을 이어붙인 인덱스 배열"""
+    lens = hi - lo
+    offs = np.cumsum(lens) - lens
+    return np.repeat(lo - offs, lens) + np.arange(lens.sum())
+
+
+def _simulate_batches_numpy(df0: pd.DataFrame, risk_days: int, step_days: int, today):
+    """정렬된 평탄 배열 + 정수 일수 오프셋 기반 FEFO 엔진 (python 엔진과 동일 결과)"""
+    seg = _fefo_segments(df0)
+    order, days, init_qty = seg["order"], seg["days"], seg["qty"]
+
+    res = _fefo_kernel(days, init_qty, seg["starts"], seg["ends"], seg["monthly"], risk_days, step_days)
+
+    detail = pd.DataFrame({
+        "자재코드":          df0["자재코드"].take(order).to_numpy(),
+        "자재내역":          df0["자재내역"].take(order).to_numpy(),
+        "배치":              df0["배치"].take(order).to_numpy(),
+        "init_qty":          init_qty,
+        "init_days":         days.astype(np.int32),
+        "risk_entry_day":    res["risk_entry"].astype(np.int32),
+        "sell_start_day":    res["sell_start"].astype(np.int32),
+        "sell_end_day":      res["sell_end"].astype(np.int32),
+        "qty_sold":          res["qty_sold"],
+        "remaining_qty":     res["remaining_qty"],
+        "days_left_at_stop": (days - res["sell_end"]).astype(np.int32),
+        "stop_reason":       pd.Categorical.from_codes(res["stop_reason"], dtype=STOP_REASON_DTYPE),
+    })
+
+    # python 엔진과 동일하게 no_sales 자재는 예측부진재고에 반영하지 않음
+    updated = df0.copy()
+    remaining = np.empty(len(df0))
+    remaining[order] = np.where(res["stop_reason"] == _NO_SALES, 0.0, res["remaining_qty"])
+    updated["예측부진재고"] = remaining
+    updated["예측부진재고금액"] = updated["예측부진재고"] * updated["단가"]
+
+    return detail, updated
+
+
+def _shard_bounds(df0: pd.DataFrame, workers: int):
+    """정렬된 자재 그룹을 행 수 기준으로 균등 분할 (같은 자재코드는 한 샤드에)"""
+    grouped = df0.groupby(["자재코드", "자재내역"], dropna=False, sort=True)
+    gid = grouped.ngroup().to_numpy()
+    mats = grouped.size().index.get_level_values(0)
+    n_groups = len(mats)
+
+    # 자재코드가 바뀌는 그룹 위치에서만 자를 수 있음
+    can_cut = np.r_[False, (mats[1:] != mats[:-1]) | pd.isna(mats[1:])] if n_groups else np.array([], dtype=bool)
+    cut_groups = np.flatnonzero(can_cut)
+    cum_rows = np.cumsum(np.bincount(gid, minlength=n_groups))
+
+    bounds = [0]
+    for w in range(1, workers):
+        target = cum_rows[-1] * w / workers
+        k = np.searchsorted(cut_groups, np.searchsorted(cum_rows, target, side="right"))
+        if k < len(cut_groups) and cut_groups[k] > bounds[-1]:
+            bounds.append(int(cut_groups[k]))
+    bounds.append(n_groups)
+    return gid, bounds
+
+
+def _remaining_qty(df0: pd.DataFrame, risk_days: int, step_days: int, no_sales_remaining: bool) -> np.ndarray:
+    seg = _fefo_segments(df0)
+    remaining = _fefo_kernel(seg["days"], seg["qty"], seg["starts"], seg["ends"], seg["monthly"],
+                             risk_days, step_days, detail=False)
+    if not no_sales_remaining:
+        remaining = np.where(np.repeat(seg["monthly"] <= 0, seg["ends"] - seg["starts"]), 0.0, remaining)
+    out = np.empty(len(df0))
+    out[seg["order"]] = remaining
+    return out
+
+
+def simulate_remaining_qty(df: pd.DataFrame, risk_days: int = 180, step_days: int = 30, no_sales_remaining: bool = True) -> np.ndarray:
+    """
+    FEFO 시뮬레이션 후 배치별 잔량만 df 행 순서의 NumPy 배열로 반환 (날짜/DataFrame 생성 없음)
+    - no_sales_remaining=True: detail의 remaining_qty와 동일 (판매 없는 자재는 전량 잔량)
+    - no_sales_remaining=False: updated의 예측부진재고와 동일 (판매 없는 자재는 0)
+    """
+    return _remaining_qty(_prepare_sim_input(df), risk_days, step_days, no_sales_remaining)
+
+
+def _simulate_shard(args):
+    shard_df, risk_days, step_days, today, engine = args
+    return simulate_batches_by_product(shard_df, risk_days, step_days, today, engine=engine)
+
+
+def _simulate_batches_parallel(df0: pd.DataFrame, risk_days: int, step_days: int, today, engine: str, workers: int):
+    """자재코드 샤드별로 ProcessPoolExecutor에서 시뮬레이션 후 직렬 엔진과 같은 순서로 병합"""
+    gid, bounds = _shard_bounds(df0, workers)
+    shard_pos = [np.flatnonzero((gid >= lo) & (gid < hi)) for lo, hi in zip(bounds[:-1], bounds[1:])]
+    tasks = [(df0.iloc[pos], risk_days, step_days, today, engine) for pos in shard_pos]
+
+    with ProcessPoolExecutor(max_workers=len(tasks)) as ex:
+        results = list(ex.map(_simulate_shard, tasks))
+
+    detail = pd.concat([d for d, _ in results], ignore_index=True)
+    updated = df0.copy()
+    remaining = np.zeros(len(df0))
+    for pos, (_, upd) in zip(shard_pos, results):
+        remaining[pos] = upd["예측부진재고"].to_numpy()
+    updated["예측부진재고"] = remaining
+    updated["예측부진재고금액"] = updated["예측부진재고"] * updated["단가"]
+
+    return detail, updated
+
 
+def simulate_batches_by_product(df: pd.DataFrame, risk_days: int = 180, step_days: int = 30, today=None, engine: str = "numpy", workers: int = 1):
+    """
+    자재(자재코드, 자재내역)별 FEFO carry-over 시뮬레이션
+    - engine="numpy": 전 자재를 평탄 배열로 한 번에 계산 (기본)
+    - engine="python": 기존 자재별 루프 엔진
+    - workers > 1: 자재코드 단위 샤드를 프로세스 풀에서 병렬 실행 (결과 순서는 직렬과 동일)
+    - 같은 자재에서 남은일이 같은 배치의 소진 순서는 두 엔진 모두 기존 루프의 sort_values 기본 정렬(quicksort)과 동일
+    """
+    if today is None:
+        today = datetime.now().date()
+    elif isinstance(today, datetime):
+        today = today.date()
+
+    df0 = _prepare_sim_input(df)
+
+    if engine not in ("numpy", "python"):
+        raise ValueError(f"알 수 없는 시뮬레이션 엔진입니다: {engine}")
+    if workers > 1 and len(df0):
+        return _simulate_batches_parallel(df0, risk_days, step_days, today, engine, workers)
+    if engine == "numpy":
+        return _simulate_batches_numpy(df0, risk_days, step_days, today)
+    return _simulate_batches_python(df0, risk_days, step_days, today)
+
+
+def _simulate_batches_python(df0: pd.DataFrame, risk_days: int, step_days: int, today):
+    """자재별 Python 루프 기반 FEFO 엔진 (기존 구현)"""
     detail_rows = []
     updated = df0.copy()
-    updated["예측부진재고"] = 0.0  # 초기화
+    rem_idx, rem_qty = [], []  # 인덱스별 잔량 (마지막에 일괄 반영)
 
     for (mat, mat_name), g in df0.groupby(["자재코드", "자재내역"], dropna=False):
         g = g.sort_values("남은일", ascending=True).reset_index(drop=True)  # FEFO
@@ -176,9 +508,9 @@ def simulate_batches_by_product(df: pd.DataFrame, risk_days: int = 180, step_day
                     "배치":            batches_id[k],
                     "init_qty":        batches_init_qty[k],
                     "init_days":       batches_init_days[k],
-                    "risk_entry_date": risk_entry[k],
-                    "sell_start_date": None,
-                    "sell_end_date":   today,
+                    "risk_entry_day":  (risk_entry[k] - today).days,
+                    "sell_start_day":  -1,
+                    "sell_end_day":    0,
                     "qty_sold":        0.0,
                     "remaining_qty":   qty[k],
                     "days_left_at_stop": batches_init_days[k],
@@ -273,77 +605,417 @@ def simulate_batches_by_product(df: pd.DataFrame, risk_days: int = 180, step_day
                 "배치":            batches_id[k],
                 "init_qty":        batches_init_qty[k],
                 "init_days":       batches_init_days[k],
-                "risk_entry_date": risk_entry[k],
-                "sell_start_date": sell_start_date[k],
-                "sell_end_date":   sell_end_date[k],
+                "risk_entry_day":  (risk_entry[k] - today).days,
+                "sell_start_day":  (sell_start_date[k] - today).days if sell_start_date[k] else -1,
+                "sell_end_day":    (sell_end_date[k] - today).days,
                 "qty_sold":        qty_sold[k],
                 "remaining_qty":   qty[k],
                 "days_left_at_stop": days_at_stop,
                 "stop_reason":     stop_reason[k],
             })
 
-        for k in range(n):
-            updated.loc[updated["인덱스"] == batches_orig_idx[k], "예측부진재고"] = qty[k]
+        rem_idx.extend(batches_orig_idx)
+        rem_qty.extend(qty)
 
+    # 인덱스 → 잔량 일괄 반영 (중복 인덱스는 마지막 값, no_sales 자재는 0)
+    rem = pd.Series(rem_qty, index=rem_idx, dtype=float)
+    rem = rem[rem.index.notna() & ~rem.index.duplicated(keep="last")]
+    updated["예측부진재고"] = updated["인덱스"].map(rem).fillna(0.0).astype(float)
     updated["예측부진재고금액"] = updated["예측부진재고"] * updated["단가"]
 
-    return pd.DataFrame(detail_rows), updated
+    detail = pd.DataFrame(detail_rows, columns=DETAIL_COLUMNS)
+    return detail.astype({**DETAIL_CSV_DTYPES, "init_qty": float, "qty_sold": float, "remaining_qty": float}), updated
 
-def binary_search(standard_df: pd.DataFrame, forecasted_df: pd.DataFrame, today=None, lo=1.0, hi=10.0, tol=1e-3, max_iter=100):
-    
+
+def detail_with_dates(detail: pd.DataFrame, base_date) -> pd.DataFrame:
+    """
+    detail의 일수 오프셋(*_day)을 base_date 기준 날짜(*_date, datetime64)로 바꾼 표시용 사본
+    - 예전 형식(*_date 컬럼)으로 저장된 detail은 날짜 컬럼만 datetime64로 변환
+    """
+    out = detail.copy()
+    base = pd.Timestamp(base_date).normalize()
+    for day_col, date_col in DETAIL_DAY_COLUMNS.items():
+        if day_col in out.columns:
+            off = pd.to_numeric(out[day_col], errors="coerce")
+            out[day_col] = base + pd.to_timedelta(off.where(off >= 0), unit="D")
+        elif date_col in out.columns:
+            out[date_col] = pd.to_datetime(out[date_col], errors="coerce")
+    return out.rename(columns=DETAIL_DAY_COLUMNS)
+
+
+def _detail_offsets(detail: pd.DataFrame, base_date) -> pd.DataFrame:
+    """예전 형식(*_date) 또는 CSV로 다시 읽은 detail을 오프셋/카테고리 형식으로 정규화"""
+    out = detail.copy()
+    base = pd.Timestamp(base_date).normalize()
+    for day_col, date_col in DETAIL_DAY_COLUMNS.items():
+        if date_col in out.columns:
+            out[day_col] = ((pd.to_datetime(out[date_col], errors="coerce") - base).dt.days).fillna(-1)
+    return out[DETAIL_COLUMNS].astype(DETAIL_CSV_DTYPES)
+
+
+def _remaining_by_multiplier(seg: dict, seg_mat, pair_mat, pair_mult, risk_days: int = 180, step_days: int = 30):
+    """
+    (자재, 판매배수) 쌍마다 해당 자재의 그룹 구간을 복제해 한 번의 커널 실행으로 평가.
+    반환: 쌍별 잔량(remaining_qty) 합계
+    """
+    n_mats = int(seg_mat.max()) + 1 if len(seg_mat) else 0
+    by_mat = np.argsort(seg_mat, kind="stable")
+    mat_cnt = np.bincount(seg_mat, minlength=n_mats)
+    mat_start = np.cumsum(mat_cnt) - mat_cnt
+
+    vseg = by_mat[_concat_ranges(mat_start[pair_mat], mat_start[pair_mat] + mat_cnt[pair_mat])]
+    pair_of_vseg = np.repeat(np.arange(len(pair_mat)), mat_cnt[pair_mat])
+    seg_lo, seg_hi = seg["starts"][vseg], seg["ends"][vseg]
+    rows = _concat_ranges(seg_lo, seg_hi)
+    lens = seg_hi - seg_lo
+    vends = np.cumsum(lens)
+
+    remaining = _fefo_kernel(
+        seg["days"][rows], seg["qty"][rows], vends - lens, vends,
+        seg["monthly"][vseg] * np.asarray(pair_mult, dtype=np.float64)[pair_of_vseg],
+        risk_days, step_days, detail=False,
+    )
+    return np.bincount(np.repeat(pair_of_vseg, lens), weights=remaining, minlength=len(pair_mat))
+
+
+def _solve_sales_multiplier(seg: dict, seg_mat, n_mats: int, lo=1.0, hi=10.0, tol=1e-3, max_iter=100):
+    """잔량 합계가 0이 되는 최소 판매배수를 전 자재 동시 이분탐색으로 계산 (자재별 탐색과 동일 순서)"""
+    mats = np.arange(n_mats)
+    ends = _remaining_by_multiplier(seg, seg_mat, np.r_[mats, mats], np.r_[np.full(n_mats, lo), np.full(n_mats, hi)])
+    f_lo, f_hi = ends[:n_mats], ends[n_mats:]
+
+    best = np.where(f_lo <= 0, lo, hi)
+    act = np.flatnonzero(~(f_lo <= 0) & ~(f_hi > 0))
+    a, b = np.full(act.size, lo), np.full(act.size, hi)
+    for _ in range(max_iter):
+        if not act.size:
+            break
+        mid = (a + b) / 2
+        over = _remaining_by_multiplier(seg, seg_mat, act, mid) > 0
+        a = np.where(over, mid, a)
+        b = np.where(over, b, mid)
+        done = (b - a) < tol
+        best[act[done]] = b[done]
+        act, a, b = act[~done], a[~done], b[~done]
+    best[act] = b
+    return best
+
+
+def _bisection_depth(lo, hi, tol, max_iter):
+    """콜드 이분탐색이 멈추는 반복 횟수 (구간 폭 < tol 또는 max_iter)"""
+    width, k = hi - lo, 0
+    while k < max_iter and not (width < tol):
+        width /= 2
+        k += 1
+    return k
+
+
+def _solve_sales_multiplier_warm(seg: dict, seg_mat, n_mats: int, guess, lo=1.0, hi=10.0, tol=1e-3, max_iter=100):
+    """
+    이전 판매배수(guess, 없으면 NaN) 근처에서 시작하는 격자 탐색.
+    콜드 이분탐색이 수렴하는 격자(lo + i·h, h = (hi-lo)/2^K)에서 잔량 ≤ 0인 최소 i를 찾으므로
+    잔량이 판매배수에 대해 단조이면 결과는 _solve_sales_multiplier와 같다.
+    단조가 아닌 자재(일 단위 절사로 잔량이 국소적으로 늘어나는 구간)는 다른 교차점에서 멈춰 tol보다 크게 다를 수 있음.
+    - guess 있음: (i0-1, i0)부터 확인 후 필요하면 2배씩 넓히고(gallop) 구간 안에서 이분
+    - guess 없음: 격자 전체 이분
+    반환: (판매배수 배열, 시뮬레이션 평가 횟수)
+    """
+    depth = _bisection_depth(lo, hi, tol, max_iter)
+    n_grid = float(2 ** depth)
+    h = (hi - lo) / n_grid
+    guess = np.asarray(guess, dtype=np.float64)
+
+    # L: 잔량 > 0 로 확인된 최대 격자 (-1 = 가상), U: 잔량 <= 0 로 확인된 최소 격자 (n_grid+1 = 가상)
+    L = np.full(n_mats, -1.0)
+    U = np.full(n_mats, n_grid + 1.0)
+    step = np.ones(n_mats)
+    warm = np.isfinite(guess)
+    evals = 0
+
+    def probe(mats, idx):
+        nonlocal evals
+        evals += len(mats)
+        over = _remaining_by_multiplier(seg, seg_mat, mats, np.where(idx >= n_grid, hi, lo + idx * h)) > 0
+        np.maximum.at(L, mats[over], idx[over])
+        np.minimum.at(U, mats[~over], idx[~over])
+
+    w = np.flatnonzero(warm)
+    i0 = np.clip(np.ceil((guess[w] - lo) / h - 1e-6), 0, n_grid)  # 권장판매량/3평판 복원 오차 흡수
+    probe(np.r_[w, w[i0 > 0]], np.r_[i0, i0[i0 > 0] - 1])
+
+    act = np.flatnonzero(U - L > 1)
+    while act.size:
+        l, u = L[act], U[act]
+        grow_up = warm[act] & (u > n_grid)
+        grow_down = warm[act] & (l < 0) & ~grow_up
+        p = np.floor((l + u) / 2)
+        p = np.where(grow_up, np.minimum(l + step[act], n_grid), p)
+        p = np.where(grow_down, np.maximum(u - step[act], 0), p)
+        step[act] = np.where(grow_up | grow_down, step[act] * 2, step[act])
+        probe(act, p)
+        act = act[U[act] - L[act] > 1]
+
+    best = np.where(U >= n_grid, hi, lo + np.minimum(U, n_grid) * h)
+    return best, evals
+
+
+def _previous_multipliers(prev_df: pd.DataFrame, mat_codes, cur_qty, cur_sales, hi=10.0) -> np.ndarray:
+    """
+    이전 forecasted 결과에서 자재별 판매배수 추정 (없으면 NaN)
+    - 이전 배수: 권장판매량 / 3평판 → 없으면 판매개선율 문자열("35%" → 1.35, "900% 이상" → hi)
+    - 필요 판매량은 재고에 비례한다고 보고 (현재/이전 기말수량) × (이전/현재 3평판) 비율로 보정
+    """
+    out = np.full(len(mat_codes), np.nan)
+    if prev_df is None or prev_df.empty or "판매개선율" not in prev_df.columns:
+        return out
+    rate = prev_df["판매개선율"].astype(str)
+    mult = pd.to_numeric(rate.str.extract(r"([\d.]+)%", expand=False), errors="coerce") / 100 + 1
+    mult = mult.where(~rate.str.contains("이상", regex=False), hi)
+    base = pd.to_numeric(prev_df.get("3평판"), errors="coerce")
+    if "권장판매량" in prev_df.columns and base is not None:
+        exact = pd.to_numeric(prev_df["권장판매량"], errors="coerce") / base.where(base > 0)
+        mult = exact.where(exact.notna(), mult)
+
+    prev_key = _mat_key(prev_df["자재코드"])
+    prev = pd.DataFrame({"mult": mult.to_numpy(), "qty": pd.to_numeric(prev_df.get("기말수량"), errors="coerce"),
+                         "sales": base}, index=prev_df.index).groupby(prev_key.to_numpy())
+    prev = prev.agg(mult=("mult", "first"), qty=("qty", "sum"), sales=("sales", "first"))
+    prev = prev.reindex(_mat_key(pd.Series(mat_codes)).to_numpy())
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = (cur_qty / prev["qty"].to_numpy()) * (prev["sales"].to_numpy() / cur_sales)
+    ratio = np.where(np.isfinite(ratio) & (ratio > 0), ratio, 1.0)
+    guess = prev["mult"].to_numpy(dtype=np.float64)
+    return np.where(guess < hi, guess * ratio, guess)
+
+
+def binary_search(standard_df: pd.DataFrame, forecasted_df: pd.DataFrame, today=None, lo=1.0, hi=10.0, tol=1e-3, max_iter=100, warm_start: pd.DataFrame = None):
+    """
+    부진재고가 남는 자재별로 잔량이 0이 되는 판매개선율(3평판 배수)을 이분탐색
+    - 모든 대상 자재를 한 번에 평가하는 배치 탐색 (잔량은 today와 무관)
+    - warm_start: 이전 forecasted 결과(판매개선율/권장판매량)가 있으면 그 근처부터 탐색 (명시적으로 넘길 때만)
+      평가 횟수는 줄지만 잔량이 판매배수에 단조가 아닌 자재는 콜드 탐색과 다른 판매개선율이 나올 수 있음
+    - res_df.attrs["search_stats"]: 시뮬레이션 평가 횟수 / 콜드 탐색 기준 횟수
+    """
     res_df = forecasted_df.copy()
-    res_df["판매개선율"] = ""
-    res_df["권장판매량"] = ""
-    
-    slug_mats = res_df[res_df["예측부진재고"] > 0]["자재코드"].unique()
-    
-    for mat in slug_mats:
-        mat_df = standard_df[standard_df["자재코드"] == mat].copy()
-        if mat_df.empty:
-            continue
-            
-        def _get_metric(m):
-            df_in = mat_df.copy()
-            df_in["3평판"] = pd.to_numeric(df_in["3평판"], errors="coerce").fillna(0) * m
-            detail_df, _ = simulate_batches_by_product(df_in, today=today)
-            return detail_df["remaining_qty"].sum()
-
-        best_m = None
-        if _get_metric(lo) <= 0:
-            best_m = lo
-        elif _get_metric(hi) > 0:
-            best_m = hi
-        else:
-            a, b = lo, hi
-            for _ in range(max_iter):
-                mid = (a + b) / 2
-                if _get_metric(mid) > 0:
-                    a = mid
-                else:
-                    b = mid
-                if (b - a) < tol:
-                    break
-            best_m = b
-            
-        if best_m is not None:
-            if best_m >= hi:
-                disp_rate = f"{(hi - 1) * 100:.0f}% 이상"
-            else:
-                disp_rate = f"{(best_m - 1) * 100:.0f}%"
-                
-            res_df.loc[res_df["자재코드"] == mat, "판매개선율"] = disp_rate
-            
-            base_sales = pd.to_numeric(res_df.loc[res_df["자재코드"] == mat, "3평판"], errors="coerce").fillna(0).astype(float)
-            res_df.loc[res_df["자재코드"] == mat, "권장판매량"] = base_sales * best_m
-                
+    res_df["판매개선율"] = pd.Series("", index=res_df.index, dtype=object)
+    res_df["권장판매량"] = pd.Series("", index=res_df.index, dtype=object)
+    res_df.attrs["search_stats"] = {"materials": 0, "evaluations": 0, "cold_evaluations": 0}
+
+    slug_mats = res_df.loc[res_df["예측부진재고"] > 0, "자재코드"].dropna().unique()
+    df0 = standard_df[standard_df["자재코드"].isin(slug_mats)]
+    if df0.empty:
+        return res_df
+
+    df0 = _prepare_sim_input(df0)
+    seg = _fefo_segments(df0)
+    mat_of_row, mat_codes = pd.factorize(df0["자재코드"])
+    seg_mat = mat_of_row[seg["order"]][seg["starts"]]
+    if warm_start is None:
+        best = _solve_sales_multiplier(seg, seg_mat, len(mat_codes), lo, hi, tol, max_iter)
+        evals = None
+    else:
+        cur_qty = np.bincount(mat_of_row, weights=df0["기말수량"].to_numpy(), minlength=len(mat_codes))
+        cur_sales = df0.groupby(mat_of_row)["3평판"].first().to_numpy()
+        guess = _previous_multipliers(warm_start, mat_codes, cur_qty, cur_sales, hi)
+        best, evals = _solve_sales_multiplier_warm(seg, seg_mat, len(mat_codes), guess, lo, hi, tol, max_iter)
+
+    # 콜드 탐색: 양 끝 2회 + 구간 안 자재는 수렴까지 반복
+    cold = 2 * len(best) + _bisection_depth(lo, hi, tol, max_iter) * int(((best > lo) & (best < hi)).sum())
+    res_df.attrs["search_stats"] = {"materials": len(best), "evaluations": cold if evals is None else evals, "cold_evaluations": cold}
+
+    disp = [f"{(hi - 1) * 100:.0f}% 이상" if m >= hi else f"{(m - 1) * 100:.0f}%" for m in best]
+    row_pos = pd.Index(mat_codes).get_indexer(res_df["자재코드"])
+    has = row_pos >= 0
+
+    res_df.loc[has, "판매개선율"] = np.asarray(disp, dtype=object)[row_pos[has]]
+    base_sales = pd.to_numeric(res_df.loc[has, "3평판"], errors="coerce").fillna(0).astype(float)
+    res_df.loc[has, "권장판매량"] = (base_sales * best[row_pos[has]]).astype(object)
+
     return res_df
 
 
+# -----------------------------
+# 시나리오 스윕 (판매배수 × risk_days × step_days)
+# -----------------------------
+_SCENARIO_CHUNK_ROWS = 4_000_000  # 커널 1회당 (시나리오 × 배치) 행 수 상한
+
+
+def simulate_scenarios(df: pd.DataFrame, multipliers=(1.0,), risk_days=(180,), step_days=(30,)) -> pd.DataFrame:
+    """
+    (판매배수, risk_days, step_days) 격자의 모든 시나리오를 한 번에 시뮬레이션
+    - 정렬/FEFO 순서/세그먼트 구간은 한 번만 계산하고, 시나리오는 세그먼트를 복제해 커널 일괄 실행
+    - 예측부진재고는 updated와 같은 기준 (판매 없는 자재는 0)
+    반환: 시나리오 × 자재(자재코드, 자재내역)별 tidy DataFrame
+    """
+    df0 = _prepare_sim_input(df)
+    seg = _fefo_segments(df0)
+    grid = pd.MultiIndex.from_product(
+        [list(multipliers), list(risk_days), list(step_days)], names=["판매배수", "risk_days", "step_days"]
+    ).to_frame(index=False)
+
+    order, starts, ends = seg["order"], seg["starts"], seg["ends"]
+    n, n_seg, n_sc = len(order), len(starts), len(grid)
+    price = pd.to_numeric(df0["단가"], errors="coerce").fillna(0).to_numpy(dtype=np.float64)[order]
+    amount = pd.to_numeric(df0["기말금액"], errors="coerce").fillna(0).to_numpy(dtype=np.float64)[order]
+
+    remain = np.zeros((n_sc, n_seg))
+    remain_amt = np.zeros((n_sc, n_seg))
+    per = max(1, _SCENARIO_CHUNK_ROWS // max(n, 1))
+    for lo in range(0, n_sc if n_seg else 0, per):
+        g = grid.iloc[lo:lo + per]
+        k = len(g)
+        offs = np.repeat(np.arange(k, dtype=np.int64) * n, n_seg)
+        monthly = np.tile(seg["monthly"], k) * np.repeat(g["판매배수"].to_numpy(dtype=np.float64), n_seg)
+        qty = _fefo_kernel(
+            np.tile(seg["days"], k), np.tile(seg["qty"], k), np.tile(starts, k) + offs, np.tile(ends, k) + offs,
+            monthly, np.repeat(g["risk_days"].to_numpy(dtype=np.int64), n_seg),
+            np.repeat(g["step_days"].to_numpy(dtype=np.int64), n_seg), detail=False,
+        ).reshape(k, n)
+        qty[np.repeat(monthly.reshape(k, n_seg) <= 0, ends - starts, axis=1)] = 0.0
+        remain[lo:lo + k] = np.add.reduceat(qty, starts, axis=1)
+        remain_amt[lo:lo + k] = np.add.reduceat(qty * price, starts, axis=1)
+
+    first = order[starts]
+    mats = pd.DataFrame({
+        "자재코드": df0["자재코드"].to_numpy()[first],
+        "자재내역": df0["자재내역"].to_numpy()[first],
+        "기말수량": np.add.reduceat(seg["qty"], starts) if n_seg else np.zeros(0),
+        "기말금액": np.add.reduceat(amount, starts) if n_seg else np.zeros(0),
+    })
+    out = pd.concat([grid.loc[grid.index.repeat(n_seg)].reset_index(drop=True),
+                     pd.concat([mats] * n_sc, ignore_index=True) if n_sc else mats.iloc[:0]], axis=1)
+    out["예측부진재고"] = remain.ravel()
+    out["예측부진재고금액"] = remain_amt.ravel()
+    return out
+
+
+# -----------------------------
+# 증분 시뮬레이션 (자재 지문 비교)
+# -----------------------------
+FINGERPRINT_FILE = "sim_fingerprint.csv"
+
+
+def _mat_key(s: pd.Series) -> pd.Series:
+    """자재코드 비교용 문자열 키 (CSV 재로딩 시 int/str 차이 흡수)"""
+    return normalize_code_series(s)
+
+
+def material_fingerprints(df: pd.DataFrame, risk_days: int = 180, step_days: int = 30) -> pd.DataFrame:
+    """
+    자재코드별 지문: 배치 구성(자재내역/배치/기말수량/남은일/3평판, 행 순서 포함) + risk_days/step_days 해시
+    지문이 같으면 시뮬레이션/판매개선율 결과도 같음
+    남은일은 실행일 기준이라 하루만 지나도 유효기한이 있는 자재 지문은 모두 바뀜 → 같은 날 재실행에서만 재사용됨
+    """
+    df0 = _prepare_sim_input(df)
+    return _fingerprints(df0, _mat_key(df0["자재코드"]), risk_days, step_days)
+
+
+def _fingerprints(df0: pd.DataFrame, key: pd.Series, risk_days: int, step_days: int) -> pd.DataFrame:
+    rows = pd.DataFrame({
+        "자재내역": df0["자재내역"].astype(str).to_numpy(),
+        "배치":     df0["배치"].astype(str).to_numpy(),
+        "기말수량": df0["기말수량"].to_numpy(dtype=np.float64),
+        "남은일":   df0["남은일"].to_numpy(dtype=np.int64),
+        "3평판":    df0["3평판"].to_numpy(dtype=np.float64),
+        "순번":     key.groupby(key).cumcount().to_numpy(dtype=np.int64),
+        "risk":     np.int64(risk_days),
+        "step":     np.int64(step_days),
+    })
+    row_hash = pd.util.hash_pandas_object(rows, index=False).to_numpy()
+
+    mat_of_row, mats = pd.factorize(key)
+    acc = np.zeros(len(mats), dtype=np.uint64)
+    np.add.at(acc, mat_of_row, row_hash)  # uint64 wrap-around 합 (행 순서는 '순번'으로 반영)
+    return pd.DataFrame({"자재코드": np.asarray(mats, dtype=object), "fingerprint": [f"{h:016x}" for h in acc]})
+
+
+def simulate_incremental(df: pd.DataFrame, prev: dict = None, risk_days: int = 180, step_days: int = 30, today=None, engine: str = "numpy", workers: int = 1,
+                         warm_start: bool = False):
+    """
+    이전 실행 결과를 재사용하는 FEFO 시뮬레이션 + 판매개선율 탐색
+    - prev: {"detail", "updated", "fingerprint"} (simulation.csv / forecasted_inventory.csv / sim_fingerprint.csv)
+    - 지문이 바뀐 자재코드만 simulate_batches_by_product / binary_search 재실행, 나머지는 이전 행 재사용
+      (지문에 남은일이 들어가므로 실행일이 바뀌면 유효기한이 있는 자재는 전부 재계산 — 같은 날 다시 돌릴 때만 효과)
+    - detail 날짜는 일수 오프셋이므로 기준일이 달라도 이전 행을 그대로 재사용
+    - warm_start=True: 바뀐 자재의 판매개선율을 이전 결과 근처부터 탐색 (binary_search 참고, 기본은 콜드 탐색 → 전체 실행과 동일)
+    반환: detail_df, updated_df, fingerprint_df, 재계산 자재코드 수
+    """
+    if today is None:
+        today = datetime.now().date()
+    elif isinstance(today, datetime):
+        today = today.date()
+
+    df0 = _prepare_sim_input(df)
+    key = _mat_key(df0["자재코드"])
+    fp = _fingerprints(df0, key, risk_days, step_days)
+    fp["base_date"] = today.isoformat()
+
+    if not prev or any(prev.get(k) is None for k in ("detail", "updated", "fingerprint")):
+        detail, updated = simulate_batches_by_product(df0, risk_days, step_days, today, engine=engine, workers=workers)
+        return detail, binary_search(df0, updated), fp, len(fp)
+
+    prev_fp = prev["fingerprint"]
+    prev_map = pd.Series(prev_fp["fingerprint"].astype(str).to_numpy(), index=_mat_key(prev_fp["자재코드"]))
+    prev_map = prev_map[~prev_map.index.duplicated(keep="last")]
+    changed_mats = set(fp.loc[fp["자재코드"].map(prev_map).ne(fp["fingerprint"]), "자재코드"])
+
+    # 이전 결과 파일의 자재별 행 수가 다르면 (일부만 저장 등) 재계산 대상
+    prev_upd, prev_key = prev["updated"], _mat_key(prev["updated"]["자재코드"])
+    pd_key = _mat_key(prev["detail"]["자재코드"])
+    cnt = key.value_counts()
+    for frame_key in (prev_key, pd_key):
+        stale = cnt.ne(frame_key.value_counts().reindex(cnt.index))
+        changed_mats |= set(cnt.index[stale])
+    changed = key.isin(changed_mats).to_numpy()
+
+    # 1) 바뀐 자재만 재계산
+    df_new = df0[changed]
+    detail_new, upd_new = simulate_batches_by_product(df_new, risk_days, step_days, today, engine=engine, workers=workers)
+    upd_new = binary_search(df_new, upd_new, warm_start=prev["updated"] if warm_start else None)
+
+    # 2) updated: (자재코드 키, 자재 내 순번)으로 이전 행 매칭
+    prev_pos = pd.MultiIndex.from_arrays([prev_key, prev_key.groupby(prev_key).cumcount()])
+    cur_pos = pd.MultiIndex.from_arrays([key, key.groupby(key).cumcount()])
+    src = prev_pos.get_indexer(cur_pos[~changed])
+
+    updated = df0.copy()
+    for col, blank in [("예측부진재고", 0.0), ("판매개선율", ""), ("권장판매량", "")]:
+        vals = np.empty(len(df0), dtype=object if blank == "" else np.float64)
+        vals[changed] = upd_new[col].to_numpy()
+        old = prev_upd[col].to_numpy()[src]
+        vals[~changed] = np.where(pd.isna(old), blank, old)
+        updated[col] = vals
+        if col == "예측부진재고":
+            updated["예측부진재고금액"] = updated["예측부진재고"] * updated["단가"]
+
+    # 3) detail: 전체 실행과 같은 (자재 그룹, FEFO) 순서로 새 행/이전 행 병합
+    seg_order = _fefo_segments(df0)["order"]
+    d_changed = changed[seg_order]
+    d_key = key.to_numpy()[seg_order]
+    d_rank = pd.Series(d_key).groupby(d_key).cumcount().to_numpy()
+
+    prev_base = prev_fp["base_date"].iloc[0] if len(prev_fp) else today
+    prev_det = _detail_offsets(prev["detail"], prev_base)
+    pd_pos = pd.MultiIndex.from_arrays([pd_key, pd_key.groupby(pd_key).cumcount()])
+    d_src = pd_pos.get_indexer(pd.MultiIndex.from_arrays([d_key[~d_changed], d_rank[~d_changed]]))
+
+    merged = pd.concat([detail_new, prev_det.iloc[d_src]], ignore_index=True)
+    dest = np.r_[np.flatnonzero(d_changed), np.flatnonzero(~d_changed)]
+    detail = merged.iloc[np.argsort(dest, kind="stable")].reset_index(drop=True)
+    for col in ("자재코드", "자재내역", "배치"):
+        detail[col] = df0[col].take(seg_order).to_numpy()
+
+    updated.attrs["search_stats"] = upd_new.attrs.get("search_stats")
+    return detail, updated, fp, len(changed_mats)
+
+
 def picking_major_management_inventory(df):
 
-    major_management_df = df[(180 <= df["남은일"]) & (df["남은일"] < 360)]
+    major_management_df = _prepare_sim_input(df[(180 <= df["남은일"]) & (df["남은일"] < 360)])
 
-    detail_df, major_management_df = simulate_batches_by_product(major_management_df)
+    major_management_df["예측부진재고"] = _remaining_qty(major_management_df, 180, 30, no_sales_remaining=False)
+    major_management_df["예측부진재고금액"] = major_management_df["예측부진재고"] * major_management_df["단가"]
 
     major_management_df = major_management_df[major_management_df["예측부진재고"] > 0]
 
@@ -381,16 +1053,15 @@ def depletion_rate(df1, df2):
     df2 = df2.copy()
     if "자재" in df2.columns and "자재코드" not in df2.columns:
         df2.rename(columns={"자재": "자재코드"}, inplace=True)
-    df2["자재코드"] = df2["자재코드"].astype(str).str.strip().str.replace(r"\.0$", "", regex=True)
-    df2 = df2[["자재코드", "당월출하"]].copy()
-    df2["당월출하"] = pd.to_numeric(df2["당월출하"], errors="coerce").fillna(0)
-    df2 = df2.groupby("자재코드", as_index=False)["당월출하"].sum()
+    key1, key2 = shared_code_keys(df1["자재코드"], df2["자재코드"])
+    shipped = pd.to_numeric(df2["당월출하"], errors="coerce").fillna(0)
+    shipped = shipped.groupby(key2.cat.codes.to_numpy()).sum()
 
-    df1["자재코드"] = df1["자재코드"].astype(str).str.strip().str.replace(r"\.0$", "", regex=True)
+    df1["자재코드"] = key1.astype(object)
     df1[month_col] = pd.to_numeric(df1[month_col], errors="coerce").fillna(0)
 
-    result = df1.merge(df2, on="자재코드", how="left")
-    result["당월출하"] = result["당월출하"].fillna(0)
+    result = df1.reset_index(drop=True)
+    result["당월출하"] = shipped.reindex(key1.cat.codes.to_numpy()).fillna(0).to_numpy()
     result["소진율"] = result.apply(
         lambda r: r["당월출하"] / r[month_col] if r[month_col] > 0 else 0.0, axis=1
     )
@@ -406,9 +1077,8 @@ def stock_out(df):
     stockout_df = df[["자재코드", "자재내역", "3평판", "기말수량"]].copy()
     stockout_df["재고일수"] = stockout_df["기말수량"] / stockout_df["3평판"]
     
-    stockout_df["현황"] = stockout_df["재고일수"].apply(
-        lambda x: "위험" if x < 30 else ("주의" if x < 60 else "")
-    )
+    grade = bucketize_series(stockout_df["재고일수"], STOCKOUT_GRADES)
+    stockout_df["현황"] = grade.mask(grade == "정상", "")  # 기존 출력 유지: 정상은 빈칸
     
     return stockout_df
     
@@ -1,4 +1,5 @@
 import os
+import sys
 import time
 import smtplib
 import schedule
@@ -6,6 +7,9 @@ import pandas as pd
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 루트의 buckets 모듈
+from buckets import MONTH_BUCKETS, bucketize_series
+
 # ---------------------------
 # Gmail SMTP 정보
 # ---------------------------
@@ -64,39 +68,6 @@ def safe_num(series: pd.Series) -> pd.Series:
     )
 
 
-def to_bucket(days: float) -> str:
-    """오늘 기준 days_to_expiry를 1~12개월 미만/이상으로 라벨링"""
-    if pd.isna(days):
-        return "유효기한 없음"
-    if days < 0:
-        return "폐기확정(유효기한 지남)"
-    if days < 30:
-        return "1개월 미만"
-    if days < 60:
-        return "2개월 미만"
-    if days < 90:
-        return "3개월 미만"
-    if days < 120:
-        return "4개월 미만"
-    if days < 150:
-        return "5개월 미만"
-    if days < 180:
-        return "6개월 미만"
-    if days < 210:
-        return "7개월 미만"
-    if days < 240:
-        return "8개월 미만"
-    if days < 270:
-        return "9개월 미만"
-    if days < 300:
-        return "10개월 미만"
-    if days < 330:
-        return "11개월 미만"
-    if days < 365:
-        return "12개월 미만"
-    return "12개월 이상"
-
-
 def load_prepare(stock_path: str) -> pd.DataFrame:
     df = pd.read_csv(stock_path, encoding="utf-8-sig")
 
@@ -114,7 +85,7 @@ def load_prepare(stock_path: str) -> pd.DataFrame:
     df["_val"] = safe_num(df[VAL_COL]).fillna(0)
 
     # 버킷 재계산
-    df[BUCKET_COL] = df[DAYS_COL].apply(to_bucket)
+    df[BUCKET_COL] = bucketize_series(df[DAYS_COL], MONTH_BUCKETS)
 
     return df
 
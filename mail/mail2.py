@@ -1,4 +1,5 @@
 import os
+import sys
 import time
 import smtplib
 import schedule
@@ -7,6 +8,11 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 루트의 buckets/stockout 모듈
+from buckets import STOCKOUT_GRADES
+from period_store import artifact_path
+from stockout import load_stockout
+
 
 # ---------------------------
 # 1) Gmail SMTP 정보
@@ -29,30 +35,22 @@ TO_EMAILS = [
 TARGET_YEAR = "2025년"
 TARGET_MONTH = "12월"
 
-# 위 설정값을 바탕으로 자동으로 경로가 생성됩니다. (Stockout.csv 사용)
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-STOCK_PATH = os.path.join(BASE_DIR, "Datas", TARGET_YEAR, TARGET_MONTH, "Stockout.csv")
+# 위 설정값의 data/<연도>/<월>/inventory 기준 품절 현황 (웹 화면과 같은 stockout 모듈 결과)
+PERIOD = (TARGET_YEAR, TARGET_MONTH)
+STOCK_PATH = str(artifact_path(PERIOD, "inventory", "csv"))
 
-MAT_COL = "자재"
-MAT_NAME_COL = "자재 내역"
-SALES_COL = "3평판"  # 월 판매량(3개월 평균 월판매량)
-QTY_COL = "Stock Quantity on Period End"
+MAT_COL = "자재코드"
+MAT_NAME_COL = "자재내역"
+SALES_COL = "판매평균"  # 월 판매량(3개월 평균 월판매량, 3평판)
+QTY_COL = "기말수량"
 
-# 기준
-DAYS_WARN = 60
-DAYS_RISK = 30
+# 기준 (buckets.STOCKOUT_GRADES 경계: 30일 미만 위험, 60일 미만 주의)
+DAYS_RISK, DAYS_WARN = STOCKOUT_GRADES["edges"]
 
 
 # ---------------------------
 # Utils
 # ---------------------------
-def safe_num(series: pd.Series) -> pd.Series:
-    return pd.to_numeric(
-        series.astype(str).str.replace(",", "", regex=False).str.strip(),
-        errors="coerce"
-    ).fillna(0)
-
-
 def fmt_int(x) -> str:
     try:
         return f"{int(round(float(x))):,}"
@@ -69,29 +67,18 @@ def row_bg_color(grade: str) -> str:
 
 
 # ---------------------------
-# 3) 데이터 로드 및 계산 (Stockout.csv 기반)
+# 3) 데이터 로드 및 계산 (stockout 모듈 기반)
 # ---------------------------
 def load_and_process() -> tuple[pd.DataFrame, pd.DataFrame]:
-    if not os.path.exists(STOCK_PATH):
-        raise FileNotFoundError(f"Stockout.csv 파일을 찾을 수 없습니다: {STOCK_PATH}\n(먼저 웹에서 분석을 실행하여 파일을 생성해 주세요)")
-
-    df = pd.read_csv(STOCK_PATH, encoding="utf-8-sig")
-
-    # 필수 컬럼 체크 (Stockout.csv 기준)
-    required = [MAT_COL, MAT_NAME_COL, SALES_COL, QTY_COL, "재고일수"]
-    missing = [c for c in required if c not in df.columns]
-    if missing:
-        raise KeyError(f"Stockout.csv에 필요한 컬럼이 없습니다: {missing}")
-
-    # 숫자화
-    df[SALES_COL] = safe_num(df[SALES_COL])
-    df[QTY_COL] = safe_num(df[QTY_COL])
-    df["재고일수"] = safe_num(df["재고일수"])
+    try:
+        df = load_stockout(PERIOD)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"inventory 파일을 찾을 수 없습니다: {STOCK_PATH}\n(먼저 웹에서 분석을 실행하여 파일을 생성해 주세요)")
 
-    # 60일 미만만 리스크
+    # 60일 미만만 리스크 (등급은 stockout 모듈의 현황 그대로)
     risk_df = df[df["재고일수"] < DAYS_WARN].copy()
     if not risk_df.empty:
-        risk_df["리스크 등급"] = risk_df["재고일수"].apply(lambda x: "위험" if x < DAYS_RISK else "주의")
+        risk_df["리스크 등급"] = risk_df["현황"].astype(str)
         risk_df = risk_df.sort_values(["재고일수"], ascending=True).reset_index(drop=True)
 
     return df, risk_df
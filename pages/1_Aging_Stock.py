@@ -2,13 +2,12 @@ import streamlit as st
 import pandas as pd
 import io
 from datetime import datetime
-from utils import (
-    preprocess_df,
-    load_csv_any_encoding,
-    read_excel_with_smart_header,
-    parse_html_tables
-)
-from inventory_utils2 import aging_inventory_preprocess
+import dashboard_kpi
+import history_store
+import period_store
+from staging import load_masters, load_staged, stage_all
+from buckets import MONTH_BUCKETS, bucketize_series
+from inventory_utils2 import aging_inventory_preprocess, detail_with_dates
 
 st.set_page_config(page_title="Aging Inventory Analysis", layout="wide")
 
@@ -90,21 +89,32 @@ with c2:
     target_month = st.selectbox("월", options=[f"{i}월" for i in range(1, 13)], index=current_month - 1)
 
 import os
-target_dir = os.path.join("data", target_year, target_month)
-file_std = os.path.join(target_dir, "inventory.csv")
-file_sim = os.path.join(target_dir, "simulation.csv")
-file_res = os.path.join(target_dir, "forecasted_inventory.csv")
+target_period = (target_year, target_month)
+
+
+def load_prev_simulation():
+    """
+    증분 시뮬레이션용 이전 결과: 이번 달 저장본 (없으면 None)
+    - 지문에 남은일이 들어가므로 재사용은 같은 날 다시 돌릴 때만 (직전 달 결과는 유효기한 있는 자재가 전부 바뀌어서 쓰지 않음)
+    """
+    artifacts = {"detail": "simulation", "updated": "forecasted_inventory", "fingerprint": "sim_fingerprint"}
+    if all(period_store.exists(target_period, a) for a in artifacts.values()):
+        return {k: period_store.load(target_period, a) for k, a in artifacts.items()}
+    return None
 
 # --- 캐싱된 데이터 불러오기 ---
-if os.path.exists(file_std) and os.path.exists(file_sim) and os.path.exists(file_res):
+if all(period_store.exists(target_period, a) for a in ("inventory", "simulation", "forecasted_inventory")):
     st.info(f"{target_year} {target_month}에 저장된 시뮬레이션 결과가 있어서 데이터를 자동으로 불러왔습니다.")
     try:
         if "aging_result_df" not in st.session_state or st.session_state["aging_result_df"] is None or not st.session_state.get("sim_result"):
             with st.spinner("저장된 데이터를 불러오는 중..."):
-                st.session_state["aging_result_df"] = pd.read_csv(file_std)
-                dt_df = pd.read_csv(file_sim)
-                upd_df = pd.read_csv(file_res)
-                st.session_state["sim_result"] = {"detail": dt_df, "updated": upd_df}
+                st.session_state["aging_result_df"] = period_store.load(target_period, "inventory")
+                dt_df = period_store.load(target_period, "simulation")
+                upd_df = period_store.load(target_period, "forecasted_inventory")
+                # detail 오프셋의 기준일 (지문 파일이 없는 예전 결과는 날짜 컬럼으로 저장돼 있음)
+                base_date = (period_store.load(target_period, "sim_fingerprint", columns=["base_date"])["base_date"].iloc[0]
+                             if period_store.exists(target_period, "sim_fingerprint") else datetime.now().date())
+                st.session_state["sim_result"] = {"detail": dt_df, "updated": upd_df, "base_date": base_date}
                 st.rerun() # UI 업데이트를 위한 새로고침
     except Exception as e:
         st.warning(f"저장된 파일을 불러오는 데 실패했습니다: {e}")
@@ -178,13 +188,15 @@ for i, item in enumerate(ALL_DISPLAY_ITEMS):
 if not all_files_found:
     st.warning(f"필수 파일이 없습니다. `{INPUT_DATA_BASE}/{{폴더명}}/` 경로를 확인하세요.")
 
+if st.button("input_data 새 파일 적재 (Parquet 변환)"):
+    with st.spinner("새로 들어온 원본 파일을 Parquet으로 변환하는 중..."):
+        st.dataframe(stage_all(), use_container_width=True, hide_index=True)
+
 # 품절예상조회 세션 저장
 if "stockout_df" in found_files:
     try:
         _sp = found_files["stockout_df"]
-        with open(_sp, "rb") as _sf:
-            _sf_bytes = _sf.read()
-        sf_df = load_csv_any_encoding(_sf_bytes) if _sp.lower().endswith(".csv") else read_excel_with_smart_header(_sf_bytes, scan_rows=80)
+        sf_df = load_staged("품절예상조회", _sp)
         if "stockout_forecast" not in st.session_state:
             st.session_state["stockout_forecast"] = {}
         st.session_state["stockout_forecast"][datetime.fromtimestamp(os.path.getmtime(_sp)).strftime("%Y-%m-%d")] = sf_df
@@ -202,55 +214,58 @@ if target_month not in st.session_state["dfs"][target_year]: st.session_state["d
 # ⚙️ 3. 데이터 저장 및 전처리 로직
 ###############################################################################
 
-@st.cache_data(show_spinner=False)
-def process_file(file_bytes, filename):
-    if filename.lower().endswith(".csv"):
-        return preprocess_df(load_csv_any_encoding(file_bytes))
-    try:
-        return preprocess_df(read_excel_with_smart_header(file_bytes, scan_rows=80))
-    except:
-        return preprocess_df(parse_html_tables(file_bytes))
+with st.expander("시뮬레이션 설정"):
+    sim_workers = st.number_input(
+        "병렬 작업자 수 (자재코드 단위 분할)", min_value=1, max_value=os.cpu_count() or 1, value=1, step=1,
+        help="2 이상이면 자재코드 샤드를 여러 프로세스에서 동시에 시뮬레이션합니다."
+    )
 
 if st.button("데이터 전처리 및 시뮬레이션 실행", use_container_width=True, type="primary"):
     if len(found_files) < 5:
         st.error(f"5개 파일이 모두 있어야 합니다. 현재 {len(found_files)}개만 확인됨.")
     else:
         with st.spinner("데이터 처리 중..."):
+            # 원본 엑셀은 staging/ Parquet으로 한 번만 변환 (변경된 파일만 재적재)
             for item in INPUT_DATA_ITEMS:
-                fpath = found_files[item["key"]]
-                with open(fpath, "rb") as _f:
-                    st.session_state["dfs"][target_year][target_month][item["key"]] = process_file(_f.read(), fpath)
+                st.session_state["dfs"][target_year][target_month][item["key"]] = load_staged(item["folder"], found_files[item["key"]])
             
             target_dfs = st.session_state["dfs"][target_year][target_month]
             try:
-                from inventory_utils2 import aging_inventory_preprocess
-                
+                # 자재/배치 기준정보 마스터는 원본이 바뀌었을 때만 다시 생성
+                masters = load_masters(found_files[COST_KEY], found_files[CLS_KEY], found_files[EXP_KEY])
                 final_df = aging_inventory_preprocess(
                     **target_dfs,
+                    **masters,
                     year_str=target_year,
                     month_str=target_month
                 )
 
                 st.text(f"{target_year} {target_month} 전처리 완료! ({len(final_df):,}행)")
                 
-                # --- 2. 시뮬레이션 연속 실행 ---
-                st.text("FEFO 시뮬레이션을 수행 중입니다...")
-                from inventory_utils2 import simulate_batches_by_product, binary_search
-                detail_df, updated_df = simulate_batches_by_product(final_df)
-                
-                # --- 3. 이진 탐색 (판매개선율 산출) ---
-                st.text("최적 판매개선율 탐색 연산 중입니다... (약 1분 소요)")
-                updated_df = binary_search(final_df, updated_df)
+                # --- 2~3. FEFO 시뮬레이션 + 판매개선율 탐색 (지문이 바뀐 자재만 재계산) ---
+                st.text("FEFO 시뮬레이션 및 판매개선율 탐색 중입니다...")
+                from inventory_utils2 import simulate_incremental
+                sim_today = datetime.now().date()
+                detail_df, updated_df, fp_df, n_changed = simulate_incremental(
+                    final_df, load_prev_simulation(), today=sim_today, workers=int(sim_workers)
+                )
+                st.text(f"재계산 자재 {n_changed:,}개 / 전체 {len(fp_df):,}개 (나머지는 이전 결과 재사용)")
+                _ss = updated_df.attrs.get("search_stats")
+                if _ss and _ss["materials"] and _ss["evaluations"] < _ss["cold_evaluations"]:
+                    st.text(f"판매개선율 탐색: 시뮬레이션 {_ss['evaluations']:,}회 (콜드 탐색 {_ss['cold_evaluations']:,}회 대비 "
+                            f"{_ss['cold_evaluations'] - _ss['evaluations']:,}회 절감)")
                 
                 # --- 4. 파일 자동 저장 ---
-                os.makedirs(target_dir, exist_ok=True)
-                final_df.to_csv(file_std, index=False, encoding="utf-8-sig")
-                detail_df.to_csv(file_sim, index=False, encoding="utf-8-sig")
-                updated_df.to_csv(file_res, index=False, encoding="utf-8-sig")
+                period_store.save(target_period, "inventory", final_df)
+                dashboard_kpi.write_snapshot(target_period, final_df)
+                period_store.save(target_period, "simulation", detail_df)
+                period_store.save(target_period, "forecasted_inventory", updated_df)
+                history_store.append_period(target_period, updated_df)
+                period_store.save(target_period, "sim_fingerprint", fp_df)
                 
                 # 세션 반영
                 st.session_state["aging_result_df"] = final_df
-                st.session_state["sim_result"] = {"detail": detail_df, "updated": updated_df}
+                st.session_state["sim_result"] = {"detail": detail_df, "updated": updated_df, "base_date": sim_today}
                 
                 st.success(f"전처리부터 시뮬레이션, 결과 자동 저장까지 한 번에 완료되었습니다! (배치 {len(detail_df):,}건)")
                 
@@ -285,24 +300,7 @@ if st.session_state.get("aging_result_df") is not None:
     if DAYS_COL not in risk_df.columns:
         risk_df[DAYS_COL] = (risk_df[EXPIRY_COL] - today).dt.days
 
-    def to_bucket(days):
-        if pd.isna(days): return "유효기한 없음"
-        if days < 0: return "폐기확정(유효기한 지남)"
-        if days < 30: return "1개월 미만"
-        if days < 60: return "2개월 미만"
-        if days < 90: return "3개월 미만"
-        if days < 120: return "4개월 미만"
-        if days < 150: return "5개월 미만"
-        if days < 180: return "6개월 미만"
-        if days < 210: return "7개월 미만"
-        if days < 240: return "8개월 미만"
-        if days < 270: return "9개월 미만"
-        if days < 300: return "10개월 미만"
-        if days < 330: return "11개월 미만"
-        if days < 365: return "12개월 미만"
-        return "12개월 이상"
-
-    risk_df[BUCKET_COL] = risk_df[DAYS_COL].apply(to_bucket)
+    risk_df[BUCKET_COL] = bucketize_series(risk_df[DAYS_COL], MONTH_BUCKETS)
 
     # 2) UI 탭 설정 및 표시 함수 정의
     tab6, tab7, tab9, tab12 = st.tabs(["6개월 미만", "7개월 미만", "9개월 미만", "12개월 미만"])
@@ -389,9 +387,7 @@ if st.session_state.get("aging_result_df") is not None:
 
         if major_management_df is not None and not major_management_df.empty:
             # 자동 저장
-            os.makedirs(target_dir, exist_ok=True)
-            _major_path = os.path.join(target_dir, "major_management_inventory.csv")
-            major_management_df.to_csv(_major_path, index=False, encoding="utf-8-sig")
+            period_store.save(target_period, "major_management_inventory", major_management_df)
 
             # 주요 컬럼 순서 정리 후 표시
             _ordered = ["자재코드", "자재내역", "대분류", "소분류", "배치",
@@ -437,7 +433,7 @@ if st.session_state.get("aging_result_df") is not None:
             with col_nav:
                 # 소진계획 입력 페이지에 필요한 데이터 session state에 저장
                 st.session_state["major_management_df"] = major_management_df
-                st.session_state["plan_target_dir"] = target_dir
+                st.session_state["plan_target_period"] = target_period
                 st.session_state["plan_target_year"] = target_year
                 st.session_state["plan_target_month"] = target_month
                 if st.button("소진계획 입력 →", type="primary", use_container_width=True):
@@ -459,11 +455,10 @@ if st.session_state.get("aging_result_df") is not None:
     try:
         from inventory_utils2 import depletion_rate as _depletion_rate
 
-        plan_csv_path = os.path.join(target_dir, "소진계획.csv")
         stockout_folder = os.path.join(INPUT_DATA_BASE, "품절예상조회")
         stockout_fpath = get_latest_file(stockout_folder) if callable(get_latest_file) else None
 
-        _plan_ok = os.path.exists(plan_csv_path)
+        _plan_ok = period_store.exists(target_period, "depletion_plan")
         _stock_ok = stockout_fpath is not None and os.path.exists(stockout_fpath)
 
         c_s1, c_s2 = st.columns(2)
@@ -480,13 +475,8 @@ if st.session_state.get("aging_result_df") is not None:
 
 
         if _plan_ok and _stock_ok:
-            df1_plan = pd.read_csv(plan_csv_path, encoding="utf-8-sig")
-            with open(stockout_fpath, "rb") as _sf:
-                _sf_bytes = _sf.read()
-            if stockout_fpath.lower().endswith(".csv"):
-                df2_stock = load_csv_any_encoding(_sf_bytes)
-            else:
-                df2_stock = read_excel_with_smart_header(_sf_bytes, scan_rows=80)
+            df1_plan = period_store.load(target_period, "depletion_plan")
+            df2_stock = load_staged("품절예상조회", stockout_fpath)
 
             with st.spinner("소진율 계산 중..."):
                 rate_df = _depletion_rate(df1_plan, df2_stock)
@@ -621,6 +611,7 @@ else:
     # 결과 표시
     detail_df = st.session_state["sim_result"]["detail"]
     updated_df = st.session_state["sim_result"]["updated"]
+    sim_base_date = st.session_state["sim_result"].get("base_date", datetime.now().date())
 
     st.markdown('<div class="section-label">FEFO 시뮬레이션 결과</div>', unsafe_allow_html=True)
     st.markdown("### 시뮬레이션 후 잔량 (updated)")
@@ -689,7 +680,7 @@ else:
     # 다운로드
     col1, col2 = st.columns(2)
     with col1:
-        csv_detail = detail_df.to_csv(index=False, encoding="utf-8-sig").encode("utf-8-sig")
+        csv_detail = detail_with_dates(detail_df, sim_base_date).to_csv(index=False, encoding="utf-8-sig", date_format="%Y-%m-%d").encode("utf-8-sig")
         st.download_button("detail 다운로드 (CSV)", csv_detail, "detail_df.csv", "text/csv")
     with col2:
         csv_updated = updated_df.to_csv(index=False, encoding="utf-8-sig").encode("utf-8-sig")
@@ -709,6 +700,7 @@ else:
 
     _detail = st.session_state["sim_result"]["detail"]
     _upd = st.session_state["sim_result"]["updated"]
+    _base_date = st.session_state["sim_result"].get("base_date", _date.today())
     today_date = _date.today()
 
     # --- [추가] 고가치 리스크 자재 (중복 제거) Top 10 버튼 ---
@@ -743,12 +735,9 @@ else:
 
         import plotly.express as px
 
-        sub_v = sub.copy()
-        today_ts = pd.Timestamp.today().normalize()
-
-        for c in ["sell_start_date", "sell_end_date", "risk_entry_date"]:
-            if c in sub_v.columns:
-                sub_v[c] = pd.to_datetime(sub_v[c], errors="coerce")
+        # 일수 오프셋 → 날짜 변환은 조회한 자재 행에만 적용
+        sub_v = detail_with_dates(sub, _base_date)
+        today_ts = pd.Timestamp(_base_date).normalize()
 
         sub_v["expiry_date"]  = today_ts + pd.to_timedelta(sub_v["init_days"], unit="D")
         sub_v["batch_label"]  = sub_v["배치"].astype(str)
@@ -853,7 +842,123 @@ else:
 st.markdown("<hr>", unsafe_allow_html=True)
 
 ###############################################################################
-# 📦 6. 데이터 현황 (Footer)
+# 🔀 6. 시나리오 분석 (판매배수 × risk_days × step_days)
+###############################################################################
+
+if st.session_state.get("aging_result_df") is not None:
+    st.markdown('<div class="section-label">시나리오 분석</div>', unsafe_allow_html=True)
+    st.markdown("### What-if 시나리오 (판매 증감 · risk 기준일)")
+
+    sc1, sc2, sc3 = st.columns(3)
+    with sc1:
+        sc_mults = st.multiselect("판매배수 (3평판 × 배수)", options=[0.8, 0.9, 1.0, 1.1, 1.2, 1.3, 1.5, 2.0], default=[1.0, 1.2, 1.5])
+    with sc2:
+        sc_risks = st.multiselect("risk_days", options=[90, 120, 150, 180, 210, 240], default=[150, 180])
+    with sc3:
+        sc_steps = st.multiselect("step_days", options=[15, 30], default=[30])
+
+    if st.button("시나리오 실행", use_container_width=True):
+        if not (sc_mults and sc_risks and sc_steps):
+            st.warning("판매배수 / risk_days / step_days를 하나 이상씩 선택하세요.")
+        else:
+            from inventory_utils2 import simulate_scenarios
+            with st.spinner(f"{len(sc_mults) * len(sc_risks) * len(sc_steps)}개 시나리오 시뮬레이션 중..."):
+                st.session_state["scenario_result"] = simulate_scenarios(
+                    st.session_state["aging_result_df"], sorted(sc_mults), sorted(sc_risks), sorted(sc_steps)
+                )
+
+    sc_df = st.session_state.get("scenario_result")
+    if sc_df is not None and not sc_df.empty:
+        tab_sum, tab_mat = st.tabs(["시나리오 요약", "자재별 결과"])
+        keys = ["판매배수", "risk_days", "step_days"]
+
+        with tab_sum:
+            summary = sc_df.groupby(keys, as_index=False).agg(
+                예측부진재고=("예측부진재고", "sum"),
+                예측부진재고금액=("예측부진재고금액", "sum"),
+                부진자재수=("예측부진재고", lambda s: int((s > 0).sum())),
+            )
+            pivot = summary.pivot_table(index="판매배수", columns=["risk_days", "step_days"], values="예측부진재고금액")
+            pivot.columns = [f"risk {r}일 / step {s}일" for r, s in pivot.columns]
+            st.line_chart(pivot)
+            disp_sum = summary.copy()
+            for col in ["예측부진재고", "예측부진재고금액"]:
+                disp_sum[col] = disp_sum[col].map(lambda x: f"{x:,.0f}")
+            st.dataframe(disp_sum, use_container_width=True)
+
+        with tab_mat:
+            mat_view = sc_df[sc_df["예측부진재고"] > 0].sort_values(keys + ["예측부진재고금액"], ascending=[True, True, True, False])
+            disp_mat = mat_view.copy()
+            for col in ["기말수량", "기말금액", "예측부진재고", "예측부진재고금액"]:
+                disp_mat[col] = disp_mat[col].map(lambda x: f"{x:,.0f}")
+            st.dataframe(disp_mat.reset_index(drop=True), use_container_width=True, height=450)
+            st.download_button(
+                "시나리오 결과 다운로드 (CSV)",
+                sc_df.to_csv(index=False, encoding="utf-8-sig").encode("utf-8-sig"),
+                "scenario_result.csv", "text/csv"
+            )
+
+    st.markdown("<hr>", unsafe_allow_html=True)
+
+###############################################################################
+# 📈 7. 월별 부진재고 추이 (history/ 이력 저장소)
+###############################################################################
+st.markdown('<div class="section-label">월별 부진재고 추이</div>', unsafe_allow_html=True)
+
+hist_periods = history_store.stored_periods()
+hc1, hc2 = st.columns([5, 1])
+with hc1:
+    st.caption(f"이력 {len(hist_periods)}개월 보유" + (f" ({hist_periods[0]} ~ {hist_periods[-1]})" if hist_periods else ""))
+with hc2:
+    if st.button("기존 결과로 이력 채우기", use_container_width=True):
+        written = history_store.backfill()
+        st.toast(f"{len(written)}개월 적재: {', '.join(written)}" if written else "새로 적재할 기간이 없습니다.")
+        st.rerun()
+
+if not hist_periods:
+    st.info("아직 쌓인 이력이 없습니다. 시뮬레이션을 실행하거나 '기존 결과로 이력 채우기'를 눌러 주세요.")
+else:
+    h1, h2, h3 = st.columns([3, 2, 3])
+    with h1:
+        if len(hist_periods) > 1:
+            h_start, h_end = st.select_slider("기간", options=hist_periods,
+                                              value=(hist_periods[max(0, len(hist_periods) - 12)], hist_periods[-1]))
+        else:
+            h_start = h_end = hist_periods[0]
+            st.text(f"기간: {h_start}")
+    with h2:
+        h_major = st.multiselect("대분류", options=list(history_store.categories()))
+    with h3:
+        h_mats_text = st.text_input("자재코드 (쉼표로 구분, 비우면 전체 합계)", value="", key="hist_mat_codes")
+    h_mats = [m.strip() for m in h_mats_text.split(",") if m.strip()]
+
+    trend = history_store.query(
+        materials=h_mats or None, major=h_major or None, start=h_start, end=h_end,
+        columns=["기간", "자재코드", "자재내역", "대분류", "예측부진재고", "예측부진재고금액"],
+    )
+    if trend.empty:
+        st.warning("조건에 맞는 이력이 없습니다.")
+    else:
+        # 자재코드를 지정하면 자재별 선, 아니면 대분류별(선택 시) 또는 전체 합계
+        series_col = "자재코드" if h_mats else ("대분류" if h_major else None)
+        if series_col:
+            pivot = trend.pivot_table(index="기간", columns=series_col, values="예측부진재고금액", aggfunc="sum")
+        else:
+            pivot = trend.groupby("기간")[["예측부진재고금액"]].sum()
+        st.line_chart(pivot)
+
+        disp_trend = trend.groupby(["기간"] + ([series_col] if series_col else []), as_index=False).agg(
+            예측부진재고=("예측부진재고", "sum"), 예측부진재고금액=("예측부진재고금액", "sum"),
+            부진자재수=("예측부진재고", lambda s: int((s > 0).sum())),
+        )
+        for col in ["예측부진재고", "예측부진재고금액"]:
+            disp_trend[col] = disp_trend[col].map(lambda x: f"{x:,.0f}")
+        st.dataframe(disp_trend, use_container_width=True, height=300)
+
+st.markdown("<hr>", unsafe_allow_html=True)
+
+###############################################################################
+# 📦 8. 데이터 현황 (Footer)
 ###############################################################################
 with st.expander("데이터 현황"):
     current_files = st.session_state["dfs"].get(target_year, {}).get(target_month, {})
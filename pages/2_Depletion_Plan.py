@@ -2,6 +2,8 @@ import streamlit as st
 import pandas as pd
 import os
 
+import period_store
+
 st.set_page_config(page_title="재고 소진계획", layout="wide")
 
 ###############################################################################
@@ -226,16 +228,15 @@ if not target_year or not target_month:
         target_month = st.selectbox("월", [f"{m}월" for m in range(1, 13)],
                                     index=_cm - 1, key="_dp_month")
 
-target_dir = st.session_state.get("plan_target_dir") or os.path.join("data", target_year, target_month)
+target_period = st.session_state.get("plan_target_period") or (target_year, target_month)
 ref_label  = f"{target_year} {target_month}"
 
 major_df = st.session_state.get("major_management_df")
 if major_df is None or major_df.empty:
-    _csv_path = os.path.join(target_dir, "major_management_inventory.csv")
-    if os.path.exists(_csv_path):
+    if period_store.exists(target_period, "major_management_inventory"):
         try:
-            major_df = pd.read_csv(_csv_path, encoding="utf-8-sig")
-            st.info(f"저장된 중점관리 데이터를 불러왔습니다.  ({_csv_path})")
+            major_df = period_store.load(target_period, "major_management_inventory")
+            st.info(f"저장된 중점관리 데이터를 불러왔습니다.  ({period_store.period_dir(target_period)})")
         except Exception as _e:
             st.error(f"CSV 로드 오류: {_e}")
             major_df = None
@@ -335,11 +336,11 @@ st.markdown("<hr>", unsafe_allow_html=True)
 ###############################################################################
 # 기존 소진계획 불러오기
 ###############################################################################
-plan_csv_path = os.path.join(target_dir, "소진계획.csv")
+plan_csv_path = period_store.artifact_path(target_period, "depletion_plan", "csv")
 existing_plan = {}
-if os.path.exists(plan_csv_path):
+if period_store.exists(target_period, "depletion_plan"):
     try:
-        existing_df = pd.read_csv(plan_csv_path, encoding="utf-8-sig")
+        existing_df = period_store.load(target_period, "depletion_plan")
         for _, erow in existing_df.iterrows():
             batch_key = str(erow["배치"]) if "배치" in existing_df.columns else ""
             existing_plan[(str(erow["자재코드"]), batch_key)] = erow
@@ -596,8 +597,7 @@ with col_save:
             save_rows.append(entry)
 
         plan_df = pd.DataFrame(save_rows)
-        os.makedirs(target_dir, exist_ok=True)
-        plan_df.to_csv(plan_csv_path, index=False, encoding="utf-8-sig")
+        period_store.save(target_period, "depletion_plan", plan_df)
         st.success(f"저장 완료  →  {plan_csv_path}")
 
         csv_bytes = plan_df.to_csv(index=False, encoding="utf-8-sig").encode("utf-8-sig")
@@ -5,7 +5,8 @@ import plotly.express as px
 import plotly.graph_objects as go
 import os
 from datetime import datetime
-from inventory_utils2 import stock_out
+import period_store
+from stockout import load_stockout
 
 st.set_page_config(page_title="Stockout Analysis", layout="wide")
 
@@ -163,41 +164,21 @@ with c2:
         index=_cm - 1)
 
 # ── 데이터 로드 & 분석 ────────────────────────────────────────────────────────
-inv_path = os.path.join("data", selected_year, selected_month, "inventory.csv")
+period = (selected_year, selected_month)
+inv_path = period_store.artifact_path(period, "inventory", "csv")
 
-if not os.path.exists(inv_path):
+if not period_store.exists(period, "inventory"):
     st.warning(f"`{inv_path}` 파일이 없습니다. Data Upload 페이지에서 먼저 업로드해 주세요.")
     st.stop()
 
+# 자재코드별 재고일수/현황 (inventory가 바뀌지 않았으면 저장된 stockout.parquet 재사용)
 try:
-    inv_df = pd.read_csv(inv_path, encoding="utf-8-sig")
+    agg_df = load_stockout(period)
+except ValueError as e:
+    st.error(f"필요한 컬럼 없음: {e}"); st.stop()
 except Exception as e:
     st.error(f"inventory.csv 로드 오류: {e}"); st.stop()
 
-required_cols = {"자재코드", "자재내역", "3평판", "기말수량"}
-missing = required_cols - set(inv_df.columns)
-if missing:
-    st.error(f"필요한 컬럼 없음: {missing}"); st.stop()
-
-try:
-    stockout_df = stock_out(inv_df)
-except Exception as e:
-    st.error(f"stock_out 오류: {e}"); st.stop()
-
-stockout_df["기말수량"] = pd.to_numeric(stockout_df["기말수량"], errors="coerce").fillna(0)
-stockout_df["3평판"]   = pd.to_numeric(stockout_df["3평판"],   errors="coerce").fillna(0)
-
-agg_df = (
-    stockout_df.groupby("자재코드", as_index=False)
-    .agg(자재내역=("자재내역", "first"),
-         기말수량=("기말수량", "sum"),
-         판매평균=("3평판",   "first"))
-)
-agg_df["재고일수"] = agg_df.apply(
-    lambda r: r["기말수량"] / (r["판매평균"] / 30.0) if r["판매평균"] > 0 else 999.0, axis=1)
-agg_df["현황"] = agg_df["재고일수"].apply(
-    lambda x: "위험" if x < 30 else ("주의" if x < 60 else "정상"))
-
 n_danger  = int((agg_df["현황"] == "위험").sum())
 n_warning = int((agg_df["현황"] == "주의").sum())
 n_ok      = int((agg_df["현황"] == "정상").sum())
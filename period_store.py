@@ -0,0 +1,221 @@
+"""
+data/<연도>/<월>/ 기간별 산출물 저장소
+
+    from period_store import load, save
+    save(("2026년", "1월"), "inventory", final_df)
+    inv = load(("2026년", "1월"), "inventory", columns=["자재코드", "자재내역", "3평판", "기말수량"])
+    period_manifest(("2026년", "1월"))   # {"inventory": {"rows", "size", "schema_hash", "written_at", ...}, ...}
+
+- 산출물마다 타입이 보존되는 Parquet(<이름>.parquet) + 사용자용 CSV(<이름>.csv, UTF-8-SIG) 함께 저장
+- load는 Parquet에서 필요한 컬럼만 읽음 (columns)
+- Parquet이 없거나(예전 결과) CSV가 더 최근에 수정됐으면(직접 고친 경우) CSV를 읽음
+- 저장할 때마다 data/<연도>/<월>/manifest.json 에 산출물별 행 수/크기/스키마 해시/저장 시각 기록
+- 숫자와 빈칸("")이 섞인 표시용 컬럼은 Parquet에 CSV로 읽을 때와 같은 값(float, 빈칸 = 결측)으로 저장
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq_
+
+from sim_schema import DETAIL_CSV_DTYPES
+
+BASE_DIR = Path(__file__).resolve().parent
+DATA_ROOT = BASE_DIR / "data"
+MANIFEST_NAME = "manifest.json"
+
+# 산출물 이름 → 파일명(확장자 제외), CSV로 읽을 때의 read_csv 옵션
+ARTIFACTS = {
+    "inventory": {"file": "inventory", "csv": {}},
+    "simulation": {"file": "simulation", "csv": {"dtype": DETAIL_CSV_DTYPES, "float_precision": "round_trip"}},
+    "forecasted_inventory": {"file": "forecasted_inventory", "csv": {"float_precision": "round_trip"}},
+    "sim_fingerprint": {"file": "sim_fingerprint", "csv": {"dtype": {"fingerprint": str}}},
+    "major_management_inventory": {"file": "major_management_inventory", "csv": {}},
+    "depletion_plan": {"file": "소진계획", "csv": {}},
+}
+
+
+def period_dir(period) -> Path:
+    """(연도, 월) → data/<연도>/<월>"""
+    year, month = period
+    return DATA_ROOT / year / month
+
+
+def artifact_path(period, artifact: str, fmt: str = "parquet") -> Path:
+    return period_dir(period) / f"{ARTIFACTS[artifact]['file']}.{fmt}"
+
+
+def source_file(period, artifact: str):
+    """읽을 파일 (Parquet 우선, CSV가 더 새로우면 CSV), 없으면 None"""
+    pq, csv = artifact_path(period, artifact), artifact_path(period, artifact, "csv")
+    if pq.exists():
+        if csv.exists() and csv.stat().st_mtime > pq.stat().st_mtime:
+            return csv
+        return pq
+    return csv if csv.exists() else None
+
+
+def source_stamp(period, artifact: str):
+    """읽을 파일의 (이름, 크기, mtime) — 파생 결과(KPI 스냅샷, 품절 현황) 캐시 무효화용, 없으면 None"""
+    src = source_file(period, artifact)
+    if src is None:
+        return None
+    st_ = src.stat()
+    return {"file": src.name, "size": st_.st_size, "mtime": st_.st_mtime}
+
+
+def exists(period, artifact: str) -> bool:
+    return source_file(period, artifact) is not None
+
+
+def save(period, artifact: str, df: pd.DataFrame, csv: bool = True, **csv_kwargs) -> Path:
+    """
+    산출물 저장: CSV(사용자용) → Parquet 순서로 써서 Parquet이 항상 더 최근
+    - csv_kwargs: to_csv 추가 옵션 (예: date_format)
+    """
+    out_dir = period_dir(period)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if csv:
+        df.to_csv(artifact_path(period, artifact, "csv"), index=False, encoding="utf-8-sig", **csv_kwargs)
+    pq = artifact_path(period, artifact)
+    tmp = pq.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        df.to_parquet(tmp, index=False)
+    except pa.ArrowException:
+        _arrow_compatible(df).to_parquet(tmp, index=False)
+    os.replace(tmp, pq)
+    _record(period, artifact, _manifest_entry(period, artifact, len(df), _schema(df)))
+    return pq
+
+
+def _arrow_compatible(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Arrow로 못 바꾸는 혼합 object 컬럼만 보정 (CSV로 다시 읽었을 때와 같은 값)
+    - 빈칸 외 값이 모두 숫자 → float64 (빈칸 = NaN), 아니면 문자열 (결측 유지)
+    """
+    out = df.copy()
+    for c in df.columns[df.dtypes == object]:
+        try:
+            pa.array(df[c], from_pandas=True)
+            continue
+        except pa.ArrowException:
+            pass
+        s = df[c].mask(df[c].astype(str).str.strip() == "")
+        num = pd.to_numeric(s, errors="coerce")
+        out[c] = num if num.notna().sum() == s.notna().sum() else s.where(s.isna(), s.astype(str))
+    return out
+
+
+def load(period, artifact: str, columns=None) -> pd.DataFrame:
+    """산출물 읽기 (columns: 필요한 컬럼만), 없으면 FileNotFoundError"""
+    src = source_file(period, artifact)
+    if src is None:
+        raise FileNotFoundError(f"{artifact_path(period, artifact, 'csv')} 파일이 없습니다.")
+    if src.suffix == ".parquet":
+        return pd.read_parquet(src, columns=columns, memory_map=True)
+    return pd.read_csv(src, encoding="utf-8-sig", usecols=columns, **ARTIFACTS[artifact]["csv"])
+
+
+# -----------------------------
+# 기간 manifest
+# -----------------------------
+def _schema(df: pd.DataFrame) -> dict:
+    return {str(c): str(t) for c, t in df.dtypes.items()}
+
+
+def _manifest_entry(period, artifact: str, rows: int, schema: dict, written_at: datetime = None) -> dict:
+    """산출물 1개의 manifest 항목 (CSV/Parquet 크기와 mtime 포함 → 파일이 바뀌었는지 stat만으로 확인)"""
+    entry = {"rows": int(rows), "columns": len(schema),
+             "schema_hash": hashlib.sha256(json.dumps(schema, ensure_ascii=False).encode("utf-8")).hexdigest()[:16],
+             "written_at": (written_at or datetime.now()).isoformat(timespec="seconds")}
+    for fmt in ("csv", "parquet"):
+        path = artifact_path(period, artifact, fmt)
+        if path.exists():
+            st_ = path.stat()
+            entry[f"{fmt}_size"], entry[f"{fmt}_mtime"] = st_.st_size, st_.st_mtime
+    entry["size"] = entry.get("csv_size", entry.get("parquet_size", 0))
+    return entry
+
+
+def _read_manifest(period) -> dict:
+    path = period_dir(period) / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_manifest(period, manifest: dict):
+    path = period_dir(period) / MANIFEST_NAME
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def _record(period, artifact: str, entry: dict):
+    manifest = _read_manifest(period)
+    manifest[artifact] = entry
+    _write_manifest(period, manifest)
+
+
+def _is_current(entry: dict, period, artifact: str) -> bool:
+    """manifest 항목의 파일 크기/mtime이 지금 파일과 같은지"""
+    for fmt in ("csv", "parquet"):
+        path = artifact_path(period, artifact, fmt)
+        recorded = entry.get(f"{fmt}_mtime")
+        if not path.exists():
+            if recorded is not None:
+                return False
+            continue
+        st_ = path.stat()
+        if recorded != st_.st_mtime or entry.get(f"{fmt}_size") != st_.st_size:
+            return False
+    return True
+
+
+def _describe_file(period, artifact: str) -> dict:
+    """manifest가 없거나 낡은 산출물(예전 결과, 직접 고친 CSV)의 항목을 한 번 만들어 둠"""
+    src = source_file(period, artifact)
+    if src.suffix == ".parquet":
+        rows = pq_.read_metadata(src).num_rows
+        schema = _schema(pq_.read_schema(src).empty_table().to_pandas())
+    else:
+        schema = {str(c): "csv" for c in pd.read_csv(src, encoding="utf-8-sig", nrows=0).columns}
+        with open(src, "rb") as f:
+            rows = sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 20), b"")) - 1
+    return _manifest_entry(period, artifact, max(rows, 0), schema, datetime.fromtimestamp(src.stat().st_mtime))
+
+
+def period_manifest(period) -> dict:
+    """
+    기간의 산출물 요약 {산출물: {"rows", "size", "columns", "schema_hash", "written_at", ...}} (없는 산출물은 빠짐)
+    - 저장 시 기록된 manifest.json 을 읽고 파일 stat만 비교 (파일 내용은 읽지 않음)
+    - manifest에 없거나 파일이 바뀐 산출물만 한 번 다시 계산해서 manifest에 반영
+    """
+    manifest = _read_manifest(period)
+    out, changed = {}, False
+    for artifact in ARTIFACTS:
+        if not exists(period, artifact):
+            continue
+        entry = manifest.get(artifact)
+        if entry is None or not _is_current(entry, period, artifact):
+            entry = manifest[artifact] = _describe_file(period, artifact)
+            changed = True
+        out[artifact] = entry
+    stale = [a for a in manifest if a not in out]
+    for a in stale:
+        del manifest[a]
+    if changed or stale:
+        try:
+            _write_manifest(period, manifest)
+        except OSError:
+            pass
+    return out
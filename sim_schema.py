@@ -0,0 +1,19 @@
+"""
+FEFO 시뮬레이션 결과(detail) 컬럼/타입 정의 — 시뮬레이션(inventory_utils2)과 저장소(period_store) 공용
+
+    from sim_schema import DETAIL_COLUMNS, DETAIL_CSV_DTYPES
+    detail = pd.read_csv("simulation.csv", dtype=DETAIL_CSV_DTYPES)
+
+- pandas만 사용 (streamlit/시뮬레이션 모듈을 import하지 않는 leaf 모듈)
+"""
+import pandas as pd
+
+STOP_REASONS = ["no_sales", "risk_reached_before_start", "risk_reached", "sold_out", "stopped_with_sales", "stopped"]
+STOP_REASON_DTYPE = pd.CategoricalDtype(STOP_REASONS)
+
+# detail 날짜는 today(base_date) 기준 int32 일수 오프셋으로 보관 (-1 = 없음), 표시할 때만 날짜로 변환
+DETAIL_DAY_COLUMNS = {"risk_entry_day": "risk_entry_date", "sell_start_day": "sell_start_date", "sell_end_day": "sell_end_date"}
+DETAIL_COLUMNS = ["자재코드", "자재내역", "배치", "init_qty", "init_days", *DETAIL_DAY_COLUMNS,
+                  "qty_sold", "remaining_qty", "days_left_at_stop", "stop_reason"]
+DETAIL_CSV_DTYPES = {"init_days": "int32", "risk_entry_day": "int32", "sell_start_day": "int32",
+                     "sell_end_day": "int32", "days_left_at_stop": "int32", "stop_reason": STOP_REASON_DTYPE}
@@ -0,0 +1,269 @@
+"""
+input_data 원천 파일(xlsx/xls/csv) → 타입이 정해진 Parquet 적재(staging) 저장소
+
+    python staging.py                 # input_data 전체 폴더에서 새/변경 파일만 적재
+    python staging.py --folders 재고개요 3개월매출 --force
+    python staging.py --list          # manifest 내용 출력
+
+- 자재코드/배치 등 코드 컬럼: 정규화 문자열 ("1000940.0" → "1000940")
+- 날짜 컬럼: datetime64, 수량 컬럼: float64
+- staging/manifest.json 에 원본 해시, 행 수, 스키마 기록
+- staging/masters/ : 자재/배치 기준정보 마스터 (원본 해시 조합별로 한 번만 생성)
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from utils import load_input_file_cached, normalize_code_series
+
+BASE_DIR = Path(__file__).resolve().parent
+INPUT_DATA_DIR = BASE_DIR / "input_data"
+STAGING_DIR = BASE_DIR / "staging"
+MANIFEST_FILE = STAGING_DIR / "manifest.json"
+MASTER_DIR = STAGING_DIR / "masters"
+
+# 스키마/정규화 규칙이 바뀌면 올려서 기존 적재 파일 재생성
+STAGING_VERSION = 3
+# 마스터 생성 규칙(build_material_master/build_batch_master)이 바뀌면 올림
+MASTER_VERSION = 1
+
+# 폴더별 컬럼 타입 규칙 (이름에 "수량"이 들어간 컬럼은 공통으로 float64)
+STAGING_SCHEMAS = {
+    "재고개요": {
+        "codes": ["자재", "배치"],
+        "dates": [],
+        "floats": [],
+    },
+    "자재수불부": {
+        "codes": ["자재"],
+        "dates": [],
+        "floats": [],
+    },
+    "배치별유효기한": {
+        "codes": ["자재", "배치"],
+        "dates": ["배치생산일", "배치만료일", "최종 입고", "최종판정 일자"],
+        "floats": ["가용", "품질 검사", "예약재고", "보류 재고", "사용 제한 재고", "이전 중 재고", "반품"],
+    },
+    "3개월매출": {
+        "codes": ["자재코드", "년월"],
+        "dates": [],
+        "floats": [],
+    },
+    "대분류_소분류": {
+        "codes": ["자재"],
+        "dates": [],
+        "floats": [],
+    },
+    "품절예상조회": {
+        "codes": ["자재"],
+        "dates": ["예상출하일"],
+        "floats": ["3개월 평균출하", "전전월출하", "전월출하", "당월출하", "현재고", "가용재고", "품질재고",
+                   "재공", "이동중 재고", "회수중 재고", "보류재고", "주문가능량", "주문가능량(이동포함)"],
+    },
+}
+
+
+# -----------------------------
+# 타입 정규화
+# -----------------------------
+def apply_staging_schema(df: pd.DataFrame, folder: str) -> pd.DataFrame:
+    """폴더별 규칙으로 코드/날짜/수량 컬럼 타입 고정 (없는 컬럼은 건너뜀)"""
+    schema = STAGING_SCHEMAS.get(folder, {"codes": [], "dates": [], "floats": []})
+    df = df.copy()
+    for c in schema["codes"]:
+        if c in df.columns:
+            df[c] = normalize_code_series(df[c])
+    for c in schema["dates"]:
+        if c in df.columns:
+            df[c] = pd.to_datetime(df[c], errors="coerce")
+    qty_cols = [c for c in df.columns if "수량" in str(c) and c not in schema["codes"]]
+    for c in dict.fromkeys(qty_cols + schema["floats"]):
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], errors="coerce").astype("float64")
+    return df
+
+
+# -----------------------------
+# manifest
+# -----------------------------
+def load_manifest() -> dict:
+    if not MANIFEST_FILE.exists():
+        return {}
+    with open(MANIFEST_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_manifest(manifest: dict):
+    STAGING_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = MANIFEST_FILE.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, MANIFEST_FILE)
+
+
+def _source_key(source: Path) -> str:
+    return f"{source.parent.name}/{source.name}"
+
+
+# -----------------------------
+# 적재
+# -----------------------------
+def latest_input_file(folder: str, base_dir=INPUT_DATA_DIR):
+    """폴더에서 가장 최근 수정된 Excel/CSV 파일 경로 반환"""
+    files = []
+    for pat in ("*.xlsx", "*.xls", "*.csv"):
+        files.extend(glob.glob(os.path.join(base_dir, folder, pat)))
+    return max(files, key=os.path.getmtime) if files else None
+
+
+def _is_fresh(entry: dict, source: Path) -> bool:
+    """manifest 항목이 현재 원본(크기/mtime)과 버전에 맞고 적재 파일이 있는지"""
+    if not entry or entry.get("version") != STAGING_VERSION:
+        return False
+    st_ = source.stat()
+    return (entry.get("source_size") == st_.st_size and entry.get("source_mtime") == st_.st_mtime
+            and (STAGING_DIR / entry["staged"]).exists())
+
+
+def stage_file(source, folder: str = None, force: bool = False) -> dict:
+    """
+    원본 파일 1개를 Parquet으로 적재하고 manifest 항목 반환
+    - 크기/mtime이 manifest와 같으면 그대로 사용, 다르면 내용 해시(SHA-256)로 적재 파일명 결정
+    """
+    source = Path(source).resolve()
+    folder = folder or source.parent.name
+    manifest = load_manifest()
+    key = _source_key(source)
+    if not force and _is_fresh(manifest.get(key), source):
+        return manifest[key]
+
+    file_bytes = source.read_bytes()
+    digest = hashlib.sha256(file_bytes).hexdigest()
+    df = apply_staging_schema(load_input_file_cached(file_bytes, source.name), folder)
+
+    staged = Path(folder) / f"{digest[:16]}_v{STAGING_VERSION}.parquet"
+    out = STAGING_DIR / staged
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_suffix(f".{os.getpid()}.tmp")
+    df.to_parquet(tmp)
+    os.replace(tmp, out)
+
+    st_ = source.stat()
+    entry = {
+        "folder": folder,
+        "source": source.name,
+        "source_sha256": digest,
+        "source_size": st_.st_size,
+        "source_mtime": st_.st_mtime,
+        "staged": staged.as_posix(),
+        "rows": int(len(df)),
+        "schema": {str(c): str(t) for c, t in df.dtypes.items()},
+        "memory_report": df.attrs.get("memory_report"),
+        "version": STAGING_VERSION,
+        "staged_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    manifest = load_manifest()
+    manifest[key] = entry
+    _save_manifest(manifest)
+    return entry
+
+
+def stage_all(folders=None, base_dir=INPUT_DATA_DIR, force: bool = False) -> pd.DataFrame:
+    """input_data 하위 폴더의 모든 원본 파일 중 새/변경 파일만 적재, 파일별 결과 표 반환"""
+    folders = folders or list(STAGING_SCHEMAS)
+    rows = []
+    for folder in folders:
+        for pat in ("*.xlsx", "*.xls", "*.csv"):
+            for path in sorted(glob.glob(os.path.join(base_dir, folder, pat))):
+                source = Path(path).resolve()
+                try:
+                    fresh = not force and _is_fresh(load_manifest().get(_source_key(source)), source)
+                    entry = stage_file(source, folder, force=force)
+                    status = "변경 없음" if fresh else "적재"
+                    saved = (entry.get("memory_report") or {}).get("saved")
+                    rows.append({"폴더": folder, "파일": entry["source"], "상태": status, "행 수": entry["rows"],
+                                 "메모리 절감(MB)": None if saved is None else round(saved / 2**20, 2),
+                                 "적재 파일": entry["staged"]})
+                except Exception as e:
+                    rows.append({"폴더": folder, "파일": os.path.basename(path), "상태": f"실패: {e}",
+                                 "행 수": None, "메모리 절감(MB)": None, "적재 파일": None})
+    return pd.DataFrame(rows, columns=["폴더", "파일", "상태", "행 수", "메모리 절감(MB)", "적재 파일"])
+
+
+def load_staged(folder: str, source=None, columns=None) -> pd.DataFrame:
+    """
+    폴더의 최신 원본(또는 지정한 source)에 해당하는 적재 Parquet을 읽는다
+    - 아직 적재되지 않았거나 원본이 바뀌었으면 먼저 적재
+    """
+    source = source or latest_input_file(folder)
+    if source is None:
+        raise FileNotFoundError(f"{INPUT_DATA_DIR / folder} 에 원본 파일이 없습니다.")
+    entry = stage_file(source, folder)
+    return _read_staged(entry, columns)
+
+
+def _read_staged(entry: dict, columns=None) -> pd.DataFrame:
+    return pd.read_parquet(STAGING_DIR / entry["staged"], columns=columns, memory_map=True)
+
+
+# -----------------------------
+# 기준정보 마스터 캐시
+# -----------------------------
+def _cached_master(name: str, entries: list, build) -> pd.DataFrame:
+    """원본 해시 조합 + 버전으로 마스터 Parquet 캐시, 없을 때만 build() 실행"""
+    key = "_".join(e["source_sha256"][:12] for e in entries)
+    path = MASTER_DIR / f"{name}_{key}_v{STAGING_VERSION}.{MASTER_VERSION}.parquet"
+    if path.exists():
+        return pd.read_parquet(path, memory_map=True)
+    df = build()
+    MASTER_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    df.to_parquet(tmp)
+    os.replace(tmp, path)
+    return df
+
+
+def load_masters(cost_source=None, cls_source=None, expiration_source=None) -> dict:
+    """
+    aging_inventory_preprocess 에 넘길 기준정보 마스터
+    - material_master: 자재수불부 + 대분류_소분류 → 자재코드별 단가/대분류/소분류
+    - batch_master: 배치별유효기한 → (자재코드, 배치)별 유효기한
+    - 원본 파일이 바뀌지 않았으면 staging/masters/ 의 Parquet을 그대로 읽음
+    """
+    from inventory_utils2 import build_batch_master, build_material_master
+
+    entries = {}
+    for folder, source in (("자재수불부", cost_source), ("대분류_소분류", cls_source), ("배치별유효기한", expiration_source)):
+        source = source or latest_input_file(folder)
+        if source is None:
+            raise FileNotFoundError(f"{INPUT_DATA_DIR / folder} 에 원본 파일이 없습니다.")
+        entries[folder] = stage_file(source, folder)
+
+    cost_e, cls_e, exp_e = entries["자재수불부"], entries["대분류_소분류"], entries["배치별유효기한"]
+    material = _cached_master("material", [cost_e, cls_e], lambda: build_material_master(
+        _read_staged(cost_e, ["자재", "기말(수량)", "기말(금액)합계"]), _read_staged(cls_e, ["자재", "대분류", "소분류"])))
+    batch = _cached_master("batch", [exp_e], lambda: build_batch_master(
+        _read_staged(exp_e, ["자재", "배치", "배치만료일"])))
+    return {"material_master": material, "batch_master": batch}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="input_data 원본 → Parquet 적재")
+    parser.add_argument("--folders", nargs="+", default=None, help=f"기본: {' '.join(STAGING_SCHEMAS)}")
+    parser.add_argument("--force", action="store_true", help="변경 여부와 관계없이 다시 적재")
+    parser.add_argument("--list", action="store_true", help="manifest만 출력")
+    args = parser.parse_args()
+
+    if args.list:
+        manifest = load_manifest()
+        for key, e in sorted(manifest.items()):
+            print(f"{key:<50} {e['rows']:>8,}행  {e['source_sha256'][:12]}  → {e['staged']}  ({e['staged_at']})")
+    else:
+        with pd.option_context("display.max_colwidth", 60, "display.width", 200):
+            print(stage_all(args.folders, force=args.force).to_string(index=False))
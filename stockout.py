@@ -0,0 +1,99 @@
+"""
+자재코드별 재고일수/품절 현황 — app.py, pages/3_Stockout.py, mail/mail2.py 공용
+
+    from stockout import load_stockout
+    so = load_stockout(("2026년", "1월"))   # 자재코드, 자재내역, 기말수량, 판매평균, 재고일수, 현황
+
+- 재고일수 = 자재코드별 기말수량 합 / (3평판/30), 3평판이 0 이하면 999일
+- 현황 = buckets.STOCKOUT_GRADES (30일 미만 위험, 60일 미만 주의, 나머지 정상)
+- 결과는 data/<연도>/<월>/stockout.parquet 에 inventory 파일 stamp와 함께 저장
+  → inventory가 다시 저장되거나 CSV를 직접 고치기 전까지는 페이지/세션/메일 모두 저장본을 그대로 읽음
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq_
+
+import period_store
+from buckets import STOCKOUT_GRADES, bucketize_series
+
+# 재고일수 계산 규칙이 바뀌면 올려서 저장본 재계산
+STOCKOUT_VERSION = 2
+STOCKOUT_FILE = "stockout.parquet"
+STOCKOUT_COLUMNS = ["자재코드", "자재내역", "3평판", "기말수량"]
+
+# 프로세스 안 메모: 기간 → (stamp, 결과)
+_memo = {}
+
+
+def stockout_table(inv_df: pd.DataFrame) -> pd.DataFrame:
+    """inventory(배치 단위) → 자재코드별 기말수량 합, 판매평균(3평판), 재고일수, 현황 (자재내역은 있으면 포함)"""
+    frame = pd.DataFrame({"자재코드": inv_df["자재코드"]})
+    named = {}
+    if "자재내역" in inv_df.columns:
+        frame["자재내역"] = inv_df["자재내역"]
+        named["자재내역"] = ("자재내역", "first")
+    frame["기말수량"] = pd.to_numeric(inv_df["기말수량"], errors="coerce").fillna(0)
+    frame["판매평균"] = pd.to_numeric(inv_df["3평판"], errors="coerce").fillna(0)
+
+    agg = frame.groupby("자재코드", as_index=False).agg(
+        **named, 기말수량=("기말수량", "sum"), 판매평균=("판매평균", "first"))
+    avg = agg["판매평균"].to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        agg["재고일수"] = np.where(avg > 0, agg["기말수량"].to_numpy() / (avg / 30.0), 999.0)
+    agg["현황"] = bucketize_series(agg["재고일수"], STOCKOUT_GRADES)
+    return agg
+
+
+def _stamp_key(stamp: dict) -> str:
+    return json.dumps({"version": STOCKOUT_VERSION, **stamp}, sort_keys=True)
+
+
+def _read_cached(path, key: str):
+    """저장본의 stamp가 같으면 DataFrame, 아니면 None"""
+    if not path.exists():
+        return None
+    try:
+        table = pq_.read_table(path, memory_map=True)
+    except (OSError, pa.ArrowException):
+        return None
+    if (table.schema.metadata or {}).get(b"stockout_source", b"").decode("utf-8") != key:
+        return None
+    return table.to_pandas()
+
+
+def _write_cached(path, df: pd.DataFrame, key: str):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), b"stockout_source": key.encode("utf-8")})
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    pq_.write_table(table, tmp)
+    os.replace(tmp, path)
+
+
+def load_stockout(period) -> pd.DataFrame:
+    """
+    기간의 자재코드별 품절 현황 (stockout_table 결과)
+    - inventory가 없으면 FileNotFoundError, 필요한 컬럼이 없으면 ValueError
+    - (기간, inventory stamp)가 같으면 메모 → stockout.parquet 순서로 재사용, 다르면 한 번 계산해서 저장
+    """
+    stamp = period_store.source_stamp(period, "inventory")
+    if stamp is None:
+        raise FileNotFoundError(f"{period_store.artifact_path(period, 'inventory', 'csv')} 파일이 없습니다.")
+    key = _stamp_key(stamp)
+    hit = _memo.get(tuple(period))
+    if hit is not None and hit[0] == key:
+        return hit[1].copy()
+
+    path = period_store.period_dir(period) / STOCKOUT_FILE
+    df = _read_cached(path, key)
+    if df is None:
+        df = stockout_table(period_store.load(period, "inventory", columns=STOCKOUT_COLUMNS))
+        try:
+            _write_cached(path, df, key)
+        except OSError:
+            pass
+    _memo[tuple(period)] = (key, df)
+    return df.copy()
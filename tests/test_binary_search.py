@@ -0,0 +1,80 @@
+"""판매개선율 배치 탐색 (binary_search) — 자재별 스칼라 이분탐색과 같은 결과인지"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from inventory_utils2 import binary_search, simulate_batches_by_product
+
+LO, HI, TOL = 1.0, 10.0, 1e-3
+
+
+def _inventory(seed: int = 0) -> pd.DataFrame:
+    """
+    자재 유형별 재고
+    - 적은 재고(판매배수 1에서 다 팔림 → lo), 많은 재고(10배로도 남음 → hi), 그 사이(구간 안에서 수렴)
+    """
+    rng = np.random.default_rng(seed)
+    rows = []
+    for m in range(30):
+        kind = m % 3
+        sales = float(rng.integers(20, 300))
+        for b in range(rng.integers(1, 4)):
+            qty = {0: sales * 0.5, 1: sales * 400, 2: sales * rng.uniform(5, 40)}[kind]
+            rows.append({"자재코드": f"M{m:03d}", "자재내역": "x", "배치": f"B{b}",
+                         "남은일": int(rng.integers(190, 900)), "기말수량": float(qty), "3평판": sales, "단가": 1.0})
+    df = pd.DataFrame(rows)
+    df.insert(0, "인덱스", np.arange(len(df)))
+    return df
+
+
+def _scalar_search(mat_df: pd.DataFrame) -> float:
+    """예전 자재별 탐색: 판매배수를 바꿔 python 엔진으로 잔량 합계를 다시 계산"""
+    def remaining(m):
+        df_in = mat_df.copy()
+        df_in["3평판"] = df_in["3평판"] * m
+        return simulate_batches_by_product(df_in, engine="python")[0]["remaining_qty"].sum()
+
+    if remaining(LO) <= 0:
+        return LO
+    if remaining(HI) > 0:
+        return HI
+    a, b = LO, HI
+    while b - a >= TOL:
+        mid = (a + b) / 2
+        a, b = (mid, b) if remaining(mid) > 0 else (a, mid)
+    return b
+
+
+@pytest.fixture(scope="module")
+def searched():
+    df = _inventory()
+    _, updated = simulate_batches_by_product(df)
+    updated["예측부진재고"] = 1.0   # 적은 재고 자재(lo)도 탐색 대상에 포함
+    return df, binary_search(df, updated, lo=LO, hi=HI, tol=TOL)
+
+
+def test_matches_scalar_search(searched):
+    df, res = searched
+    for mat, mat_df in df.groupby("자재코드"):
+        best = _scalar_search(mat_df)
+        row = res.loc[res["자재코드"] == mat].iloc[0]
+        assert row["권장판매량"] == pytest.approx(row["3평판"] * best, rel=0, abs=1e-9), mat
+        assert row["판매개선율"] == (f"{(HI - 1) * 100:.0f}% 이상" if best >= HI else f"{(best - 1) * 100:.0f}%")
+
+
+def test_edges_and_convergence(searched):
+    _, res = searched
+    mult = pd.to_numeric(res["권장판매량"]) / res["3평판"]
+    kind = res["자재코드"].str[1:].astype(int) % 3
+    assert (mult[kind == 0] == LO).all() and (res.loc[kind == 0, "판매개선율"] == "0%").all()
+    assert (mult[kind == 1] == HI).all() and (res.loc[kind == 1, "판매개선율"] == "900% 이상").all()
+    assert ((mult[kind == 2] > LO) & (mult[kind == 2] < HI)).sum() >= 5
+
+
+def test_materials_without_slow_stock_are_blank():
+    df = _inventory()
+    _, updated = simulate_batches_by_product(df)
+    updated["예측부진재고"] = 0.0
+    res = binary_search(df, updated)
+    assert (res["판매개선율"] == "").all() and (res["권장판매량"] == "").all()
+    assert res.attrs["search_stats"]["materials"] == 0
@@ -0,0 +1,62 @@
+"""구간 분류 (bucketize_series) — 예전 행 단위 apply와 라벨/타입이 같은지"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from buckets import AGING_BUCKETS, MONTH_BUCKETS, STOCKOUT_GRADES, bucket_dtype, bucketize_series
+from inventory_utils2 import stock_out
+
+
+def _aging_legacy(days):
+    if pd.isna(days):
+        return "유효기한 없음"
+    for edge, label in zip(AGING_BUCKETS["edges"], AGING_BUCKETS["labels"]):
+        if days <= edge:
+            return label
+    return AGING_BUCKETS["labels"][-1]
+
+
+def _month_legacy(days):
+    if pd.isna(days):
+        return "유효기한 없음"
+    for edge, label in zip(MONTH_BUCKETS["edges"], MONTH_BUCKETS["labels"]):
+        if days < edge:
+            return label
+    return MONTH_BUCKETS["labels"][-1]
+
+
+def _grade_legacy(x):
+    return "위험" if x < 30 else ("주의" if x < 60 else "정상")
+
+
+DAYS = pd.Series([np.nan, -np.inf, -1, 0, 0.5, 29, 29.9, 30, 59.99, 60, 90, 90.1, 180, 365, 548, 730, 731, np.inf])
+
+
+@pytest.mark.parametrize("table, legacy", [
+    (AGING_BUCKETS, _aging_legacy), (MONTH_BUCKETS, _month_legacy), (STOCKOUT_GRADES, _grade_legacy),
+])
+def test_matches_legacy_apply(table, legacy):
+    result = bucketize_series(DAYS, table)
+    assert result.dtype == object
+    assert result.tolist() == DAYS.apply(legacy).tolist()
+
+
+def test_int64_with_missing_and_index_kept():
+    s = pd.Series([None, 0, 91, 800], dtype="Int64", index=[10, 11, 12, 13])
+    result = bucketize_series(s, AGING_BUCKETS)
+    assert result.index.tolist() == [10, 11, 12, 13]
+    assert result.tolist() == ["유효기한 없음", "폐기확정", "6개월 미만", "24개월 이상"]
+
+
+def test_bucket_dtype_orders_labels():
+    ordered = bucketize_series(pd.Series([800, np.nan, 10]), AGING_BUCKETS).astype(bucket_dtype(AGING_BUCKETS))
+    assert ordered.sort_values().tolist() == ["3개월 미만", "24개월 이상", "유효기한 없음"]
+
+
+def test_stock_out_keeps_blank_safe_grade():
+    df = pd.DataFrame({"자재코드": ["A", "B", "C", "D"], "자재내역": ["a", "b", "c", "d"],
+                       "3평판": [10.0, 10.0, 10.0, 0.0], "기말수량": [100.0, 400.0, 900.0, 0.0]})
+    out = stock_out(df)
+    # 재고일수 10 → 위험, 40 → 주의, 90 → 빈칸, 0/0(NaN) → 빈칸 (예전 lambda와 동일)
+    assert out["현황"].tolist() == ["위험", "주의", "", ""]
+    assert out["현황"].dtype == object
@@ -0,0 +1,43 @@
+"""CSV 인코딩 판정 (sniff_csv_encoding) 과 load_csv_any_encoding 재시도"""
+import codecs
+
+import pandas as pd
+import pytest
+
+from utils import load_csv_any_encoding, sniff_csv_encoding
+
+TEXT = "자재코드,자재내역,기말수량\n9300001,크림,10\n9300002,똠양꿍 토너,20\n"
+
+
+@pytest.mark.parametrize("data, expected", [
+    (codecs.BOM_UTF8 + TEXT.encode("utf-8"), "utf-8-sig"),
+    (TEXT.encode("utf-8"), "utf-8-sig"),
+    (TEXT.encode("cp949"), "cp949"),
+    (b"a,b\n1,2\n", "utf-8-sig"),
+    (b"\xff\xfe\xff,\x80\n", None),
+])
+def test_sniff(data, expected):
+    assert sniff_csv_encoding(data) == expected
+
+
+def test_multibyte_char_cut_at_prefix_end():
+    data = TEXT.encode("utf-8")
+    cut = data.index("크".encode("utf-8")) + 1     # 3바이트 글자의 첫 바이트에서 자름
+    assert sniff_csv_encoding(data, prefix_bytes=cut) == "utf-8-sig"
+
+
+def test_cp949_after_prefix_is_retried():
+    # 앞 256KB는 ASCII, cp949 한글은 그 뒤에만 → 판정은 utf-8-sig, 전체 로딩에서 깨지면 cp949로 재시도
+    ascii_head = b"a,b\n" + b"1,2\n" * 70_000
+    data = ascii_head + "3,가\n".encode("cp949")
+    assert sniff_csv_encoding(data) == "utf-8-sig"
+    df = load_csv_any_encoding(data)
+    assert len(df) == 70_001
+    assert df.iloc[-1].tolist() == [3, "가"]
+
+
+@pytest.mark.parametrize("encoding", ["utf-8-sig", "utf-8", "cp949"])
+def test_load_any_encoding(encoding):
+    df = load_csv_any_encoding(TEXT.encode(encoding))
+    expected = pd.DataFrame({"자재코드": [9300001, 9300002], "자재내역": ["크림", "똠양꿍 토너"], "기말수량": [10, 20]})
+    pd.testing.assert_frame_equal(df, expected)
@@ -0,0 +1,79 @@
+"""엑셀 헤더 행 자동 탐지 — _score_header_rows 점수와 read_excel_with_smart_header 결과"""
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import HEADER_KEYWORDS, _score_header_rows, read_excel_with_smart_header
+
+
+def _xlsx(rows) -> bytes:
+    buf = io.BytesIO()
+    pd.DataFrame(rows).to_excel(buf, header=False, index=False)
+    return buf.getvalue()
+
+
+def _report_rows(n: int = 50):
+    """SAP 보고서형: 제목/조회조건/빈 줄 3행 아래에 헤더, 그 아래 데이터"""
+    rows = [
+        ["재고 현황 보고서", None, None, None],
+        ["조회기간: 2026.01.01 ~ 2026.01.31", None, None, None],
+        [None, None, None, None],
+        ["자재코드", "자재내역", "기말수량", "기말금액"],
+    ]
+    rows += [[9300000 + i, f"품목{i}", float(i * 10), float(i * 1500)] for i in range(n)]
+    return rows
+
+
+def _score_loop(raw: pd.DataFrame) -> np.ndarray:
+    """예전 행 단위 루프와 같은 점수 (벡터화 결과 비교용)"""
+    out = []
+    for row in raw.itertuples(index=False):
+        cells = ["" if pd.isna(x) else str(x).strip() for x in row]
+        non_empty = [c for c in cells if c != ""]
+        if len(non_empty) < 2:
+            out.append(-np.inf)
+            continue
+
+        def _num(c):
+            try:
+                float(c.replace(",", ""))
+                return True
+            except ValueError:
+                return False
+
+        score = len(non_empty) / len(cells) * 3.0
+        score += (1 - sum(map(_num, non_empty)) / len(non_empty)) * 4.0
+        score += len(set(non_empty)) / len(non_empty) * 2.0
+        score += max(0, (20 - np.mean([len(c) for c in non_empty])) / 20) * 1.0
+        score += sum(any(k in c for k in HEADER_KEYWORDS) for c in non_empty) * 2.5
+        score += 1.5 if any("자재" in c or "코드" in c for c in non_empty) else 0.0
+        out.append(score)
+    return np.array(out)
+
+
+def test_score_matches_row_loop():
+    raw = pd.DataFrame(_report_rows(30))
+    np.testing.assert_allclose(_score_header_rows(raw), _score_loop(raw), rtol=0, atol=1e-12)
+
+
+def test_header_row_wins_over_title_rows():
+    scores = _score_header_rows(pd.DataFrame(_report_rows()))
+    assert int(np.argmax(scores)) == 3
+    assert np.isneginf(scores[:3]).all()   # 채워진 셀이 2개 미만인 제목/빈 줄은 후보 제외
+
+
+def test_read_excel_with_smart_header():
+    data = _xlsx(_report_rows())
+    df = read_excel_with_smart_header(data)
+    assert list(df.columns) == ["자재코드", "자재내역", "기말수량", "기말금액"]
+    assert len(df) == 50
+    expected = pd.read_excel(io.BytesIO(data), header=3)
+    pd.testing.assert_frame_equal(df.reset_index(drop=True), expected)
+
+
+def test_header_beyond_scan_rows_raises():
+    rows = [["제목만 있는 줄", None]] * 5 + [["자재코드", "기말수량"], [1, 2.0]]
+    with pytest.raises(ValueError):
+        read_excel_with_smart_header(_xlsx(rows), scan_rows=5)
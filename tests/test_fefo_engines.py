@@ -0,0 +1,99 @@
+"""
+FEFO 시뮬레이션 — python 루프 엔진이 baseline 결과를 그대로 내는지, numpy 엔진(_fefo_kernel)/병렬 경로가 python 엔진과 같은지
+
+fixtures/fefo_baseline_2026_01.csv: baseline 커밋의 simulate_batches_by_product / binary_search로
+data/2026년/1월/inventory.csv를 계산한 결과 (행 = inventory.csv 행 순서)
+"""
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from inventory_utils2 import binary_search, simulate_batches_by_product
+
+TESTS_DIR = Path(__file__).resolve().parent
+INVENTORY_CSV = TESTS_DIR.parent / "data" / "2026년" / "1월" / "inventory.csv"
+BASELINE_CSV = TESTS_DIR / "fixtures" / "fefo_baseline_2026_01.csv"
+TODAY = date(2026, 1, 31)
+
+# (risk_days, step_days)
+COMBOS = [(180, 30), (90, 30), (365, 7), (120, 15), (30, 1)]
+
+
+@lru_cache(maxsize=None)
+def _inventory() -> pd.DataFrame:
+    return pd.read_csv(INVENTORY_CSV, encoding="utf-8-sig")
+
+
+@lru_cache(maxsize=None)
+def _baseline() -> pd.DataFrame:
+    # 판매개선율/권장판매량은 빈칸("")이 있는 문자열 그대로, 숫자는 저장한 값 그대로 (round_trip)
+    return pd.read_csv(BASELINE_CSV, encoding="utf-8-sig", float_precision="round_trip",
+                       keep_default_na=False, dtype={"판매개선율": str, "권장판매량": str})
+
+
+@lru_cache(maxsize=None)
+def _python_result(risk_days: int, step_days: int):
+    return simulate_batches_by_product(_inventory(), risk_days, step_days, TODAY, engine="python")
+
+
+def _sorted_detail(detail: pd.DataFrame) -> pd.DataFrame:
+    """행 순서와 무관하게 비교 (같은 자재에 같은 배치가 여러 행일 수 있어 전체 컬럼으로 정렬)"""
+    return detail.sort_values(list(detail.columns), kind="stable").reset_index(drop=True)
+
+
+def _assert_same(result, expected):
+    detail, updated = result
+    exp_detail, exp_updated = expected
+    pd.testing.assert_frame_equal(_sorted_detail(detail), _sorted_detail(exp_detail))
+    pd.testing.assert_frame_equal(updated.sort_index(), exp_updated.sort_index())
+
+
+def _as_float(values) -> np.ndarray:
+    return np.array([float(v) if v != "" else np.nan for v in values])
+
+
+@pytest.mark.parametrize("risk_days,step_days", COMBOS)
+def test_python_engine_matches_baseline(risk_days, step_days):
+    _, updated = _python_result(risk_days, step_days)
+    expected = _baseline()[f"예측부진재고_{risk_days}_{step_days}"].to_numpy()
+    np.testing.assert_array_equal(updated["예측부진재고"].to_numpy(), expected)
+
+
+@pytest.mark.parametrize("risk_days,step_days", COMBOS)
+def test_numpy_engine_matches_python(risk_days, step_days):
+    result = simulate_batches_by_product(_inventory(), risk_days, step_days, TODAY, engine="numpy")
+    _assert_same(result, _python_result(risk_days, step_days))
+
+
+@pytest.mark.parametrize("engine,workers", [("numpy", 3), ("python", 2)])
+@pytest.mark.parametrize("risk_days,step_days", COMBOS[:2])
+def test_parallel_matches_serial(engine, workers, risk_days, step_days):
+    result = simulate_batches_by_product(_inventory(), risk_days, step_days, TODAY, engine=engine, workers=workers)
+    _assert_same(result, _python_result(risk_days, step_days))
+
+
+def test_sales_multiplier_matches_baseline():
+    _, updated = simulate_batches_by_product(_inventory(), today=TODAY)
+    res = binary_search(_inventory(), updated, today=TODAY)
+    base = _baseline()
+    assert (res["판매개선율"].astype(str).to_numpy() == base["판매개선율"].to_numpy()).all()
+    np.testing.assert_array_equal(_as_float(res["권장판매량"].astype(str)), _as_float(base["권장판매량"]))
+
+
+def test_tied_batches_match_python_engine():
+    # 남은일 동률이 많은 큰 자재 그룹 (그룹당 수백 행) — numpy 엔진도 python 엔진과 같은 순서로 소진
+    rng = np.random.default_rng(0)
+    n = 3_000
+    mats = rng.integers(0, 8, n).astype(str)
+    df = pd.DataFrame({
+        "인덱스": np.arange(n), "자재코드": mats, "자재내역": "x", "배치": [f"B{i}" for i in range(n)],
+        "남은일": rng.integers(0, 40, n) * 10, "기말수량": rng.integers(1, 500, n).astype(float),
+        "3평판": pd.Series(mats).map(dict(zip(map(str, range(8)), rng.integers(0, 300, 8).astype(float)))),
+        "단가": 1.0,
+    })
+    expected = simulate_batches_by_product(df, 180, 30, TODAY, engine="python")
+    _assert_same(simulate_batches_by_product(df, 180, 30, TODAY, engine="numpy"), expected)
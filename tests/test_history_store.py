@@ -0,0 +1,70 @@
+"""월별 이력 저장소 — 기간 키 검증, 같은 달 교체, 기간/자재 조건 조회"""
+import pandas as pd
+import pytest
+
+import history_store
+from history_store import append_period, period_key, query, stored_periods
+
+
+@pytest.fixture(autouse=True)
+def history_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(history_store, "HISTORY_DIR", tmp_path / "history")
+    return tmp_path / "history"
+
+
+def _forecast(codes, qty: float = 10.0) -> pd.DataFrame:
+    """배치 단위 forecasted_inventory (자재당 배치 2개)"""
+    codes = [c for c in codes for _ in range(2)]
+    return pd.DataFrame({
+        "자재코드": codes, "자재내역": [f"품목{c}" for c in codes], "대분류": "A", "소분류": "a",
+        "기말수량": qty, "기말금액": qty * 100, "3평판": 5.0, "예측부진재고": qty / 2, "예측부진재고금액": qty * 50,
+    })
+
+
+@pytest.mark.parametrize("period, key", [
+    (("2026년", "1월"), "2026-01"), (["2025년", "12월"], "2025-12"), ("2026-01", "2026-01"), ("2026.3", "2026-03"),
+])
+def test_period_key(period, key):
+    assert period_key(period) == key
+
+
+@pytest.mark.parametrize("period", ["2026", "", ("2026년", "월"), ("2026년",), "2026-13", 2026, None])
+def test_period_key_rejects_malformed(period):
+    with pytest.raises(ValueError, match="기간 형식"):
+        period_key(period)
+
+
+def test_same_month_is_replaced():
+    append_period(("2026년", "1월"), _forecast(["9300001", "9300002"], qty=10))
+    append_period(("2026년", "1월"), _forecast(["9300001"], qty=30))
+
+    assert stored_periods() == ["2026-01"]
+    df = query()
+    assert df["자재코드"].tolist() == ["9300001"]
+    assert df["배치수"].tolist() == [2] and df["기말수량"].tolist() == [60.0]
+    assert not list(history_store.HISTORY_DIR.rglob("*.tmp"))
+
+
+def test_period_range_filter():
+    for month in (11, 12):
+        append_period(("2025년", f"{month}월"), _forecast(["9300001"]))
+    for month in (1, 2):
+        append_period(("2026년", f"{month}월"), _forecast(["9300001"]))
+
+    assert stored_periods() == ["2025-11", "2025-12", "2026-01", "2026-02"]
+    assert query(start=("2025년", "12월"), end="2026-01")["기간"].tolist() == ["2025-12", "2026-01"]
+    assert query(start="2026-01")["기간"].tolist() == ["2026-01", "2026-02"]
+    assert query(end="2025-11")["기간"].tolist() == ["2025-11"]
+
+
+def test_material_filter():
+    append_period("2026-01", _forecast(["9300001", "9300002", "9300003"]))
+    append_period("2026-02", _forecast(["9300002", "9300004"]))
+
+    df = query(materials=["9300002.0", 9300004], columns=["기간", "자재코드", "예측부진재고금액"])
+    assert list(df.columns) == ["기간", "자재코드", "예측부진재고금액"]
+    assert list(zip(df["기간"], df["자재코드"])) == [("2026-01", "9300002"), ("2026-02", "9300002"), ("2026-02", "9300004")]
+
+
+def test_query_without_history_is_empty():
+    assert query(columns=["기간", "자재코드"]).empty
@@ -0,0 +1,77 @@
+"""HTML 형식 "가짜 .xls" 파서 (parse_html_tables) — 인코딩 판정, rowspan/colspan, 상단 제목 행 제거"""
+import pandas as pd
+import pytest
+
+from utils import parse_html_tables, sniff_html_encoding
+
+
+def _html(body: str, charset: str = None) -> str:
+    meta = f'<meta http-equiv="Content-Type" content="text/html; charset={charset}">' if charset else ""
+    return f"<html><head>{meta}</head><body>{body}</body></html>"
+
+
+TABLE = (
+    "<table>"
+    "<tr><td>자재코드</td><td>자재내역</td><td>기말수량</td></tr>"
+    "<tr><td>9300001</td><td>크림 <b>50ml</b></td><td>1,200</td></tr>"
+    "<tr><td>9300002</td><td>토너</td><td>30</td></tr>"
+    "</table>"
+)
+EXPECTED = pd.DataFrame({"자재코드": ["9300001", "9300002"], "자재내역": ["크림50ml", "토너"], "기말수량": ["1,200", "30"]},
+                        dtype=object)
+
+
+@pytest.mark.parametrize("charset, encoding", [(None, "utf-8"), ("utf-8", "utf-8"), ("euc-kr", "cp949"), ("ks_c_5601-1987", "cp949")])
+def test_encodings(charset, encoding):
+    data = _html(TABLE, charset).encode(encoding)
+    pd.testing.assert_frame_equal(parse_html_tables(data), EXPECTED)
+
+
+def test_korean_charset_labels_read_as_cp949():
+    # 윈도우 내보내기는 euc-kr/ks_c_5601-1987 라벨로 cp949 확장 한글(예: 똠)을 쓰기도 함
+    table = TABLE.replace("토너", "똠양꿍")
+    for charset in ("euc-kr", "ks_c_5601-1987"):
+        df = parse_html_tables(_html(table, charset).encode("cp949"))
+        assert df["자재내역"].tolist() == ["크림50ml", "똠양꿍"]
+
+
+def test_cp949_without_meta_falls_back():
+    data = _html(TABLE).encode("cp949")
+    assert sniff_html_encoding(data) == "cp949"
+    pd.testing.assert_frame_equal(parse_html_tables(data), EXPECTED)
+
+
+def test_rowspan_and_colspan_are_filled():
+    body = (
+        "<table>"
+        "<tr><th rowspan='2'>자재코드</th><th colspan='2'>재고</th></tr>"
+        "<tr><th>수량</th><th>금액</th></tr>"
+        "<tr><td rowspan=2>9300001</td><td>10</td><td>100</td></tr>"
+        "<tr><td>20</td><td>200</td></tr>"
+        "</table>"
+    )
+    df = parse_html_tables(_html(body).encode("utf-8"))
+    # 헤더는 첫 행(병합 셀 값 복제), 두 번째 헤더 행부터 데이터
+    assert list(df.columns) == ["자재코드", "재고", "재고_1"]
+    assert df.values.tolist() == [["자재코드", "수량", "금액"], ["9300001", "10", "100"], ["9300001", "20", "200"]]
+
+
+def test_title_rows_dropped_and_short_rows_padded():
+    body = (
+        "<table>"
+        "<tr><td>재고 현황</td></tr>"
+        "<tr><td>조회일: 2026-01-31</td></tr>"
+        "<tr><td>자재코드</td><td>자재내역</td><td>기말수량</td></tr>"
+        "<tr><td>9300001</td><td>크림</td></tr>"
+        "</table>"
+        "<table><tr><td>다른 표</td><td>x</td></tr></table>"
+    )
+    df = parse_html_tables(_html(body).encode("utf-8"))
+    assert list(df.columns) == ["자재코드", "자재내역", "기말수량"]
+    assert df.values.tolist() == [["9300001", "크림", None]]   # 두 번째 표는 읽지 않음
+
+
+@pytest.mark.parametrize("data", [b"", b"  \n", _html("<p>no table</p>").encode("utf-8")])
+def test_no_table_raises(data):
+    with pytest.raises(ValueError):
+        parse_html_tables(data)
@@ -0,0 +1,57 @@
+"""증분 시뮬레이션 (simulate_incremental) — 바뀐 자재만 다시 계산해도 전체 실행과 결과가 같은지"""
+from datetime import date
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from inventory_utils2 import simulate_incremental
+
+INVENTORY_CSV = Path(__file__).resolve().parent.parent / "data" / "2026년" / "1월" / "inventory.csv"
+TODAY = date(2026, 1, 31)
+RESULT_COLS = ["예측부진재고", "예측부진재고금액", "판매개선율", "권장판매량"]
+
+
+@pytest.fixture(scope="module")
+def inventory() -> pd.DataFrame:
+    return pd.read_csv(INVENTORY_CSV, encoding="utf-8-sig")
+
+
+@pytest.fixture(scope="module")
+def full_run(inventory):
+    detail, updated, fp, n_changed = simulate_incremental(inventory, today=TODAY)
+    assert n_changed == len(fp)
+    return {"detail": detail, "updated": updated, "fingerprint": fp}
+
+
+def _assert_same(result, expected):
+    detail, updated = result[:2]
+    exp_detail, exp_updated = expected[:2]
+    pd.testing.assert_frame_equal(detail, exp_detail, check_dtype=False)
+    pd.testing.assert_frame_equal(updated[RESULT_COLS].astype(str), exp_updated[RESULT_COLS].astype(str))
+
+
+def test_same_day_rerun_reuses_everything(inventory, full_run):
+    result = simulate_incremental(inventory, prev=full_run, today=TODAY)
+    assert result[3] == 0
+    _assert_same(result, (full_run["detail"], full_run["updated"]))
+
+
+def test_changed_material_matches_full_run(inventory, full_run):
+    changed = inventory.copy()
+    slow = full_run["updated"].loc[full_run["updated"]["예측부진재고"] > 0, "자재코드"].iloc[0]
+    rows = changed["자재코드"] == slow
+    changed.loc[rows, "기말수량"] = pd.to_numeric(changed.loc[rows, "기말수량"]) * 1.5
+
+    result = simulate_incremental(changed, prev=full_run, today=TODAY)
+    assert result[3] == 1
+    _assert_same(result, simulate_incremental(changed, today=TODAY))
+
+
+def test_next_day_recomputes_materials_with_expiry(inventory, full_run):
+    # 다음 날 전처리하면 남은일이 하루 줄어서 유효기한이 있는 자재는 모두 재계산 (유효기한 없는 자재만 재사용)
+    next_day = inventory.copy()
+    days = pd.to_numeric(next_day["남은일"], errors="coerce")
+    next_day["남은일"] = days - 1
+    _, _, _, n_changed = simulate_incremental(next_day, prev=full_run, today=date(2026, 2, 1))
+    assert n_changed == next_day.loc[days.notna(), "자재코드"].nunique()
@@ -0,0 +1,70 @@
+"""입력 파일 파싱 캐시 (load_input_file_cached) — 내용 해시 적중, 변경/버전 무효화, LRU 정리"""
+import os
+
+import pandas as pd
+import pytest
+
+import utils
+from utils import load_input_file_cached
+
+
+@pytest.fixture
+def calls(tmp_path, monkeypatch):
+    """캐시 폴더를 tmp_path로, parse_input_file 호출 횟수 기록"""
+    monkeypatch.setattr(utils, "PARSE_CACHE_DIR", tmp_path / "parsed")
+    parse = utils.parse_input_file
+    count = []
+
+    def counting(file_bytes, filename):
+        count.append(filename)
+        return parse(file_bytes, filename)
+
+    monkeypatch.setattr(utils, "parse_input_file", counting)
+    return count
+
+
+def _csv(n: int = 3) -> bytes:
+    rows = "".join(f"{9300000 + i},품목{i},{i * 10}\n" for i in range(n))
+    return ("자재코드,자재내역,기말수량\n" + rows).encode("utf-8-sig")
+
+
+def test_hit_skips_parsing_regardless_of_name(calls):
+    first = load_input_file_cached(_csv(), "재고.csv")
+    second = load_input_file_cached(_csv(), "다른이름.csv")
+    assert calls == ["재고.csv"]
+    pd.testing.assert_frame_equal(second, first)
+    assert len(list(utils.PARSE_CACHE_DIR.glob("*.parquet"))) == 1
+
+
+def test_changed_content_is_parsed_again(calls):
+    load_input_file_cached(_csv(3), "재고.csv")
+    df = load_input_file_cached(_csv(4), "재고.csv")
+    assert len(calls) == 2 and len(df) == 4
+    assert len(list(utils.PARSE_CACHE_DIR.glob("*.parquet"))) == 2
+
+
+def test_version_bump_invalidates(calls, monkeypatch):
+    load_input_file_cached(_csv(), "재고.csv")
+    monkeypatch.setattr(utils, "PARSE_CACHE_VERSION", utils.PARSE_CACHE_VERSION + 1)
+    load_input_file_cached(_csv(), "재고.csv")
+    load_input_file_cached(_csv(), "재고.csv")
+    assert len(calls) == 2
+
+
+def test_corrupt_entry_is_reparsed(calls):
+    load_input_file_cached(_csv(), "재고.csv")
+    path = utils._parse_cache_path(_csv(), "재고.csv")
+    path.write_bytes(b"not parquet")
+    df = load_input_file_cached(_csv(), "재고.csv")
+    assert len(calls) == 2 and len(df) == 3
+    pd.testing.assert_frame_equal(pd.read_parquet(path), df)
+
+
+def test_eviction_drops_least_recently_used(calls, monkeypatch):
+    load_input_file_cached(_csv(3), "a.csv")
+    load_input_file_cached(_csv(4), "b.csv")
+    old, recent = utils._parse_cache_path(_csv(3), "a.csv"), utils._parse_cache_path(_csv(4), "b.csv")
+    os.utime(old, (1, 1))
+    monkeypatch.setattr(utils, "PARSE_CACHE_MAX_BYTES", recent.stat().st_size)
+    utils._evict_parse_cache()
+    assert not old.exists() and recent.exists()
@@ -0,0 +1,102 @@
+"""기간별 산출물 저장소 (period_store) — Parquet 왕복, CSV가 더 새로우면 CSV, manifest 갱신"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import period_store
+from period_store import exists, load, period_manifest, save, source_file, source_stamp
+from sim_schema import DETAIL_COLUMNS, STOP_REASON_DTYPE
+
+PERIOD = ("2026년", "1월")
+
+
+@pytest.fixture(autouse=True)
+def data_root(tmp_path, monkeypatch):
+    monkeypatch.setattr(period_store, "DATA_ROOT", tmp_path / "data")
+    return tmp_path / "data"
+
+
+def _inventory() -> pd.DataFrame:
+    return pd.DataFrame({
+        "자재코드": ["9300001", "9300002", "9300003"], "배치": ["B1", "B2", None],
+        "기말수량": [10.0, 2.5, np.nan], "남은일": pd.array([30, None, 400], dtype="Int64"),
+        "유효기한": pd.to_datetime(["2026-03-01", None, "2027-03-01"]),
+    })
+
+
+def _csv_path(period, artifact):
+    return period_store.artifact_path(period, artifact, "csv")
+
+
+def _touch_later(path, seconds: int = 10):
+    st_ = path.stat()
+    os.utime(path, ns=(st_.st_atime_ns, st_.st_mtime_ns + seconds * 10**9))
+
+
+def test_parquet_round_trip_keeps_types():
+    df = _inventory()
+    path = save(PERIOD, "inventory", df)
+    assert path.suffix == ".parquet" and _csv_path(PERIOD, "inventory").exists()
+    assert source_file(PERIOD, "inventory") == path
+    pd.testing.assert_frame_equal(load(PERIOD, "inventory"), df)
+    pd.testing.assert_frame_equal(load(PERIOD, "inventory", columns=["자재코드", "남은일"]), df[["자재코드", "남은일"]])
+
+
+def test_mixed_display_column_saved_like_csv():
+    # binary_search 결과처럼 숫자와 빈칸("")이 섞인 컬럼 → CSV로 다시 읽을 때와 같은 float (빈칸 = NaN)
+    df = pd.DataFrame({"자재코드": ["A", "B", "C"], "판매개선율": ["50%", "", "900% 이상"],
+                       "권장판매량": pd.Series([12.5, "", 300.0], dtype=object)})
+    save(PERIOD, "forecasted_inventory", df)
+    from_pq = load(PERIOD, "forecasted_inventory")
+    from_csv = pd.read_csv(_csv_path(PERIOD, "forecasted_inventory"), encoding="utf-8-sig", float_precision="round_trip")
+    pd.testing.assert_series_equal(from_pq["권장판매량"], from_csv["권장판매량"])
+    assert from_pq["판매개선율"].tolist() == ["50%", "", "900% 이상"]
+
+
+def test_newer_csv_wins():
+    save(PERIOD, "inventory", _inventory())
+    csv = _csv_path(PERIOD, "inventory")
+    edited = pd.read_csv(csv, encoding="utf-8-sig")
+    edited.loc[0, "기말수량"] = 99.0
+    edited.to_csv(csv, index=False, encoding="utf-8-sig")
+    _touch_later(csv)
+
+    assert source_file(PERIOD, "inventory") == csv
+    assert source_stamp(PERIOD, "inventory")["file"] == "inventory.csv"
+    assert load(PERIOD, "inventory")["기말수량"].tolist()[0] == 99.0
+
+    # 다시 저장하면 Parquet이 더 최근
+    save(PERIOD, "inventory", _inventory())
+    assert source_file(PERIOD, "inventory").suffix == ".parquet"
+    assert load(PERIOD, "inventory")["기말수량"].tolist()[0] == 10.0
+
+
+def test_csv_only_period_uses_artifact_dtypes():
+    # 예전 결과(CSV만 있음): simulation은 DETAIL_CSV_DTYPES로 읽음
+    detail = pd.DataFrame([["9300001", "x", "B1", 10.0, 30, 5, -1, -1, 0.1 + 0.2, 9.9, 0, "risk_reached"]], columns=DETAIL_COLUMNS)
+    out = period_store.period_dir(PERIOD)
+    out.mkdir(parents=True)
+    detail.to_csv(out / "simulation.csv", index=False, encoding="utf-8-sig")
+
+    df = load(PERIOD, "simulation")
+    assert df["stop_reason"].dtype == STOP_REASON_DTYPE and df["init_days"].dtype == "int32"
+    assert df["qty_sold"].iloc[0] == 0.1 + 0.2   # round_trip: 저장한 float 그대로
+
+
+def test_missing_artifact():
+    assert not exists(PERIOD, "inventory") and source_stamp(PERIOD, "inventory") is None
+    with pytest.raises(FileNotFoundError):
+        load(PERIOD, "inventory")
+
+
+def test_manifest_follows_hand_edited_csv():
+    save(PERIOD, "inventory", _inventory())
+    assert period_manifest(PERIOD)["inventory"]["rows"] == 3
+
+    csv = _csv_path(PERIOD, "inventory")
+    pd.concat([pd.read_csv(csv, encoding="utf-8-sig")] * 2).to_csv(csv, index=False, encoding="utf-8-sig")
+    _touch_later(csv)
+    entry = period_manifest(PERIOD)["inventory"]
+    assert entry["rows"] == 6 and entry["csv_mtime"] == csv.stat().st_mtime
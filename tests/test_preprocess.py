@@ -0,0 +1,44 @@
+"""preprocess_df 숫자 컬럼 판정 — 표본 사전검사가 70% 기준의 정확한 판정을 바꾸지 않는지"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import NUMERIC_THRESHOLD, _NUMERIC_SAMPLE, preprocess_df
+
+
+def _mixed(n: int, is_text) -> pd.Series:
+    return pd.Series([f"txt{i}" if is_text(i) else f"{i:,}" for i in range(n)], dtype=object)
+
+
+def _exact_numeric(s: pd.Series) -> bool:
+    num = pd.to_numeric(s.astype(str).str.strip().str.replace(",", "", regex=False), errors="coerce")
+    return num.notna().mean() >= NUMERIC_THRESHOLD
+
+
+N = _NUMERIC_SAMPLE * 10
+
+CASES = {
+    # 정렬된 컬럼: 텍스트가 앞에, 숫자가 뒤에 몰려 있음
+    "sorted_75pct_numeric": _mixed(N, lambda i: i < N // 4),
+    "sorted_60pct_numeric": _mixed(N, lambda i: i < N * 2 // 5),
+    # 주기적 컬럼: 등간격 표본이 텍스트 행만 고르는 배치 (10행마다 텍스트)
+    "periodic_90pct_numeric": _mixed(N, lambda i: i % 10 == 0),
+    "periodic_20pct_numeric": _mixed(N, lambda i: i % 5 != 0),
+    # 표본 크기 이하 컬럼은 전체 판정
+    "short_70pct_numeric": _mixed(100, lambda i: i % 10 < 3),
+}
+
+
+@pytest.mark.parametrize("name", list(CASES))
+def test_numeric_decision_matches_exact_ratio(name):
+    s = CASES[name]
+    out = preprocess_df(pd.DataFrame({"값": s}))["값"]
+    assert pd.api.types.is_float_dtype(out) == _exact_numeric(s)
+
+
+def test_sorted_mixed_column_values():
+    s = CASES["sorted_75pct_numeric"]
+    # 텍스트 → 결측이 된 행도 남도록 키 컬럼을 같이 넘김 (preprocess_df는 전부 결측인 행을 버림)
+    out = preprocess_df(pd.DataFrame({"키": "k", "값": s}))["값"]
+    assert out.isna().sum() == N // 4
+    assert np.array_equal(out.iloc[N // 4:].to_numpy(), np.arange(N // 4, N, dtype=float))
@@ -0,0 +1,54 @@
+"""판매개선율 탐색 (binary_search) — 콜드 이분탐색과 이전 결과 기반 warm start"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from inventory_utils2 import binary_search, simulate_batches_by_product
+
+INVENTORY_CSV = Path(__file__).resolve().parent.parent / "data" / "2026년" / "1월" / "inventory.csv"
+TOL = 1e-3
+
+
+def _synthetic(n_mat: int = 60, seed: int = 0) -> pd.DataFrame:
+    """자재당 1~3개 배치, 남은일이 risk 이후로 떨어져 있는 단순한 재고 (잔량이 판매배수에 단조)"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for m in range(n_mat):
+        sales = float(rng.integers(30, 600))
+        for b in range(rng.integers(1, 4)):
+            rows.append({"자재코드": f"M{m:03d}", "자재내역": "x", "배치": f"B{b}", "남은일": int(rng.integers(200, 720)),
+                         "기말수량": float(rng.integers(100, 5000)), "3평판": sales, "단가": 1.0})
+    df = pd.DataFrame(rows)
+    df.insert(0, "인덱스", np.arange(len(df)))
+    return df
+
+
+def _multiplier(res: pd.DataFrame) -> pd.Series:
+    return pd.to_numeric(res["권장판매량"], errors="coerce") / res["3평판"]
+
+
+def test_warm_start_matches_cold_within_tolerance():
+    df = _synthetic()
+    _, updated = simulate_batches_by_product(df)
+    cold = binary_search(df, updated)
+    assert (cold["판매개선율"] != "").any()
+
+    rng = np.random.default_rng(1)
+    for _ in range(3):
+        prev = cold.copy()
+        noise = np.exp(rng.normal(0, 0.05, len(prev)))
+        prev["권장판매량"] = (pd.to_numeric(prev["권장판매량"], errors="coerce") * noise).astype(object)
+        warm = binary_search(df, updated, warm_start=prev)
+        assert np.nanmax(np.abs(_multiplier(warm) - _multiplier(cold))) <= TOL
+
+
+def test_warm_start_from_own_result_is_unchanged():
+    # 실제 재고(잔량이 단조가 아닌 자재 포함)도 입력이 그대로면 이전 결과를 그대로 재현
+    df = pd.read_csv(INVENTORY_CSV, encoding="utf-8-sig")
+    _, updated = simulate_batches_by_product(df)
+    cold = binary_search(df, updated)
+    warm = binary_search(df, updated, warm_start=cold)
+    assert (warm["판매개선율"] == cold["판매개선율"]).all()
+    np.testing.assert_array_equal(_multiplier(warm).to_numpy(), _multiplier(cold).to_numpy())
+    assert warm.attrs["search_stats"]["evaluations"] < warm.attrs["search_stats"]["cold_evaluations"]
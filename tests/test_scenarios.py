@@ -0,0 +1,48 @@
+"""시나리오 스윕 (simulate_scenarios) — 시나리오마다 따로 돌린 시뮬레이션과 같은 결과인지"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import inventory_utils2
+from inventory_utils2 import simulate_batches_by_product, simulate_scenarios
+
+INVENTORY_CSV = Path(__file__).resolve().parent.parent / "data" / "2026년" / "1월" / "inventory.csv"
+MULTIPLIERS, RISK_DAYS, STEP_DAYS = (1.0, 1.5, 3.0), (90, 180), (7, 30)
+
+
+@pytest.fixture(scope="module")
+def inventory() -> pd.DataFrame:
+    df = pd.read_csv(INVENTORY_CSV, encoding="utf-8-sig")
+    return df[df["자재코드"].isin(df["자재코드"].unique()[:150])].reset_index(drop=True)
+
+
+def _single(df: pd.DataFrame, mult: float, risk: int, step: int) -> pd.DataFrame:
+    df_in = df.copy()
+    df_in["3평판"] = pd.to_numeric(df_in["3평판"], errors="coerce").fillna(0) * mult
+    _, updated = simulate_batches_by_product(df_in, risk_days=risk, step_days=step)
+    return updated.groupby(["자재코드", "자재내역"], sort=False)[["예측부진재고", "예측부진재고금액"]].sum()
+
+
+def test_each_scenario_matches_single_run(inventory):
+    out = simulate_scenarios(inventory, MULTIPLIERS, RISK_DAYS, STEP_DAYS)
+    assert len(out) == len(MULTIPLIERS) * len(RISK_DAYS) * len(STEP_DAYS) * inventory.groupby(["자재코드", "자재내역"]).ngroups
+
+    for (mult, risk, step), sc in out.groupby(["판매배수", "risk_days", "step_days"]):
+        expected = _single(inventory, mult, risk, step)
+        got = sc.set_index(["자재코드", "자재내역"]).loc[expected.index]
+        np.testing.assert_allclose(got["예측부진재고"], expected["예측부진재고"], rtol=1e-9, atol=1e-6)
+        np.testing.assert_allclose(got["예측부진재고금액"], expected["예측부진재고금액"], rtol=1e-9, atol=1e-3)
+
+
+def test_chunking_does_not_change_result(inventory, monkeypatch):
+    whole = simulate_scenarios(inventory, MULTIPLIERS, RISK_DAYS, STEP_DAYS)
+    monkeypatch.setattr(inventory_utils2, "_SCENARIO_CHUNK_ROWS", len(inventory) * 2)   # 커널 1회당 시나리오 2개
+    pd.testing.assert_frame_equal(simulate_scenarios(inventory, MULTIPLIERS, RISK_DAYS, STEP_DAYS), whole)
+
+
+def test_multiplier_reduces_slow_stock(inventory):
+    out = simulate_scenarios(inventory, MULTIPLIERS)
+    total = out.groupby("판매배수")["예측부진재고"].sum()
+    assert total.is_monotonic_decreasing and total.iloc[-1] < total.iloc[0]
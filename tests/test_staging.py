@@ -0,0 +1,77 @@
+"""staging — 원본 → 타입 고정 Parquet 적재, manifest 기반 재사용과 변경 감지"""
+import os
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import staging
+import utils
+from utils import parse_input_file
+
+REPO = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """staging/ 와 파싱 캐시를 tmp_path 아래로 (저장소의 실제 폴더는 건드리지 않음)"""
+    monkeypatch.setattr(staging, "STAGING_DIR", tmp_path / "staging")
+    monkeypatch.setattr(staging, "MANIFEST_FILE", tmp_path / "staging" / "manifest.json")
+    monkeypatch.setattr(staging, "MASTER_DIR", tmp_path / "staging" / "masters")
+    monkeypatch.setattr(utils, "PARSE_CACHE_DIR", tmp_path / "parsed")
+    (tmp_path / "input" / "재고개요").mkdir(parents=True)
+    return tmp_path
+
+
+def _write_csv(path: Path, n: int = 5) -> Path:
+    pd.DataFrame({
+        "자재": [f"{9300000 + i}.0" for i in range(n)], "배치": [f"B{i}" for i in range(n)],
+        "기말수량": [f"{i * 10:,}" for i in range(n)], "비고": ["x"] * n,
+    }).to_csv(path, index=False, encoding="utf-8-sig")
+    return path
+
+
+def test_round_trip_applies_schema(store):
+    src = _write_csv(store / "input" / "재고개요" / "재고개요.csv")
+    df = staging.load_staged("재고개요", src)
+
+    expected = staging.apply_staging_schema(parse_input_file(src.read_bytes(), src.name), "재고개요")
+    pd.testing.assert_frame_equal(df, expected)
+    assert df["자재"].tolist() == [str(9300000 + i) for i in range(5)]
+    assert df["기말수량"].dtype == "float64"
+
+    entry = staging.load_manifest()["재고개요/재고개요.csv"]
+    assert entry["rows"] == 5 and entry["schema"]["기말수량"] == "float64"
+    assert (staging.STAGING_DIR / entry["staged"]).exists()
+
+
+def test_unchanged_source_is_reused(store):
+    src = _write_csv(store / "input" / "재고개요" / "재고개요.csv")
+    first = staging.stage_file(src, "재고개요")
+    staged = staging.STAGING_DIR / first["staged"]
+    mtime = staged.stat().st_mtime_ns
+
+    assert staging.stage_file(src, "재고개요") == first
+    assert staged.stat().st_mtime_ns == mtime
+
+
+def test_changed_source_is_restaged(store):
+    src = _write_csv(store / "input" / "재고개요" / "재고개요.csv")
+    first = staging.stage_file(src, "재고개요")
+    _write_csv(src, n=7)
+    st_ = src.stat()
+    os.utime(src, ns=(st_.st_atime_ns, st_.st_mtime_ns + 10**9))
+
+    second = staging.stage_file(src, "재고개요")
+    assert second["staged"] != first["staged"] and second["rows"] == 7
+    assert len(staging.load_staged("재고개요", src)) == 7
+
+
+def test_excel_source_round_trip(store):
+    src = store / "input" / "대분류_소분류.xlsx"
+    shutil.copy(REPO / "input_data" / "대분류_소분류" / "대분류_소분류.xlsx", src)
+    df = staging.load_staged("대분류_소분류", src)
+    expected = staging.apply_staging_schema(parse_input_file(src.read_bytes(), src.name), "대분류_소분류")
+    pd.testing.assert_frame_equal(df, expected)
+    assert df["자재"].map(type).eq(str).all()
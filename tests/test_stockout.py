@@ -0,0 +1,94 @@
+"""품절 현황 (load_stockout) — inventory stamp 기준 재사용과 무효화"""
+import os
+
+import pandas as pd
+import pytest
+
+import period_store
+import stockout
+from stockout import STOCKOUT_FILE, load_stockout
+
+PERIOD = ("2026년", "1월")
+
+
+@pytest.fixture
+def computed(tmp_path, monkeypatch):
+    """DATA_ROOT를 tmp_path로, 메모 비우기, stockout_table 호출 횟수 기록"""
+    monkeypatch.setattr(period_store, "DATA_ROOT", tmp_path / "data")
+    monkeypatch.setattr(stockout, "_memo", {})
+    table = stockout.stockout_table
+    count = []
+
+    def counting(inv_df):
+        count.append(len(inv_df))
+        return table(inv_df)
+
+    monkeypatch.setattr(stockout, "stockout_table", counting)
+    return count
+
+
+def _inventory(qty: float = 100.0) -> pd.DataFrame:
+    # 3평판 30 → 하루 1개: A는 qty일, B는 20+40=60일, C는 판매 없음(999일)
+    return pd.DataFrame({
+        "자재코드": ["A", "B", "B", "C"], "자재내역": ["a", "b", "b", "c"],
+        "3평판": [30.0, 30.0, 30.0, 0.0], "기말수량": [qty, 20.0, 40.0, 5.0], "배치": ["1", "1", "2", "1"],
+    })
+
+
+def test_table_values(computed):
+    period_store.save(PERIOD, "inventory", _inventory(qty=10))
+    df = load_stockout(PERIOD).set_index("자재코드")
+    assert df["재고일수"].tolist() == [10.0, 60.0, 999.0]
+    assert df["현황"].tolist() == ["위험", "정상", "정상"]
+    assert df.loc["B", "기말수량"] == 60.0
+
+
+def test_reuse_from_memo_then_file(computed):
+    period_store.save(PERIOD, "inventory", _inventory())
+    first = load_stockout(PERIOD)
+    first.loc[0, "현황"] = "변경"                    # 반환값을 고쳐도 메모는 그대로
+    pd.testing.assert_frame_equal(load_stockout(PERIOD), load_stockout(PERIOD))
+    assert len(computed) == 1
+
+    stockout._memo.clear()                            # 새 프로세스: stockout.parquet 재사용
+    again = load_stockout(PERIOD)
+    assert len(computed) == 1 and again.loc[0, "현황"] != "변경"
+    assert (period_store.period_dir(PERIOD) / STOCKOUT_FILE).exists()
+
+
+def test_resaved_inventory_recomputes(computed):
+    period_store.save(PERIOD, "inventory", _inventory(qty=100))
+    assert load_stockout(PERIOD).loc[0, "현황"] == "정상"
+    pq = period_store.artifact_path(PERIOD, "inventory")
+    period_store.save(PERIOD, "inventory", _inventory(qty=40))
+    st_ = pq.stat()
+    os.utime(pq, ns=(st_.st_atime_ns, st_.st_mtime_ns + 10**9))   # 같은 초 안의 재저장도 stamp가 바뀌도록
+
+    assert load_stockout(PERIOD).loc[0, "현황"] == "주의"
+    assert len(computed) == 2
+
+
+def test_hand_edited_csv_recomputes(computed):
+    period_store.save(PERIOD, "inventory", _inventory(qty=100))
+    load_stockout(PERIOD)
+    csv = period_store.artifact_path(PERIOD, "inventory", "csv")
+    _inventory(qty=5).to_csv(csv, index=False, encoding="utf-8-sig")
+    st_ = csv.stat()
+    os.utime(csv, ns=(st_.st_atime_ns, st_.st_mtime_ns + 10 * 10**9))
+
+    assert load_stockout(PERIOD).loc[0, "재고일수"] == 5.0
+    assert len(computed) == 2
+
+
+def test_version_bump_recomputes(computed, monkeypatch):
+    period_store.save(PERIOD, "inventory", _inventory())
+    load_stockout(PERIOD)
+    stockout._memo.clear()
+    monkeypatch.setattr(stockout, "STOCKOUT_VERSION", stockout.STOCKOUT_VERSION + 1)
+    load_stockout(PERIOD)
+    assert len(computed) == 2
+
+
+def test_missing_inventory(computed):
+    with pytest.raises(FileNotFoundError):
+        load_stockout(PERIOD)
@@ -1,34 +1,171 @@
+import codecs
+import hashlib
+import importlib.util
 import io
 import re
+import sys
 from wsgiref import headers
 import numpy as np
 import pandas as pd
-from bs4 import BeautifulSoup
+from lxml import etree
 import os
 from pathlib import Path
+from typing import Optional
+from pandas.io.parsers import TextParser
 
 # -----------------------------
 # 공통 전처리(값/컬럼명 정리)
 # -----------------------------
-def preprocess_df(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    df.columns = [re.sub(r"\s+", " ", str(c)).strip() for c in df.columns]
+# 값 종류가 적은 텍스트 컬럼은 category로 보관 (공백 제거한 컬럼명 기준, 숫자로 판정된 컬럼은 숫자형 유지)
+CATEGORY_COLUMNS = {"플랜트", "저장위치", "대분류", "소분류", "특별재고"}
+NUMERIC_THRESHOLD = 0.7
+# 행 무작위 표본(복원추출) 숫자 비율이 0.5 미만이면 전체 숫자 판정 생략 (명백한 텍스트 컬럼)
+# - 기준(0.7)과 0.2 차이: 실제 비율이 0.7 이상인데 표본이 0.5 미만일 확률 <= exp(-2 * 2000 * 0.2^2) = e^-160 (Hoeffding)
+# - 등간격 표본은 주기적으로 섞인 컬럼(예: 10행마다 텍스트)에서 틀릴 수 있어서 무작위 표본 사용
+_NUMERIC_SAMPLE = 2_000
+_NUMERIC_SAMPLE_CUTOFF = 0.5
+
+
+def _to_numeric_text(text: pd.Series) -> pd.Series:
+    return pd.to_numeric(text.str.replace(",", "", regex=False), errors="coerce")
+
+
+def _object_bytes(values: np.ndarray, counts: np.ndarray) -> int:
+    """memory_usage(deep=True)와 같은 object 컬럼 크기 (포인터 + 고유값별 크기 × 개수)"""
+    return int(counts.sum()) * 8 + int(np.dot(np.fromiter(map(sys.getsizeof, values), np.int64, len(values)), counts))
+
+
+def _factorize_keep_na(s: pd.Series):
+    """factorize (코드, object 고유값) - 결측은 종류별로 따로 (astype(str) 결과가 None → "None", NaN → "nan"으로 다름)"""
+    codes, uniques = pd.factorize(s)
+    uniques = np.asarray(uniques, dtype=object)
+    na = codes < 0
+    if na.any():
+        na_codes, _ = pd.factorize(s[na].astype(str))
+        na_first = np.flatnonzero(na)[np.unique(na_codes, return_index=True)[1]]
+        codes[na] = na_codes + len(uniques)
+        uniques = np.concatenate([uniques, s.to_numpy(dtype=object)[na_first]])
+    return codes, uniques
+
 
-    obj_cols = df.select_dtypes(include=["object"]).columns
-    for c in obj_cols:
-        df[c] = df[c].astype(str).str.strip()
+def _clean_object_column(s: pd.Series, as_category: bool):
+    """
+    object 컬럼 1개를 한 번에 정리: strip → (콤마 제거 후 숫자 비율 >= 70%면) 숫자형, 아니면 문자열/category
+    - 문자열 연산과 숫자 판정은 고유값에만 하고, 행 수만큼의 비율은 고유값별 개수로 계산
+    - (정리된 컬럼, 변환 전 bytes, 변환 후 bytes) 반환
+    """
+    codes, uniques = _factorize_keep_na(s)
+    counts = np.bincount(codes, minlength=len(uniques))
+    before = _object_bytes(uniques, counts)
+    text = pd.Series(uniques, dtype=object).astype(str).str.strip()
+
+    numeric = None
+    if len(s):
+        likely = True
+        if len(codes) > _NUMERIC_SAMPLE:
+            sample = codes[np.random.default_rng(0).integers(0, len(codes), _NUMERIC_SAMPLE)]
+            likely = _to_numeric_text(text.iloc[sample]).notna().mean() >= _NUMERIC_SAMPLE_CUTOFF
+        if likely:
+            numeric = _to_numeric_text(text)
+            if counts[numeric.notna().to_numpy()].sum() / len(s) < NUMERIC_THRESHOLD:
+                numeric = None
+
+    if numeric is not None:
+        out = pd.Series(numeric.to_numpy()[codes], index=s.index)
+        return out, before, int(out.memory_usage(index=False))
+
+    values = text.to_numpy(dtype=object)
+    if as_category:
+        out = pd.Series(pd.Categorical(values[codes]), index=s.index)
+        return out, before, int(out.memory_usage(index=False, deep=True))
+    return pd.Series(values[codes], index=s.index, dtype=object), before, _object_bytes(values, counts)
+
+
+def preprocess_df(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    컬럼명 공백 정리 + 텍스트 값 strip + 숫자 컬럼 자동 변환 + 저카디널리티 텍스트 category 변환
+    - 결과의 attrs["memory_report"]에 변환 전/후 컬럼 메모리(bytes, deep 기준)와 절감량 기록
+    """
+    cols = [re.sub(r"\s+", " ", str(c)).strip() for c in df.columns]
 
-    for c in df.columns:
-        if df[c].dtype == "object":
-            s = df[c].str.replace(",", "", regex=False)
-            numeric = pd.to_numeric(s, errors="coerce")
-            if numeric.notna().mean() >= 0.7:
-                df[c] = numeric
+    cleaned, mem_before, mem_after = [], 0, 0
+    for c, (_, s) in zip(cols, df.items()):
+        if s.dtype == object or isinstance(s.dtype, pd.StringDtype):
+            s, before, after = _clean_object_column(s, c.replace(" ", "") in CATEGORY_COLUMNS)
+        else:
+            before = after = int(s.memory_usage(index=False, deep=True))
+        cleaned.append(s)
+        mem_before += before
+        mem_after += after
 
+    df = pd.concat(cleaned, axis=1, ignore_index=True) if cleaned else df.copy()
+    df.columns = cols
     df = df.dropna(how="all").dropna(axis=1, how="all")
+
+    df.attrs["memory_report"] = {"before": mem_before, "after": mem_after, "saved": mem_before - mem_after}
     return df
 
 
+# -----------------------------
+# 자재코드/배치 코드 정규화
+# -----------------------------
+def _normalize_code_values(values: np.ndarray, to_int: bool = False) -> np.ndarray:
+    """
+    고유값 배열 → 코드 문자열 (정규식 없이)
+    - 기본: str → strip → 끝의 '.0' 한 번 제거 ("1000940.0" → "1000940")
+    - to_int=True: 콤마 제거 후 숫자면 반올림 정수 문자열, "nan"/"<NA>" → "" (재고 시뮬레이션 매핑 규칙)
+    """
+    text = pd.Series(values, dtype=object).astype(str).str.strip()
+    if not to_int:
+        return text.str.removesuffix(".0").to_numpy(dtype=object)
+    text = text.str.replace(",", "", regex=False)
+    num = pd.to_numeric(text, errors="coerce")
+    mask = num.notna()
+    text.loc[mask] = num.loc[mask].round(0).astype("Int64").astype(str)
+    return text.replace({"nan": "", "<NA>": ""}).to_numpy(dtype=object)
+
+
+def normalize_code_series(s: pd.Series, to_int: bool = False) -> pd.Series:
+    """코드 컬럼 → 정규화 문자열(object) 컬럼, 문자열 연산은 고유값에만"""
+    codes, uniques = _factorize_keep_na(s)
+    return pd.Series(_normalize_code_values(uniques, to_int)[codes], index=s.index, dtype=object)
+
+
+def shared_code_keys(*series: pd.Series, to_int: bool = False) -> list:
+    """
+    여러 표의 코드 컬럼을 한 번에 정규화해 같은 categories를 공유하는 categorical 키로 변환
+    - .cat.codes가 표 사이에서 같은 정수 키 → merge/map이 정수 키 join
+    """
+    parts = [_factorize_keep_na(s) for s in series]
+    keys = [_normalize_code_values(uniques, to_int) for _, uniques in parts]
+    key_codes, categories = pd.factorize(np.concatenate(keys) if keys else np.array([], dtype=object))
+    dtype = pd.CategoricalDtype(categories)
+    out, start = [], 0
+    for s, (codes, _), k in zip(series, parts, keys):
+        cat = pd.Categorical.from_codes(key_codes[start:start + len(k)][codes], dtype=dtype)
+        out.append(pd.Series(cat, index=s.index))
+        start += len(k)
+    return out
+
+
+def take_positions(values: pd.Series, pos: np.ndarray):
+    """values를 행 위치(pos, -1 = 결측)로 가져옴 — dtype 유지 (category/Int64/datetime 포함)"""
+    return values.array.take(pos, allow_fill=True)
+
+
+def take_by_key(left_key: np.ndarray, right_key: np.ndarray, values: pd.Series) -> np.ndarray:
+    """
+    right_key별 첫 행의 values를 left_key 순서로 가져옴 (drop_duplicates → map 과 같음, 없는 키는 결측)
+    - 정수 키끼리 factorize 후 위치 gather
+    """
+    codes, uniques = pd.factorize(np.concatenate([left_key, right_key]))
+    n = len(left_key)
+    first_key, first_row = np.unique(codes[n:], return_index=True)
+    row_of_key = np.full(len(uniques), -1, dtype=np.intp)
+    row_of_key[first_key] = first_row
+    return take_positions(values, row_of_key[codes[:n]])
+
+
 # -----------------------------
 # 헤더 자동 보정
 # -----------------------------
@@ -181,12 +318,48 @@ def extract_table_any_excel(file_bytes: bytes, filename: str) -> pd.DataFrame:
 # -----------------------------
 # CSV 인코딩 안전 로더
 # -----------------------------
-def load_csv_any_encoding(file_bytes: bytes) -> pd.DataFrame:
+CSV_ENCODINGS = ("utf-8-sig", "utf-8", "cp949", "euc-kr")
+
+
+def _decodes(data: bytes, encoding: str) -> bool:
+    """data가 encoding으로 디코딩되는지 (끝에서 잘린 멀티바이트 문자는 허용)"""
+    try:
+        codecs.getincrementaldecoder(encoding)().decode(data, final=False)
+        return True
+    except UnicodeDecodeError:
+        return False
+
+
+def sniff_csv_encoding(file_bytes: bytes, prefix_bytes: int = 256 * 1024) -> Optional[str]:
+    """
+    BOM 확인 + 앞부분(prefix_bytes)만 시험 디코딩해서 CSV 인코딩 추정 (판정 불가면 None)
+    - UTF-8(BOM 유무 무관)은 utf-8-sig, 아니면 cp949(euc-kr 상위 호환)
+    """
+    if file_bytes.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    head = file_bytes[:prefix_bytes]
+    for enc in ("utf-8-sig", "cp949"):
+        if _decodes(head, enc):
+            return enc
+    return None
+
+
+def load_csv_any_encoding(file_bytes: bytes, engine: str = None) -> pd.DataFrame:
+    """
+    인코딩을 앞부분으로 한 번 판정한 뒤 read_csv 한 번으로 읽음
+    - 판정한 인코딩이 뒤쪽에서 깨지면(UnicodeDecodeError) 나머지 후보 순서대로 재시도, 모두 실패하면 깨진 글자 무시
+    - engine="pyarrow": 큰 파일용 pyarrow CSV 리더 (설치된 경우만, 타입 추론은 기본 엔진과 다를 수 있음)
+    """
+    if engine == "pyarrow" and importlib.util.find_spec("pyarrow") is None:
+        engine = None
+    sniffed = sniff_csv_encoding(file_bytes)
+    candidates = ([sniffed] if sniffed else []) + [e for e in CSV_ENCODINGS if e != sniffed]
+
     bio = io.BytesIO(file_bytes)
-    for enc in ("utf-8-sig", "utf-8", "cp949", "euc-kr"):
+    for enc in candidates:
         try:
             bio.seek(0)
-            return pd.read_csv(bio, encoding=enc)
+            return pd.read_csv(bio, encoding=enc, engine=engine)
         except Exception:
             pass
     bio.seek(0)
@@ -196,79 +369,145 @@ def load_csv_any_encoding(file_bytes: bytes) -> pd.DataFrame:
 # -----------------------------
 # MIME/HTML 기반 "가짜 .xls" HTML 테이블 fallback
 # -----------------------------
-def parse_html_tables(file_bytes: bytes) -> pd.DataFrame:
-    text = None
-    # 1. 인코딩 시도
-    for enc in ("utf-8", "utf-8-sig", "cp949", "euc-kr"):
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([A-Za-z0-9_.:-]+)""", re.IGNORECASE)
+_BOMS = [(codecs.BOM_UTF8, "utf-8"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16")]
+
+
+def _lxml_encoding(label: str):
+    """
+    charset 라벨을 lxml(libxml2)이 아는 이름으로 (latin-1 → iso8859-1 등), 모르면 None
+    - Python 정규 이름을 먼저 시도 (ks_c_5601-1987처럼 libxml2가 받아주지만 실제로는 못 읽는 라벨이 있음)
+    - 한국어 라벨(euc-kr/ks_c_5601-1987)은 상위 호환인 cp949로 (윈도우 내보내기는 확장 한글 포함)
+    """
+    try:
+        name = codecs.lookup(label).name
+    except LookupError:
+        return None
+    name = "cp949" if name == "euc_kr" else name.replace("_", "-")
+    candidates = [name, label]
+    for enc in candidates:
         try:
-            text = file_bytes.decode(enc, errors="ignore")
-            if text and text.strip():
-                break
-        except Exception:
+            etree.HTMLParser(encoding=enc)
+            return enc
+        except LookupError:
             pass
+    return None
+
 
-    if not text:
+def sniff_html_encoding(file_bytes: bytes, head_bytes: int = 4096) -> str:
+    """
+    BOM → <meta charset> → UTF-8 검증 순서로 인코딩을 한 번만 판정 (UTF-8이 아니면 cp949)
+    - 반환값은 lxml 파서에 바로 넘길 수 있는 이름
+    - UTF-8 검증은 증분 디코더로 64KB씩 (전체 문자열을 만들지 않음)
+    """
+    for bom, enc in _BOMS:
+        if file_bytes.startswith(bom):
+            return enc
+
+    m = _META_CHARSET.search(file_bytes[:head_bytes])
+    if m:
+        enc = _lxml_encoding(m.group(1).decode("ascii"))
+        if enc:
+            return enc
+
+    dec = codecs.getincrementaldecoder("utf-8")()
+    try:
+        for i in range(0, len(file_bytes), 1 << 16):
+            dec.decode(file_bytes[i:i + (1 << 16)])
+        dec.decode(b"", final=True)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "cp949"
+
+
+def _safe_span(val, default=1):
+    """rowspan/colspan 속성값 → 정수 (없거나 잘못된 값은 1, 브라우저처럼 1 미만은 1로)"""
+    try:
+        if val is None: return default
+        s_val = str(val).strip().replace('"', '').replace("'", "")
+        return max(1, int(s_val)) if s_val else default
+    except (ValueError, TypeError):
+        return default
+
+
+def _cell_text(cell) -> str:
+    """BeautifulSoup get_text(strip=True)와 같은 셀 텍스트 (자식 태그가 없으면 바로 strip)"""
+    if len(cell) == 0:
+        return (cell.text or "").strip()
+    return "".join(t.strip() for t in cell.itertext())
+
+
+def _iter_first_table_rows(file_bytes: bytes, encoding: str):
+    """
+    첫 번째 <table>의 <tr>을 (텍스트, rowspan, colspan) 셀 리스트로 하나씩 내보내는 lxml 증분 파서
+    - 처리한 <tr>은 바로 비워서 트리가 쌓이지 않게 함, 표가 없으면 아무것도 내보내지 않음
+    """
+    depth = 0
+    for ev, el in etree.iterparse(io.BytesIO(file_bytes), events=("start", "end"), tag=("table", "tr"),
+                                  html=True, encoding=encoding):
+        if el.tag == "table":
+            depth += 1 if ev == "start" else -1
+            if depth == 0:
+                return
+            continue
+        if ev == "end" and depth > 0:
+            yield [(_cell_text(c), _safe_span(c.get("rowspan")), _safe_span(c.get("colspan")))
+                   for c in el if c.tag in ("td", "th")]
+            el.clear()
+            while el.getprevious() is not None:
+                del el.getparent()[0]
+
+
+def parse_html_tables(file_bytes: bytes) -> pd.DataFrame:
+    """
+    SAP 등에서 내려받은 HTML 형식 "가짜 .xls"의 첫 번째 표를 DataFrame으로 변환
+    - 인코딩은 sniff_html_encoding으로 한 번만 판정, <tr> 단위 증분 파싱
+    - rowspan은 앞으로 채울 (행 → {열: 값})만 보관, 행은 리스트로 한 번만 모아서 DataFrame 생성
+    """
+    if not file_bytes or not file_bytes.strip():
         raise ValueError("텍스트로 디코딩이 불가합니다.")
+    encoding = sniff_html_encoding(file_bytes)
 
-    soup = BeautifulSoup(text, 'html.parser')
-    table = soup.find('table')
-    if not table:
-        raise ValueError("HTML 테이블을 찾지 못했습니다.")
+    pending = {}            # 아래 행 번호 → {열: 값} (rowspan으로 미리 채워지는 칸)
+    rows = []
+    num_cols = 0            # 행별 colspan 합의 최댓값 (이 폭을 넘는 칸은 마지막에 잘라냄)
+    found = False
 
-    rows = table.find_all('tr')
-    
-    def safe_int(val, default=1):
-        try:
-            if val is None: return default
-            s_val = str(val).strip().replace('"', '').replace("'", "")
-            return int(s_val) if s_val else default
-        except (ValueError, TypeError):
-            return default
-
-    # [수정] 2. 실제 필요한 최대 열 개수를 더 정확하게 파악
-    num_rows = len(rows)
-    num_cols = 0
-    for row in rows:
-        cells = row.find_all(['td', 'th'])
-        current_row_width = 0
-        for c in cells:
-            current_row_width += safe_int(c.get('colspan'))
-        if current_row_width > num_cols:
-            num_cols = current_row_width
-
-    # 3. 빈 격자 생성
-    grid = [[None for _ in range(num_cols)] for _ in range(num_rows)]
-
-    # 4. 데이터 채우기
-    for r_idx, row in enumerate(rows):
-        cells = row.find_all(['td', 'th'])
+    for r_idx, cells in enumerate(_iter_first_table_rows(file_bytes, encoding)):
+        found = True
+        num_cols = max(num_cols, sum(cs for _, _, cs in cells))
+        filled = pending.pop(r_idx, {})
         curr_col = 0
-        for cell in cells:
+        for val, row_span, col_span in cells:
             # 이미 채워진 칸(rowspan 영향) 건너뛰기
-            while curr_col < num_cols and grid[r_idx][curr_col] is not None:
+            while curr_col in filled:
                 curr_col += 1
-            
-            if curr_col >= num_cols:
-                break
-
-            val = cell.get_text(strip=True)
-            row_span = safe_int(cell.get('rowspan'))
-            col_span = safe_int(cell.get('colspan'))
-            
-            # 격자 범위를 벗어나지 않도록 안전하게 채우기
-            for r in range(r_idx, min(r_idx + row_span, num_rows)):
-                for c in range(curr_col, min(curr_col + col_span, num_cols)):
-                    grid[r][c] = val
-            
+            for c in range(curr_col, curr_col + col_span):
+                filled[c] = val
+            for r in range(r_idx + 1, r_idx + row_span):
+                below = pending.setdefault(r, {})
+                for c in range(curr_col, curr_col + col_span):
+                    below[c] = val
             curr_col += col_span
 
-    df = pd.DataFrame(grid)
+        row = [None] * (max(filled) + 1 if filled else 0)
+        for c, v in filled.items():
+            row[c] = v
+        rows.append(row)
 
-    # [추가] 5. 이미지처럼 상단에 불필요한 정보가 있는 경우 처리
-    # 유효한 데이터가 시작되는 지점(예: '관리회계 영역' 이 포함된 행)을 찾습니다.
-    # 만약 clean_header_row 함수를 쓰신다면, 그 함수가 이 "진짜 헤더"를 찾도록 설계되어야 합니다.
-    
-    # 임시 해결책: 첫 번째 행에 'None'이 너무 많으면 진짜 헤더가 나올 때까지 행을 버림
+    if not found:
+        raise ValueError("HTML 테이블을 찾지 못했습니다.")
+
+    # 모든 행을 num_cols 폭으로 맞춤 (짧은 행은 None으로 채우고, rowspan으로 넘친 칸은 잘라냄)
+    for i, row in enumerate(rows):
+        if len(row) < num_cols:
+            row.extend([None] * (num_cols - len(row)))
+        elif len(row) > num_cols:
+            rows[i] = row[:num_cols]
+    df = pd.DataFrame(rows, columns=range(num_cols), dtype=object)
+    del rows
+
+    # 상단에 불필요한 정보가 있는 경우: 첫 번째 행에 None이 너무 많으면 진짜 헤더가 나올 때까지 행을 버림
     while len(df) > 0 and df.iloc[0].isna().sum() > (len(df.columns) * 0.5):
         df = df.iloc[1:].reset_index(drop=True)
 
@@ -281,93 +520,175 @@ def parse_html_tables(file_bytes: bytes) -> pd.DataFrame:
 
 
 
+# -----------------------------
+# 엑셀 읽기 (빠른 엔진 우선)
+# -----------------------------
+# python-calamine(Rust)이 설치되어 있으면 사용, 없거나 실패하면 openpyxl
+EXCEL_FAST_ENGINE = "calamine" if importlib.util.find_spec("python_calamine") else None
+
+
+def _read_excel(file_bytes: bytes, sheet_name=0, **kwargs) -> pd.DataFrame:
+    if EXCEL_FAST_ENGINE:
+        try:
+            return pd.read_excel(io.BytesIO(file_bytes), sheet_name=sheet_name, engine=EXCEL_FAST_ENGINE, **kwargs)
+        except Exception:
+            pass
+    return pd.read_excel(io.BytesIO(file_bytes), sheet_name=sheet_name, **kwargs)
+
+
 # -----------------------------
 # 컬럼 작동 인식
 # -----------------------------
+# (선택) 자주 나오는 컬럼명 키워드(있으면 가점)
+HEADER_KEYWORDS = [
+    "자재", "자재코드", "자재 내역", "자재내역", "자재명",
+    "대분류", "소분류", "유효", "기말", "재고", "수량", "금액",
+    "판매", "평판", "단가", "원가율", "코드"
+]
+_HEADER_KW_PATTERN = "|".join(re.escape(k) for k in HEADER_KEYWORDS)
+
+
+def _score_header_rows(raw: pd.DataFrame) -> np.ndarray:
+    """
+    raw(header=None) 각 행의 헤더 점수를 블록 단위 배열 연산으로 계산 (비어있지 않은 셀 2개 미만 행은 -inf)
+    - 셀 문자열/길이/숫자 여부/키워드 포함 여부를 (행 x 열) 행렬로 만든 뒤 행별로 집계
+    """
+    n_rows, n_cols = raw.shape
+    if n_rows == 0 or n_cols == 0:
+        return np.full(n_rows, -np.inf)
+
+    flat = pd.Series(raw.to_numpy(dtype=object).ravel())
+    cells = flat.where(flat.notna(), "").astype(str).str.strip()
+    filled = (cells != "").to_numpy().reshape(n_rows, n_cols)
+
+    # 숫자처럼 보이는 셀: float(s.replace(",", "")) 가 성공하는 셀
+    no_comma = cells.str.replace(",", "", regex=False)
+    num_like = (pd.to_numeric(no_comma, errors="coerce").notna()
+                | no_comma.str.lower().isin(["nan", "+nan", "-nan"])).to_numpy().reshape(n_rows, n_cols) & filled
+    lengths = np.where(filled, cells.str.len().to_numpy().reshape(n_rows, n_cols), 0)
+    kw_hit = cells.str.contains(_HEADER_KW_PATTERN, regex=True).to_numpy().reshape(n_rows, n_cols) & filled
+    strong_hit = cells.str.contains("자재|코드", regex=True).to_numpy().reshape(n_rows, n_cols) & filled
+
+    # 행별 고유값 개수: 셀 문자열 코드를 행마다 정렬한 뒤 값이 바뀌는 지점 수
+    codes = np.where(filled, pd.factorize(cells)[0].reshape(n_rows, n_cols), -1)
+    codes.sort(axis=1)
+    n_uniq = (codes[:, :1] >= 0).sum(axis=1) + ((np.diff(codes, axis=1) != 0) & (codes[:, 1:] >= 0)).sum(axis=1)
+
+    n_filled = filled.sum(axis=1)
+    denom = np.maximum(n_filled, 1)
+    non_empty_ratio = n_filled / n_cols
+    num_ratio = num_like.sum(axis=1) / denom
+    uniq_ratio = n_uniq / denom
+    avg_len = lengths.sum(axis=1) / denom  # 텍스트 길이(헤더는 보통 짧음)
+
+    # 점수 설계(헤더일수록: 적당히 채워짐, 숫자 적음, 중복 적음, 텍스트 짧음, 키워드 많음)
+    score = np.zeros(n_rows)
+    score += non_empty_ratio * 3.0
+    score += (1 - num_ratio) * 4.0
+    score += uniq_ratio * 2.0
+    score += np.maximum(0, (20 - avg_len) / 20) * 1.0
+    score += kw_hit.sum(axis=1) * 2.5
+    # “자재/코드/명” 같은 강력 신호 있으면 추가 가점
+    score += np.where(strong_hit.any(axis=1), 1.5, 0.0)
+
+    return np.where(n_filled >= 2, score, -np.inf)
+
+
 def read_excel_with_smart_header(file_bytes: bytes, sheet_name=0, scan_rows: int = 60) -> pd.DataFrame:
     """
     엑셀의 헤더 행(컬럼 행)을 범용적으로 자동 탐지하여 DataFrame 생성
     - 키워드 기반 + 통계 기반(숫자비율/빈칸/중복/텍스트비율) 혼합
     - SAP/보고서형 엑셀(상단 공백/제목/병합셀)에도 비교적 강함
+    - 시트는 header=None으로 한 번만 디코딩, 탐지는 그중 상위 scan_rows행으로만 수행
     """
-    raw = pd.read_excel(io.BytesIO(file_bytes), sheet_name=sheet_name, header=None)
-    raw = raw.iloc[:scan_rows].copy()
+    full = _read_excel(file_bytes, sheet_name, header=None)
+    scores = _score_header_rows(full.iloc[:scan_rows])
 
-    def _cell_str(x):
-        if pd.isna(x):
-            return ""
-        return str(x).strip()
+    if not np.isfinite(scores).any():
+        raise ValueError("❌ 헤더 행을 자동으로 찾지 못했습니다. (scan_rows를 늘려보세요)")
+    best_idx = int(np.argmax(scores))
 
-    def _is_number_like(s: str) -> bool:
-        if s == "":
-            return False
-        try:
-            float(s.replace(",", ""))
-            return True
-        except:
-            return False
-
-    # (선택) 자주 나오는 컬럼명 키워드(있으면 가점)
-    header_keywords = [
-        "자재", "자재코드", "자재 내역", "자재내역", "자재명",
-        "대분류", "소분류", "유효", "기말", "재고", "수량", "금액",
-        "판매", "평판", "단가", "원가율", "코드"
-    ]
-
-    best_idx = None
-    best_score = -1e18
-
-    for i in range(len(raw)):
-        row = raw.iloc[i].tolist()
-        cells = [_cell_str(x) for x in row]
-
-        non_empty = [c for c in cells if c != ""]
-        if len(non_empty) < 2:
-            continue
+    # 이미 읽은 셀 값에서 best_idx를 header로 다시 파싱 (파일 재디코딩 없음, read_excel(header=best_idx)와 동일 결과)
+    df = TextParser(full.to_numpy(dtype=object).tolist(), header=best_idx).read()
+    df = df.dropna(how="all")
+    df.columns = [str(c).strip() for c in df.columns]  # 컬럼명 정리
 
-        # 통계 지표들
-        n = len(cells)
-        non_empty_ratio = len(non_empty) / max(n, 1)
+    # 이름 없는 컬럼 제거(전부 NaN인 열 등)
+    df = df.loc[:, ~df.columns.str.contains("^Unnamed", na=False)]
 
-        num_like = sum(_is_number_like(c) for c in non_empty)
-        num_ratio = num_like / max(len(non_empty), 1)
+    return df
 
-        uniq_ratio = len(set(non_empty)) / max(len(non_empty), 1)
 
-        # 텍스트 길이(헤더는 보통 짧음)
-        avg_len = np.mean([len(c) for c in non_empty]) if non_empty else 0
+# -----------------------------
+# 입력 파일 파싱 + 디스크 캐시 (내용 SHA-256 기준)
+# -----------------------------
+# 파싱/전처리 로직(read_excel_with_smart_header, preprocess_df 등)이 바뀌면 올려서 기존 캐시 무효화
+PARSE_CACHE_VERSION = 4
+PARSE_CACHE_DIR = Path(os.environ.get("SNOP_PARSE_CACHE_DIR", Path(__file__).resolve().parent / ".cache" / "parsed"))
+PARSE_CACHE_MAX_BYTES = int(float(os.environ.get("SNOP_PARSE_CACHE_MB", 512)) * 2**20)
 
-        # 키워드 포함 가점
-        kw_hits = sum(any(k in c for k in header_keywords) for c in non_empty)
 
-        # 점수 설계(헤더일수록: 적당히 채워짐, 숫자 적음, 중복 적음, 텍스트 짧음, 키워드 많음)
-        score = 0
-        score += non_empty_ratio * 3.0
-        score += (1 - num_ratio) * 4.0
-        score += uniq_ratio * 2.0
-        score += max(0, (20 - avg_len) / 20) * 1.0
-        score += kw_hits * 2.5
+def parse_input_file(file_bytes: bytes, filename: str) -> pd.DataFrame:
+    """csv / 엑셀 / HTML(가짜 .xls) 입력 파일을 읽어 preprocess_df까지 적용"""
+    if filename.lower().endswith(".csv"):
+        return preprocess_df(load_csv_any_encoding(file_bytes))
+    try:
+        return preprocess_df(read_excel_with_smart_header(file_bytes, scan_rows=80))
+    except:
+        return preprocess_df(parse_html_tables(file_bytes))
 
-        # “자재/코드/명” 같은 강력 신호 있으면 추가 가점
-        strong = any(("자재" in c or "코드" in c) for c in non_empty)
-        if strong:
-            score += 1.5
 
-        if score > best_score:
-            best_score = score
-            best_idx = i
+def _parse_cache_path(file_bytes: bytes, filename: str) -> Path:
+    kind = "csv" if filename.lower().endswith(".csv") else "excel"
+    digest = hashlib.sha256(file_bytes).hexdigest()
+    return PARSE_CACHE_DIR / f"{digest}_{kind}_v{PARSE_CACHE_VERSION}.parquet"
 
-    if best_idx is None:
-        raise ValueError("❌ 헤더 행을 자동으로 찾지 못했습니다. (scan_rows를 늘려보세요)")
 
-    # best_idx를 header로 재로딩
-    df = pd.read_excel(io.BytesIO(file_bytes), sheet_name=sheet_name, header=best_idx)
-    df = df.dropna(how="all")
-    df.columns = [str(c).strip() for c in df.columns]  # 컬럼명 정리
+def _evict_parse_cache(max_bytes: int = None):
+    """캐시 총 크기가 max_bytes를 넘으면 가장 오래 사용하지 않은(mtime) 파일부터 삭제"""
+    max_bytes = PARSE_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    entries = []
+    for f in PARSE_CACHE_DIR.glob("*.parquet"):
+        try:
+            st_ = f.stat()
+        except OSError:
+            continue
+        entries.append((st_.st_mtime, st_.st_size, f))
+    total = sum(size for _, size, _ in entries)
+    for _, size, f in sorted(entries, key=lambda e: e[0]):
+        if total <= max_bytes:
+            break
+        try:
+            f.unlink()
+            total -= size
+        except OSError:
+            pass
 
-    # 이름 없는 컬럼 제거(전부 NaN인 열 등)
-    df = df.loc[:, ~df.columns.str.contains("^Unnamed", na=False)]
 
+def load_input_file_cached(file_bytes: bytes, filename: str) -> pd.DataFrame:
+    """
+    parse_input_file 결과를 Parquet으로 디스크에 캐시
+    - 키: 파일 내용 SHA-256 + 형식(csv/excel) + PARSE_CACHE_VERSION (파일명/경로와 무관)
+    - 적중 시 memory-map으로 읽고 mtime을 갱신(LRU), 저장/읽기 실패 시 그냥 파싱 결과 사용
+    """
+    path = _parse_cache_path(file_bytes, filename)
+    if path.exists():
+        try:
+            df = pd.read_parquet(path, memory_map=True)
+            os.utime(path)
+            return df
+        except Exception:
+            pass
+
+    df = parse_input_file(file_bytes, filename)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        PARSE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(tmp)
+        os.replace(tmp, path)
+        _evict_parse_cache()
+    except Exception:
+        tmp.unlink(missing_ok=True)
     return df
 
 